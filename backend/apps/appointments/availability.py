@@ -0,0 +1,144 @@
+"""
+Motor de disponibilidad de horarios (appointment_slots).
+
+Calcula el cupo restante de todos los slots de una ventana de fechas con UNA
+consulta por página, en lugar de un COUNT por slot. El cupo usado sale del
+contador appointment_slots.used_capacity (ver booking.py).
+
+- iter_slot_availability(): generador de páginas (listas de dicts) ordenadas por
+  (start_at, slot_id). Cada página es una sola consulta con keyset, así que el
+  número de queries depende del tamaño de la ventana / page_size, nunca del
+  número de citas.
+- slot_availability(): atajo que concatena todas las páginas.
+"""
+import uuid
+from datetime import datetime, time, timedelta
+
+from django.db import connection
+from django.utils import timezone
+
+DEFAULT_PAGE_SIZE = 200
+
+
+def _day_start(value):
+    """Convierte 'YYYY-MM-DD' / date en el inicio del día de negocio (TIME_ZONE)."""
+    if isinstance(value, str):
+        value = datetime.strptime(value.strip(), "%Y-%m-%d").date()
+    return timezone.make_aware(datetime.combine(value, time.min))
+
+
+def _service_minutes(service_id):
+    """
+    Devuelve estimated_minutes del servicio (o 0 si no tiene).
+    None si el servicio no existe, está inactivo o el id no es un UUID.
+    """
+    try:
+        service_id = uuid.UUID(str(service_id))
+    except ValueError:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "select coalesce(estimated_minutes, 0) from public.services where service_id = %s and is_active = true",
+            [str(service_id)],
+        )
+        row = cursor.fetchone()
+    return int(row[0]) if row else None
+
+
+def iter_slot_availability(
+    date_from=None,
+    date_to=None,
+    service_id=None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    include_full: bool = False,
+    future_only: bool = False,
+):
+    """
+    Genera páginas de slots activos con su cupo restante.
+
+    - date_from / date_to: días de negocio inclusivos ('YYYY-MM-DD' o date).
+      Sin date_from se usa "ahora" (solo slots futuros).
+    - service_id: solo slots cuya duración alcanza para el servicio
+      (estimated_minutes). Slots sin end_at se consideran abiertos.
+      Si el servicio no existe o está inactivo no se devuelve nada.
+    - include_full: incluir slots sin cupo (remaining_capacity = 0).
+    - future_only: nunca devolver slots que ya empezaron, aunque date_from
+      sea hoy o un día pasado (listado del portal del cliente).
+    """
+    now = timezone.now()
+    start_bound = _day_start(date_from) if date_from else now
+    if future_only:
+        start_bound = max(start_bound, now)
+    end_bound = _day_start(date_to) + timedelta(days=1) if date_to else None
+
+    filters = ["s.is_active = true", "s.start_at >= %s"]
+    values = [start_bound]
+
+    if end_bound is not None:
+        filters.append("s.start_at < %s")
+        values.append(end_bound)
+
+    if service_id:
+        minutes = _service_minutes(service_id)
+        if minutes is None:
+            return
+        if minutes > 0:
+            filters.append("(s.end_at is null or s.end_at - s.start_at >= %s * interval '1 minute')")
+            values.append(minutes)
+
+    if not include_full:
+        filters.append("s.used_capacity < s.capacity")
+
+    last_start = last_id = None
+    while True:
+        page_filters = list(filters)
+        page_values = list(values)
+        if last_start is not None:
+            page_filters.append("(s.start_at, s.slot_id) > (%s, %s)")
+            page_values.extend([last_start, last_id])
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                select
+                    s.slot_id,
+                    s.start_at,
+                    s.end_at,
+                    s.capacity,
+                    s.used_capacity
+                from public.appointment_slots s
+                where {' and '.join(page_filters)}
+                order by s.start_at, s.slot_id
+                limit %s
+                """,
+                page_values + [page_size],
+            )
+            rows = cursor.fetchall()
+
+        if not rows:
+            return
+
+        yield [
+            {
+                "slot_id": str(slot_id),
+                "start_at": start_at,
+                "end_at": end_at,
+                "capacity": int(capacity),
+                "remaining_capacity": max(int(capacity) - int(used or 0), 0),
+            }
+            for slot_id, start_at, end_at, capacity, used in rows
+        ]
+
+        if len(rows) < page_size:
+            return
+        last_start, last_id = rows[-1][1], rows[-1][0]
+
+
+def slot_availability(date_from=None, date_to=None, service_id=None, include_full: bool = False,
+                      future_only: bool = False) -> list:
+    """Lista plana con todas las páginas de iter_slot_availability()."""
+    result = []
+    for page in iter_slot_availability(date_from, date_to, service_id, include_full=include_full,
+                                       future_only=future_only):
+        result.extend(page)
+    return result
@@ -0,0 +1,193 @@
+"""
+Reserva atómica de cupos en appointment_slots.
+
+appointment_slots.used_capacity es un contador de citas no canceladas por slot.
+La reserva se hace con un UPDATE condicional (used_capacity < capacity) dentro
+del mismo statement que inserta la cita, así que dos reservas concurrentes
+nunca pueden sobrepasar el cupo: la segunda espera el row lock del UPDATE y
+re-evalúa la condición.
+
+- book_slot(): reserva + INSERT en un solo round-trip.
+- cancel_customer_appointment(): cancela y libera el cupo en un solo statement.
+- apply_status_change(): ajusta el contador cuando staff cambia el estado.
+- delete_appointment(): borra la cita y libera su cupo si no estaba cancelada.
+- resync_used_capacity(): recalcula el contador desde las citas (reconciliación).
+"""
+from django.db import connection
+
+
+class SlotUnavailable(ValueError):
+    """El slot no existe o no está activo."""
+
+
+class SlotFull(ValueError):
+    """El slot existe pero no le quedan cupos."""
+
+
+def book_slot(
+    customer_id,
+    vehicle_id,
+    service_id,
+    slot_id,
+    requested_work: str = None,
+    notes: str = None,
+):
+    """
+    Reserva un cupo y crea la cita en estado 'scheduled'.
+    Retorna el appointment_id. Lanza SlotUnavailable / SlotFull.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            with reserved as (
+                update public.appointment_slots
+                set used_capacity = used_capacity + 1,
+                    updated_at = now()
+                where slot_id = %s
+                  and is_active = true
+                  and used_capacity < capacity
+                returning slot_id, start_at, end_at
+            )
+            insert into public.appointments
+              (customer_id, vehicle_id, service_id, slot_id, scheduled_start, scheduled_end,
+               requested_work, status, notes, admin_message, progress_percent, created_at, updated_at)
+            select
+               %s, %s, %s, r.slot_id, r.start_at, r.end_at,
+               %s, 'scheduled', %s, null, 0, now(), now()
+            from reserved r
+            returning appointment_id
+            """,
+            [
+                str(slot_id),
+                str(customer_id),
+                str(vehicle_id),
+                str(service_id),
+                requested_work,
+                notes,
+            ],
+        )
+        row = cursor.fetchone()
+        if row:
+            return row[0]
+
+        # Solo en el camino de error: distinguir "no existe" de "lleno"
+        cursor.execute(
+            "select 1 from public.appointment_slots where slot_id = %s and is_active = true",
+            [str(slot_id)],
+        )
+        if cursor.fetchone() is None:
+            raise SlotUnavailable("Horario no disponible.")
+    raise SlotFull("No hay cupos disponibles para este horario.")
+
+
+def cancel_customer_appointment(appointment_id, customer_id) -> bool:
+    """
+    Cancela una cita 'scheduled' del cliente y libera su cupo.
+    Retorna False si la cita ya no estaba en 'scheduled'.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            with cancelled as (
+                update public.appointments
+                set status = 'cancelled', updated_at = now()
+                where appointment_id = %s and customer_id = %s and status = 'scheduled'
+                returning slot_id
+            ),
+            released as (
+                update public.appointment_slots s
+                set used_capacity = greatest(s.used_capacity - 1, 0),
+                    updated_at = now()
+                from cancelled c
+                where s.slot_id = c.slot_id
+            )
+            select count(*) from cancelled
+            """,
+            [str(appointment_id), str(customer_id)],
+        )
+        return bool(cursor.fetchone()[0])
+
+
+def apply_status_change(slot_id, old_status: str, new_status: str) -> None:
+    """
+    Ajusta used_capacity cuando una cita entra o sale de 'cancelled'.
+    Reactivar una cita cancelada puede exceder el cupo (decisión del staff).
+    Debe llamarse en la misma transacción que el UPDATE de la cita.
+    """
+    if not slot_id:
+        return
+    was_cancelled = (old_status or "").strip() == "cancelled"
+    is_cancelled = (new_status or "").strip() == "cancelled"
+    if was_cancelled == is_cancelled:
+        return
+
+    delta = -1 if is_cancelled else 1
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            update public.appointment_slots
+            set used_capacity = greatest(used_capacity + %s, 0),
+                updated_at = now()
+            where slot_id = %s
+            """,
+            [delta, str(slot_id)],
+        )
+
+
+def delete_appointment(appointment_id) -> bool:
+    """
+    Borra la cita y, si no estaba cancelada, libera su cupo en el mismo
+    statement. Retorna False si la cita ya no existía.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            with deleted as (
+                delete from public.appointments
+                where appointment_id = %s
+                returning slot_id, status
+            ),
+            released as (
+                update public.appointment_slots s
+                set used_capacity = greatest(s.used_capacity - 1, 0),
+                    updated_at = now()
+                from deleted d
+                where s.slot_id = d.slot_id
+                  and coalesce(d.status, '') <> 'cancelled'
+            )
+            select count(*) from deleted
+            """,
+            [str(appointment_id)],
+        )
+        return bool(cursor.fetchone()[0])
+
+
+def resync_used_capacity(slot_id=None) -> int:
+    """
+    Recalcula used_capacity desde las citas no canceladas.
+    Sin slot_id recalcula todos. Retorna la cantidad de slots corregidos.
+    """
+    filters = ["u.slot_id = s.slot_id", "s.used_capacity <> u.used"]
+    params = []
+    if slot_id:
+        filters.append("s.slot_id = %s")
+        params.append(str(slot_id))
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            update public.appointment_slots s
+            set used_capacity = u.used
+            from (
+                select sl.slot_id, count(a.appointment_id) as used
+                from public.appointment_slots sl
+                left join public.appointments a
+                  on a.slot_id = sl.slot_id
+                 and coalesce(a.status, '') <> 'cancelled'
+                group by sl.slot_id
+            ) u
+            where {' and '.join(filters)}
+            """,
+            params,
+        )
+        return cursor.rowcount
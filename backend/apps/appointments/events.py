@@ -0,0 +1,220 @@
+"""
+Eventos en vivo para el portal del cliente (progreso de citas y OTs listas).
+
+Origen: triggers de la migración 0004 hacen pg_notify('customer_events', json)
+cuando cambia status / progress_percent / admin_message de una cita o una OT
+pasa a 'ready'. Como lo dispara la base, cualquier escritura (ORM, SQL crudo,
+comandos) genera el evento.
+
+Distribución (un broker por proceso):
+- backend "postgres": un hilo daemon mantiene UNA conexión con LISTEN y reparte
+  cada NOTIFY a las colas de los streams suscritos a ese customer_id. Si la
+  conexión se cae, reconecta y manda "resync" a todos (pueden haberse perdido
+  eventos; el cliente recarga una vez).
+- backend "local": sin LISTEN; solo publish() en memoria (tests/desarrollo).
+
+Los streams SSE se limitan por proceso (CUSTOMER_EVENTS_MAX_STREAMS) porque
+cada uno ocupa un hilo de gunicorn durante su vida (CUSTOMER_EVENTS_MAX_LIFETIME).
+"""
+import json
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.renderers import BaseRenderer
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "customer_events"
+QUEUE_MAX_SIZE = 100
+RECONNECT_DELAY = 5  # segundos
+
+
+class CustomerEventBroker:
+    def __init__(self, backend: str = "postgres"):
+        self.backend = backend
+        self._subscribers = defaultdict(set)  # customer_id -> {Queue}
+        self._lock = threading.Lock()
+        self._listener = None
+
+    # ── Suscripciones ─────────────────────────────────────────────────────────
+
+    def subscribe(self, customer_id) -> queue.Queue:
+        q = queue.Queue(maxsize=QUEUE_MAX_SIZE)
+        with self._lock:
+            self._subscribers[str(customer_id)].add(q)
+        self._ensure_listener()
+        return q
+
+    def unsubscribe(self, customer_id, q: queue.Queue) -> None:
+        with self._lock:
+            subs = self._subscribers.get(str(customer_id))
+            if subs is not None:
+                subs.discard(q)
+                if not subs:
+                    del self._subscribers[str(customer_id)]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+    # ── Publicación ───────────────────────────────────────────────────────────
+
+    def publish(self, customer_id, event: dict) -> None:
+        """Entrega un evento a los streams del cliente (no bloquea; descarta si la cola está llena)."""
+        with self._lock:
+            targets = list(self._subscribers.get(str(customer_id), ()))
+        for q in targets:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                pass
+
+    def broadcast(self, event: dict) -> None:
+        with self._lock:
+            targets = [q for subs in self._subscribers.values() for q in subs]
+        for q in targets:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                pass
+
+    def _dispatch(self, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+            customer_id = event.pop("customer_id")
+        except (ValueError, KeyError, TypeError):
+            logger.warning("customer_events: payload inválido %r", payload[:200])
+            return
+        self.publish(customer_id, event)
+
+    # ── LISTEN ────────────────────────────────────────────────────────────────
+
+    def _ensure_listener(self) -> None:
+        if self.backend != "postgres":
+            return
+        with self._lock:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            self._listener = threading.Thread(target=self._listen_forever, name="customer-events", daemon=True)
+            self._listener.start()
+
+    def _listen_forever(self) -> None:
+        first = True
+        while True:
+            try:
+                conn = self._connect()
+            except Exception:
+                logger.exception("customer_events: no se pudo conectar para LISTEN")
+                time.sleep(RECONNECT_DELAY)
+                continue
+            try:
+                if not first:
+                    self.broadcast({"type": "resync"})
+                first = False
+                # El timeout permite notar que ya no hay suscriptores y soltar la conexión
+                while True:
+                    for notify in conn.notifies(timeout=30):
+                        self._dispatch(notify.payload)
+                    with self._lock:
+                        if not self._subscribers:
+                            self._listener = None
+                            return
+            except Exception:
+                logger.exception("customer_events: conexión LISTEN perdida; reconectando")
+                time.sleep(RECONNECT_DELAY)
+            finally:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+    def _connect(self):
+        # Conexión propia (no la del request): mismos parámetros que Django, autocommit
+        wrapper = connections["default"]
+        conn = wrapper.get_new_connection(wrapper.get_connection_params())
+        conn.autocommit = True
+        conn.execute(f"LISTEN {CHANNEL}")
+        return conn
+
+
+broker = CustomerEventBroker(getattr(settings, "CUSTOMER_EVENTS_BACKEND", "postgres"))
+
+_stream_slots = threading.BoundedSemaphore(getattr(settings, "CUSTOMER_EVENTS_MAX_STREAMS", 4))
+
+
+def acquire_stream_slot() -> bool:
+    return _stream_slots.acquire(blocking=False)
+
+
+def release_stream_slot() -> None:
+    _stream_slots.release()
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Permite negociar Accept: text/event-stream (los errores salen como un evento)."""
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return sse_message({"type": "error", **(data or {})}).encode()
+
+
+def sse_message(event: dict, event_id: int = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event.get('type', 'message')}")
+    lines.append("data: " + json.dumps(event, default=str))
+    return "\n".join(lines) + "\n\n"
+
+
+class CustomerEventStream:
+    """
+    Iterable SSE para un cliente. Termina a los `lifetime` segundos (el
+    navegador reconecta) y manda un comentario cada `heartbeat` segundos para
+    detectar desconexiones y mantener vivos los proxies.
+
+    Django llama a close() al terminar la respuesta aunque el generador nunca
+    haya arrancado; ahí se libera el cupo tomado con acquire_stream_slot().
+    """
+
+    def __init__(self, customer_id, lifetime: int, heartbeat: int):
+        self._events = self._generate(customer_id, lifetime, heartbeat)
+        self._released = False
+
+    def __iter__(self):
+        return self._events
+
+    def close(self) -> None:
+        self._events.close()
+        if not self._released:
+            self._released = True
+            release_stream_slot()
+
+    @staticmethod
+    def _generate(customer_id, lifetime: int, heartbeat: int):
+        q = broker.subscribe(customer_id)
+        try:
+            yield "retry: 3000\n\n"
+            yield sse_message({"type": "hello"})
+            deadline = time.monotonic() + lifetime
+            event_id = 0
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    event = q.get(timeout=min(heartbeat, remaining))
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                event_id += 1
+                yield sse_message(event, event_id)
+        finally:
+            broker.unsubscribe(customer_id, q)
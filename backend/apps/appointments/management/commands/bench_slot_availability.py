@@ -0,0 +1,111 @@
+"""
+Benchmark del motor de disponibilidad de slots.
+
+Uso:
+    python manage.py bench_slot_availability --sizes 10,100,1000
+
+Crea slots (y una cita por slot) dentro de una transacción que se revierte al
+final, mide tiempo y número de queries de slot_availability() para cada tamaño.
+El número de queries solo depende del número de páginas (200 slots por página),
+nunca del número de citas.
+"""
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.appointments.availability import DEFAULT_PAGE_SIZE, slot_availability
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Mide queries y tiempo del listado de slots disponibles para varios volúmenes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="10,100,1000", help="Cantidades de slots separadas por coma")
+
+    def handle(self, *args, **options):
+        sizes = [int(s) for s in str(options["sizes"]).split(",") if s.strip()]
+
+        self.stdout.write(f"{'slots':>8} {'queries':>8} {'ms':>10}")
+        for size in sizes:
+            try:
+                with transaction.atomic():
+                    self._seed(size)
+                    with CaptureQueriesContext(connection) as ctx:
+                        started = time.perf_counter()
+                        slot_availability(include_full=True)
+                        elapsed = (time.perf_counter() - started) * 1000
+                    raise _Rollback()
+            except _Rollback:
+                pass
+
+            # Consultas esperadas: una por página (más la página vacía final si es múltiplo exacto)
+            self.stdout.write(f"{size:>8} {len(ctx.captured_queries):>8} {elapsed:>10.1f}")
+
+        self.stdout.write(self.style.SUCCESS(f"Listo (page_size={DEFAULT_PAGE_SIZE}). Datos revertidos."))
+
+    def _seed(self, size: int) -> None:
+        tag = uuid.uuid4().hex[:8]
+        base = timezone.now() + timedelta(days=3650)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                insert into public.customers (full_name, email, is_active, created_at, updated_at)
+                values (%s, %s, true, now(), now())
+                returning customer_id
+                """,
+                [f"bench {tag}", f"bench-{tag}@example.invalid"],
+            )
+            customer_id = cursor.fetchone()[0]
+
+            cursor.execute(
+                """
+                insert into public.vehicles (customer_id, plate, created_at, updated_at)
+                values (%s, %s, now(), now())
+                returning vehicle_id
+                """,
+                [customer_id, f"B{tag}"],
+            )
+            vehicle_id = cursor.fetchone()[0]
+
+            cursor.execute(
+                """
+                insert into public.services (name, base_price, requires_lift, is_active, created_at, updated_at)
+                values (%s, 0, false, true, now(), now())
+                returning service_id
+                """,
+                [f"bench {tag}"],
+            )
+            service_id = cursor.fetchone()[0]
+
+            cursor.execute(
+                """
+                insert into public.appointment_slots
+                  (start_at, end_at, capacity, used_capacity, is_active, created_at, updated_at)
+                select %s + g * interval '1 hour', %s + g * interval '1 hour' + interval '1 hour',
+                       2, 1, true, now(), now()
+                from generate_series(1, %s) g
+                """,
+                [base, base, size],
+            )
+
+            cursor.execute(
+                """
+                insert into public.appointments
+                  (customer_id, vehicle_id, service_id, slot_id, scheduled_start, scheduled_end,
+                   status, progress_percent, created_at, updated_at)
+                select %s, %s, %s, s.slot_id, s.start_at, s.end_at, 'scheduled', 0, now(), now()
+                from public.appointment_slots s
+                where s.start_at > %s
+                """,
+                [customer_id, vehicle_id, service_id, base],
+            )
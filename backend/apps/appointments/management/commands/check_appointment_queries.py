@@ -0,0 +1,81 @@
+"""
+Control de regresión: número de queries de los listados de citas.
+
+Uso:
+    python manage.py check_appointment_queries --sizes 5,20,100
+
+Llama a los listados admin (paginado normal y ?cursor) y del portal del
+cliente con datos existentes y cuenta las queries. El número debe ser fijo
+por página (COUNT + SELECT, o solo SELECT con cursor) sin importar cuántas
+filas devuelva; si algún listado supera el presupuesto el comando falla, así
+que sirve para CI/deploy. Solo lee: no crea datos.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.appointments.views import AppointmentAdminViewSet, AppointmentCustomerViewSet
+from apps.authentication.models import User
+from apps.customers.models import Customer
+
+# Presupuesto de queries por página
+PAGE_NUMBER_BUDGET = 2  # COUNT(*) + SELECT
+KEYSET_BUDGET = 1       # SELECT (page_size + 1)
+
+
+class Command(BaseCommand):
+    help = "Verifica que los listados de citas usen un número fijo de queries por página."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="5,20,100", help="page_size a probar con ?cursor, separados por coma")
+
+    def handle(self, *args, **options):
+        sizes = [int(s) for s in str(options["sizes"]).split(",") if s.strip()]
+        factory = APIRequestFactory(SERVER_NAME="localhost")  # host en ALLOWED_HOSTS (URL next del paginador)
+        staff = User(username="check_appointment_queries", is_staff=True)
+
+        admin_list = AppointmentAdminViewSet.as_view({"get": "list"})
+        customer_list = AppointmentCustomerViewSet.as_view({"get": "list"})
+
+        cases = [("admin (page)", admin_list, staff, {}, PAGE_NUMBER_BUDGET)]
+        cases += [
+            (f"admin (cursor, {size})", admin_list, staff, {"cursor": "", "page_size": size}, KEYSET_BUDGET)
+            for size in sizes
+        ]
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT customer_id FROM public.appointments
+                WHERE customer_id IS NOT NULL
+                GROUP BY customer_id ORDER BY count(*) DESC LIMIT 1
+                """
+            )
+            row = cursor.fetchone()
+        if row:
+            customer = Customer.objects.get(customer_id=row[0])
+            cases.append(("portal cliente", customer_list, customer, {}, PAGE_NUMBER_BUDGET))
+
+        failures = []
+        self.stdout.write(f"{'listado':<24} {'filas':>6} {'queries':>8} {'máx':>5}")
+        for label, view, user, params, budget in cases:
+            request = factory.get("/", params)
+            force_authenticate(request, user=user)
+            with CaptureQueriesContext(connection) as ctx:
+                response = view(request)
+                response.render()
+
+            if response.status_code != 200:
+                raise CommandError(f"{label}: HTTP {response.status_code}")
+
+            data = response.data
+            rows = len(data["results"]) if isinstance(data, dict) else len(data)
+            queries = len(ctx.captured_queries)
+            self.stdout.write(f"{label:<24} {rows:>6} {queries:>8} {budget:>5}")
+            if queries > budget:
+                failures.append(label)
+
+        if failures:
+            raise CommandError("Listados sobre el presupuesto de queries: " + ", ".join(failures))
+        self.stdout.write(self.style.SUCCESS("OK: número de queries fijo por página."))
@@ -0,0 +1,122 @@
+"""
+Prueba de estrés de reservas concurrentes sobre un mismo slot.
+
+Uso:
+    python manage.py stress_slot_booking --capacity 3 --attempts 50 --threads 16
+
+Crea datos temporales (cliente, vehículo, servicio y un slot), dispara
+--attempts reservas en paralelo con book_slot() y verifica que:
+  - ninguna reserva exceda el cupo,
+  - used_capacity coincida con las citas realmente creadas.
+Los datos temporales se eliminan al terminar.
+"""
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from apps.appointments.booking import SlotFull, book_slot
+
+
+class Command(BaseCommand):
+    help = "Dispara reservas paralelas a un slot y verifica que no haya sobre-reservas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--capacity", type=int, default=3)
+        parser.add_argument("--attempts", type=int, default=50)
+        parser.add_argument("--threads", type=int, default=16)
+
+    def handle(self, *args, **options):
+        capacity = options["capacity"]
+        attempts = options["attempts"]
+        ids = self._create_fixture(capacity)
+
+        def attempt(_):
+            try:
+                with transaction.atomic():
+                    book_slot(ids["customer_id"], ids["vehicle_id"], ids["service_id"], ids["slot_id"])
+                return "ok"
+            except SlotFull:
+                return "full"
+            finally:
+                connections.close_all()
+
+        try:
+            with ThreadPoolExecutor(max_workers=options["threads"]) as pool:
+                results = list(pool.map(attempt, range(attempts)))
+
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "select count(*) from public.appointments where slot_id = %s and coalesce(status, '') <> 'cancelled'",
+                    [ids["slot_id"]],
+                )
+                booked = cursor.fetchone()[0]
+                cursor.execute(
+                    "select used_capacity from public.appointment_slots where slot_id = %s",
+                    [ids["slot_id"]],
+                )
+                counter = cursor.fetchone()[0]
+        finally:
+            self._drop_fixture(ids)
+
+        ok = results.count("ok")
+        self.stdout.write(
+            f"intentos={attempts} ok={ok} llenos={results.count('full')} "
+            f"citas={booked} used_capacity={counter} capacity={capacity}"
+        )
+        if booked > capacity or ok != booked or counter != booked:
+            raise CommandError("Sobre-reserva o contador inconsistente.")
+        self.stdout.write(self.style.SUCCESS("Sin sobre-reservas."))
+
+    def _create_fixture(self, capacity: int) -> dict:
+        tag = uuid.uuid4().hex[:8]
+        start = timezone.now() + timedelta(days=3650)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                """
+                insert into public.customers (full_name, email, is_active, created_at, updated_at)
+                values (%s, %s, true, now(), now())
+                returning customer_id
+                """,
+                [f"stress {tag}", f"stress-{tag}@example.invalid"],
+            )
+            customer_id = str(cursor.fetchone()[0])
+            cursor.execute(
+                """
+                insert into public.vehicles (customer_id, plate, created_at, updated_at)
+                values (%s, %s, now(), now())
+                returning vehicle_id
+                """,
+                [customer_id, f"S{tag}"],
+            )
+            vehicle_id = str(cursor.fetchone()[0])
+            cursor.execute(
+                """
+                insert into public.services (name, base_price, requires_lift, is_active, created_at, updated_at)
+                values (%s, 0, false, true, now(), now())
+                returning service_id
+                """,
+                [f"stress {tag}"],
+            )
+            service_id = str(cursor.fetchone()[0])
+            cursor.execute(
+                """
+                insert into public.appointment_slots (start_at, end_at, capacity, is_active, created_at, updated_at)
+                values (%s, %s, %s, true, now(), now())
+                returning slot_id
+                """,
+                [start, start + timedelta(hours=1), capacity],
+            )
+            slot_id = str(cursor.fetchone()[0])
+        return {"customer_id": customer_id, "vehicle_id": vehicle_id, "service_id": service_id, "slot_id": slot_id}
+
+    def _drop_fixture(self, ids: dict) -> None:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("delete from public.appointments where slot_id = %s", [ids["slot_id"]])
+            cursor.execute("delete from public.appointment_slots where slot_id = %s", [ids["slot_id"]])
+            cursor.execute("delete from public.vehicles where vehicle_id = %s", [ids["vehicle_id"]])
+            cursor.execute("delete from public.services where service_id = %s", [ids["service_id"]])
+            cursor.execute("delete from public.customers where customer_id = %s", [ids["customer_id"]])
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Índices para el motor de disponibilidad (availability.py).
+    Las tablas viven en Supabase (managed = False); aquí solo se agregan índices.
+    """
+
+    dependencies = []
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS appointment_slots_active_start_idx
+                ON public.appointment_slots (start_at, slot_id)
+                WHERE is_active = true;
+
+            CREATE INDEX IF NOT EXISTS appointments_slot_active_idx
+                ON public.appointments (slot_id)
+                WHERE coalesce(status, '') <> 'cancelled';
+            """,
+            reverse_sql="""
+            DROP INDEX IF EXISTS public.appointments_slot_active_idx;
+            DROP INDEX IF EXISTS public.appointment_slots_active_start_idx;
+            """,
+        ),
+    ]
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Contador de cupo usado en appointment_slots.
+    Se reserva con un UPDATE condicional (used_capacity < capacity) para evitar
+    sobre-reservas sin locks explícitos. Backfill desde las citas no canceladas.
+    """
+
+    dependencies = [
+        ("appointments", "0001_slot_availability_indexes"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            ALTER TABLE public.appointment_slots
+                ADD COLUMN IF NOT EXISTS used_capacity integer NOT NULL DEFAULT 0;
+
+            ALTER TABLE public.appointment_slots
+                DROP CONSTRAINT IF EXISTS appointment_slots_used_capacity_nonneg;
+            ALTER TABLE public.appointment_slots
+                ADD CONSTRAINT appointment_slots_used_capacity_nonneg CHECK (used_capacity >= 0);
+
+            UPDATE public.appointment_slots s
+            SET used_capacity = coalesce(u.used, 0)
+            FROM (
+                SELECT sl.slot_id, count(a.appointment_id) AS used
+                FROM public.appointment_slots sl
+                LEFT JOIN public.appointments a
+                  ON a.slot_id = sl.slot_id
+                 AND coalesce(a.status, '') <> 'cancelled'
+                GROUP BY sl.slot_id
+            ) u
+            WHERE u.slot_id = s.slot_id;
+            """,
+            reverse_sql="""
+            ALTER TABLE public.appointment_slots
+                DROP CONSTRAINT IF EXISTS appointment_slots_used_capacity_nonneg;
+            ALTER TABLE public.appointment_slots
+                DROP COLUMN IF EXISTS used_capacity;
+            """,
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Índice para la paginación keyset (created_at, pk) del listado de citas.
+    """
+
+    dependencies = [
+        ("appointments", "0002_slot_used_capacity"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS appointments_keyset_idx
+                ON public.appointments (created_at DESC, appointment_id DESC);
+            """,
+            reverse_sql="""
+            DROP INDEX IF EXISTS public.appointments_keyset_idx;
+            """,
+        ),
+    ]
@@ -0,0 +1,72 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    NOTIFY en el canal customer_events (ver apps/appointments/events.py):
+    - appointments: cambio de status, progress_percent o admin_message.
+    - work_orders: la OT pasa a 'ready'.
+    El payload lleva customer_id para que el broker lo reparta por cliente
+    (pg_notify admite hasta 8000 bytes: admin_message se recorta).
+    """
+
+    dependencies = [
+        ("appointments", "0003_appointments_keyset_index"),
+        ("work_orders", "0002_work_orders_appointment_index"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE OR REPLACE FUNCTION public.notify_appointment_event() RETURNS trigger AS $$
+            BEGIN
+                IF NEW.customer_id IS NOT NULL THEN
+                    PERFORM pg_notify('customer_events', json_build_object(
+                        'type', 'appointment',
+                        'customer_id', NEW.customer_id,
+                        'appointment_id', NEW.appointment_id,
+                        'status', NEW.status,
+                        'progress_percent', NEW.progress_percent,
+                        'admin_message', left(NEW.admin_message, 2000)
+                    )::text);
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            DROP TRIGGER IF EXISTS appointments_customer_event ON public.appointments;
+            CREATE TRIGGER appointments_customer_event
+                AFTER UPDATE OF status, progress_percent, admin_message ON public.appointments
+                FOR EACH ROW
+                WHEN (OLD.status IS DISTINCT FROM NEW.status
+                      OR OLD.progress_percent IS DISTINCT FROM NEW.progress_percent
+                      OR OLD.admin_message IS DISTINCT FROM NEW.admin_message)
+                EXECUTE FUNCTION public.notify_appointment_event();
+
+            CREATE OR REPLACE FUNCTION public.notify_work_order_ready() RETURNS trigger AS $$
+            BEGIN
+                PERFORM pg_notify('customer_events', json_build_object(
+                    'type', 'work_order_ready',
+                    'customer_id', NEW.customer_id,
+                    'work_order_id', NEW.work_order_id,
+                    'appointment_id', NEW.appointment_id
+                )::text);
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            DROP TRIGGER IF EXISTS work_orders_customer_ready ON public.work_orders;
+            CREATE TRIGGER work_orders_customer_ready
+                AFTER UPDATE OF status ON public.work_orders
+                FOR EACH ROW
+                WHEN (NEW.status = 'ready' AND OLD.status IS DISTINCT FROM 'ready')
+                EXECUTE FUNCTION public.notify_work_order_ready();
+            """,
+            reverse_sql="""
+            DROP TRIGGER IF EXISTS work_orders_customer_ready ON public.work_orders;
+            DROP FUNCTION IF EXISTS public.notify_work_order_ready();
+            DROP TRIGGER IF EXISTS appointments_customer_event ON public.appointments;
+            DROP FUNCTION IF EXISTS public.notify_appointment_event();
+            """,
+        ),
+    ]
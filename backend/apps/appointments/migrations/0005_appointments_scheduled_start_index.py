@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Índice para filtros por rango de fecha (límites timestamptz, ver common/dates.py).
+    """
+
+    dependencies = [
+        ("appointments", "0004_customer_event_triggers"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS appointments_scheduled_start_idx
+                ON public.appointments (scheduled_start);
+            """,
+            reverse_sql="""
+            DROP INDEX IF EXISTS public.appointments_scheduled_start_idx;
+            """,
+        ),
+    ]
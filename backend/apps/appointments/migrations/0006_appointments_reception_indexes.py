@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Citas próximas de un cliente o vehículo (typeahead de recepción,
+    apps/work_orders/reception.py).
+    """
+
+    dependencies = [
+        ("appointments", "0005_appointments_scheduled_start_index"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS appointments_customer_start_idx
+                ON public.appointments (customer_id, scheduled_start);
+
+            CREATE INDEX IF NOT EXISTS appointments_vehicle_start_idx
+                ON public.appointments (vehicle_id, scheduled_start);
+            """,
+            reverse_sql="""
+            DROP INDEX IF EXISTS public.appointments_vehicle_start_idx;
+            DROP INDEX IF EXISTS public.appointments_customer_start_idx;
+            """,
+        ),
+    ]
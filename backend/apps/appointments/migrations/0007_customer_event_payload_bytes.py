@@ -0,0 +1,69 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Recorte de admin_message por bytes en notify_appointment_event.
+
+    pg_notify rechaza payloads de 8000 bytes o más y el error aborta el UPDATE
+    que disparó el trigger. left(admin_message, 2000) recortaba por caracteres:
+    2000 emojis (4 bytes c/u) o comillas escapadas en el JSON pasaban el límite.
+    Ahora se arma el payload y, mientras no entre, se recorta el mensaje; si se
+    recortó va admin_message_truncated = true y el portal vuelve a leer la cita.
+    """
+
+    dependencies = [
+        ("appointments", "0006_appointments_reception_indexes"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE OR REPLACE FUNCTION public.notify_appointment_event() RETURNS trigger AS $$
+            DECLARE
+                msg text := left(NEW.admin_message, 2000);
+                payload text;
+                excess int;
+            BEGIN
+                IF NEW.customer_id IS NULL THEN
+                    RETURN NULL;
+                END IF;
+                LOOP
+                    payload := json_build_object(
+                        'type', 'appointment',
+                        'customer_id', NEW.customer_id,
+                        'appointment_id', NEW.appointment_id,
+                        'status', NEW.status,
+                        'progress_percent', NEW.progress_percent,
+                        'admin_message', msg,
+                        'admin_message_truncated', msg IS DISTINCT FROM NEW.admin_message
+                    )::text;
+                    excess := octet_length(payload) - 7999;
+                    EXIT WHEN excess <= 0;
+                    -- Un carácter ocupa a lo sumo 6 bytes en el JSON (\\u00XX)
+                    msg := left(msg, char_length(msg) - greatest(1, (excess + 5) / 6));
+                END LOOP;
+                PERFORM pg_notify('customer_events', payload);
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+            """,
+            reverse_sql="""
+            CREATE OR REPLACE FUNCTION public.notify_appointment_event() RETURNS trigger AS $$
+            BEGIN
+                IF NEW.customer_id IS NOT NULL THEN
+                    PERFORM pg_notify('customer_events', json_build_object(
+                        'type', 'appointment',
+                        'customer_id', NEW.customer_id,
+                        'appointment_id', NEW.appointment_id,
+                        'status', NEW.status,
+                        'progress_percent', NEW.progress_percent,
+                        'admin_message', left(NEW.admin_message, 2000)
+                    )::text);
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+            """,
+        ),
+    ]
@@ -11,6 +11,7 @@ class AppointmentSlot(models.Model):
     start_at = models.DateTimeField(db_column="start_at")
     end_at = models.DateTimeField(db_column="end_at", null=True, blank=True)
     capacity = models.IntegerField(db_column="capacity")
+    used_capacity = models.IntegerField(db_column="used_capacity", default=0)
     is_active = models.BooleanField(db_column="is_active")
     notes = models.TextField(db_column="notes", null=True, blank=True)
     created_at = models.DateTimeField(db_column="created_at")
@@ -10,12 +10,13 @@ class AppointmentSlotSerializer(serializers.ModelSerializer):
             "start_at",
             "end_at",
             "capacity",
+            "used_capacity",
             "is_active",
             "notes",
             "created_at",
             "updated_at",
         ]
-        read_only_fields = ["slot_id", "created_at", "updated_at"]
+        read_only_fields = ["slot_id", "used_capacity", "created_at", "updated_at"]
 
 
 class AppointmentSlotCustomerSerializer(serializers.ModelSerializer):
@@ -41,9 +42,18 @@ class AppointmentSerializer(serializers.ModelSerializer):
     work_order_id = serializers.SerializerMethodField()
 
     def get_work_order_id(self, obj):
+        # Los listados anotan linked_work_order_id (ver _with_linked_work_order);
+        # las respuestas de una sola cita caen a la consulta directa.
+        if hasattr(obj, "linked_work_order_id"):
+            wo_id = obj.linked_work_order_id
+            return str(wo_id) if wo_id else None
         try:
-            wo = obj.work_orders.first()
-            return str(wo.work_order_id) if wo else None
+            wo_id = (
+                obj.work_orders.order_by("created_at", "work_order_id")
+                .values_list("work_order_id", flat=True)
+                .first()
+            )
+            return str(wo_id) if wo_id else None
         except Exception:
             return None
 
@@ -1,20 +1,39 @@
 # backend/apps/appointments/views.py
-import io
 from datetime import timedelta
 
+from django.conf import settings
 from django.db import connection, transaction
-from django.http import HttpResponse
+from django.db.models import OuterRef, Subquery
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
+from apps.authentication.metrics import invalidate_dashboard
 from apps.authentication.permissions import IsStaffOrAdmin
+from apps.common.dates import business_today, parse_business_date, parse_uuid, range_filter
+from apps.common.pagination import KeysetPagination
+from apps.common.xlsx import XLSX_CONTENT_TYPE, StreamingXlsx, iter_query_rows
 from apps.customers.auth import CustomerJWTAuthentication
 from apps.customers.permissions import IsAuthenticatedCustomer
+from apps.exports.jobs import ExportJobError, ExportResult, count_query_rows
 from apps.vehicles.models import Vehicle
-
+from apps.work_orders.models import WorkOrder
+from apps.work_orders.reception import invalidate_reception
+
+from .availability import slot_availability
+from .booking import (
+    SlotFull,
+    SlotUnavailable,
+    apply_status_change,
+    book_slot,
+    cancel_customer_appointment,
+    delete_appointment,
+)
+from .events import CustomerEventStream, EventStreamRenderer, acquire_stream_slot
 from .models import Appointment, AppointmentSlot
 from .serializers import (
     AppointmentSerializer,
@@ -24,20 +43,20 @@ from .serializers import (
 
 CLOSED_FOR_CAPACITY = ("cancelled",)
 ALLOWED_STATUSES = ("scheduled", "confirmed", "in_progress", "completed", "cancelled")
-
-
-def _count_used_capacity(slot_id: str) -> int:
-    with connection.cursor() as cursor:
-        cursor.execute(
-            """
-            select count(*)
-            from public.appointments
-            where slot_id = %s
-              and coalesce(status,'') not in ('cancelled')
-            """,
-            [slot_id],
-        )
-        return int(cursor.fetchone()[0] or 0)
+DAY_NAMES = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
+
+
+def _with_linked_work_order(qs):
+    """
+    Anota linked_work_order_id (primera OT de la cita) con una subconsulta
+    correlacionada, para que el serializer no haga una consulta por fila.
+    """
+    first_wo = (
+        WorkOrder.objects.filter(appointment_id=OuterRef("appointment_id"))
+        .order_by("created_at", "work_order_id")
+        .values("work_order_id")[:1]
+    )
+    return qs.annotate(linked_work_order_id=Subquery(first_wo))
 
 
 class AppointmentSlotAdminViewSet(viewsets.ModelViewSet):
@@ -168,32 +187,37 @@ class CustomerSlotViewSet(viewsets.ReadOnlyModelViewSet):
         return AppointmentSlot.objects.filter(is_active=True, start_at__gte=now).order_by("start_at")
 
     def list(self, request, *args, **kwargs):
-        qs = self.get_queryset()
-        rows = list(qs)
-
-        result = []
-        for s in rows:
-            used = _count_used_capacity(str(s.slot_id))
-            remaining = max(int(s.capacity) - used, 0)
-            if remaining <= 0:
-                continue
-            result.append(
+        """Slots futuros con cupo. Acepta ?date_from, ?date_to (YYYY-MM-DD) y ?service_id."""
+        params = request.query_params
+        try:
+            result = [
                 {
-                    "slot_id": str(s.slot_id),
-                    "start_at": s.start_at,
-                    "end_at": s.end_at,
-                    "remaining_capacity": remaining,
+                    "slot_id": s["slot_id"],
+                    "start_at": s["start_at"],
+                    "end_at": s["end_at"],
+                    "remaining_capacity": s["remaining_capacity"],
                 }
-            )
+                for s in slot_availability(
+                    date_from=params.get("date_from") or None,
+                    date_to=params.get("date_to") or None,
+                    service_id=(params.get("service_id") or "").strip() or None,
+                    future_only=True,
+                )
+            ]
+        except ValueError:
+            return Response({"detail": "date_from/date_to inválidos (YYYY-MM-DD)."}, status=400)
         return Response(result, status=200)
 
 
 class AppointmentAdminViewSet(viewsets.ModelViewSet):
     serializer_class = AppointmentSerializer
     permission_classes = [IsAuthenticated, IsStaffOrAdmin]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        qs = Appointment.objects.select_related("customer", "vehicle", "service", "slot").prefetch_related("work_orders").all().order_by("-scheduled_start")
+        qs = _with_linked_work_order(
+            Appointment.objects.select_related("customer", "vehicle", "service", "slot")
+        ).order_by("-scheduled_start")
 
         status_q = self.request.query_params.get("status")
         if status_q:
@@ -217,6 +241,73 @@ class AppointmentAdminViewSet(viewsets.ModelViewSet):
 
         return qs
 
+    def create(self, request, *args, **kwargs):
+        """Alta desde staff: reserva el cupo con book_slot, igual que el portal."""
+        data = request.data or {}
+
+        customer_id = data.get("customer_id")
+        vehicle_id = data.get("vehicle_id")
+        service_id = data.get("service_id")
+        slot_id = data.get("slot_id")
+
+        for field, value in (
+            ("customer_id", customer_id),
+            ("vehicle_id", vehicle_id),
+            ("service_id", service_id),
+            ("slot_id", slot_id),
+        ):
+            if not value:
+                return Response({"detail": f"{field} es requerido."}, status=400)
+
+        try:
+            customer_id = parse_uuid(customer_id, "customer_id")
+            vehicle_id = parse_uuid(vehicle_id, "vehicle_id")
+            service_id = parse_uuid(service_id, "service_id")
+            slot_id = parse_uuid(slot_id, "slot_id")
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+
+        try:
+            vehicle = Vehicle.objects.get(vehicle_id=vehicle_id)
+        except Vehicle.DoesNotExist:
+            return Response({"detail": "Vehículo no existe."}, status=404)
+
+        if vehicle.customer_id != customer_id:
+            return Response({"detail": "El vehículo no pertenece a ese cliente."}, status=400)
+
+        try:
+            appointment_id = book_slot(
+                customer_id=customer_id,
+                vehicle_id=vehicle_id,
+                service_id=service_id,
+                slot_id=slot_id,
+                requested_work=(data.get("requested_work") or "").strip() or None,
+                notes=(data.get("notes") or "").strip() or None,
+            )
+        except SlotUnavailable as e:
+            return Response({"detail": str(e)}, status=404)
+        except SlotFull as e:
+            return Response({"detail": str(e)}, status=409)
+
+        invalidate_dashboard()
+        invalidate_reception()
+        ap = Appointment.objects.select_related("customer", "vehicle", "service", "slot").get(appointment_id=appointment_id)
+        return Response(self.get_serializer(ap).data, status=status.HTTP_201_CREATED)
+
+    def update(self, request, *args, **kwargs):
+        # PUT pasa por partial_update: el update heredado guardaría el status
+        # sin ajustar used_capacity.
+        return self.partial_update(request, *args, **kwargs)
+
+    def destroy(self, request, *args, **kwargs):
+        ap = self.get_object()
+        with transaction.atomic():
+            deleted = delete_appointment(ap.appointment_id)
+        if deleted:
+            invalidate_dashboard()
+            invalidate_reception()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     def partial_update(self, request, *args, **kwargs):
         ap = self.get_object()
         data = request.data or {}
@@ -260,11 +351,22 @@ class AppointmentAdminViewSet(viewsets.ModelViewSet):
         sets.append("updated_at = now()")
         params.append(str(ap.appointment_id))
 
-        with connection.cursor() as cursor:
-            cursor.execute(
-                f"update public.appointments set {', '.join(sets)} where appointment_id = %s",
-                params,
-            )
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                # Bloquear la cita para leer el estado previo sin carreras (contador de cupo)
+                cursor.execute(
+                    "select status, slot_id from public.appointments where appointment_id = %s for update",
+                    [str(ap.appointment_id)],
+                )
+                old_status, slot_id = cursor.fetchone()
+                cursor.execute(
+                    f"update public.appointments set {', '.join(sets)} where appointment_id = %s",
+                    params,
+                )
+            if "status" in data:
+                apply_status_change(slot_id, old_status, data.get("status"))
+                invalidate_dashboard()
+                invalidate_reception()
 
         ap.refresh_from_db()
         ap = Appointment.objects.select_related("customer", "vehicle", "service", "slot").get(appointment_id=ap.appointment_id)
@@ -325,6 +427,9 @@ class AppointmentAdminViewSet(viewsets.ModelViewSet):
                     [str(ap.appointment_id)],
                 )
 
+        invalidate_dashboard()
+
+        invalidate_reception()
         ap = Appointment.objects.select_related("customer", "vehicle", "service", "slot").get(
             appointment_id=ap.appointment_id
         )
@@ -341,63 +446,33 @@ class AppointmentAdminViewSet(viewsets.ModelViewSet):
         """Reporte de citas con filtros por fecha, estado y servicio.
         Soporta format=excel para exportar a .xlsx (openpyxl)."""
         params = request.query_params
-        now = timezone.now()
-
-        # Defaults: semana actual
-        today = now.date()
-        week_start = today - timedelta(days=today.weekday())
-        date_from = params.get("date_from") or str(week_start)
-        date_to = params.get("date_to") or str(today)
-        status_filter = (params.get("status") or "").strip()
-        service_id_filter = (params.get("service_id") or "").strip()
         export_format = (params.get("export") or "json").strip().lower()
+        try:
+            sql, values, date_from, date_to = _appointment_report_query(params)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
 
-        filters = ["a.scheduled_start::date >= %s", "a.scheduled_start::date <= %s"]
-        values = [date_from, date_to]
-
-        if status_filter:
-            filters.append("a.status = %s")
-            values.append(status_filter)
-
-        if service_id_filter:
-            filters.append("a.service_id::text = %s")
-            values.append(service_id_filter)
-
-        where_clause = " and ".join(filters)
+        if export_format == "excel":
+            return _build_excel_response(iter_query_rows(sql, values), date_from, date_to)
 
         with connection.cursor() as cursor:
-            cursor.execute(
-                f"""
-                select
-                    a.appointment_id,
-                    a.scheduled_start,
-                    a.scheduled_end,
-                    a.status,
-                    a.requested_work,
-                    a.notes,
-                    a.admin_message,
-                    c.full_name as customer_name,
-                    c.email as customer_email,
-                    v.plate as vehicle_plate,
-                    v.make as vehicle_make,
-                    v.model as vehicle_model,
-                    s.name as service_name,
-                    u.username as mechanic_username
-                from public.appointments a
-                left join public.customers c on c.customer_id = a.customer_id
-                left join public.vehicles v on v.vehicle_id = a.vehicle_id
-                left join public.services s on s.service_id = a.service_id
-                left join django_app.auth_users u on u.id = a.assigned_mechanic_id
-                where {where_clause}
-                order by a.scheduled_start
-                """,
-                values,
-            )
+            cursor.execute(sql, values)
             rows = cursor.fetchall()
             cols = [d[0] for d in cursor.description]
 
         appointments = [dict(zip(cols, row)) for row in rows]
 
+        # Resumen por día de negocio (antes de serializar las fechas)
+        day_counts = {}
+        for ap in appointments:
+            start = ap.get("scheduled_start")
+            if start:
+                d = timezone.localtime(start).date()
+                key = str(d)
+                if key not in day_counts:
+                    day_counts[key] = {"date": key, "day": DAY_NAMES[d.weekday()], "count": 0}
+                day_counts[key]["count"] += 1
+
         # Serializar campos no-JSON
         for ap in appointments:
             for k, v in ap.items():
@@ -414,23 +489,6 @@ class AppointmentAdminViewSet(viewsets.ModelViewSet):
             st = ap.get("status") or "unknown"
             by_status[st] = by_status.get(st, 0) + 1
 
-        # Resumen por día (dentro del rango)
-        day_names = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
-        day_counts = {}
-        for ap in appointments:
-            raw = ap.get("scheduled_start") or ""
-            if raw:
-                try:
-                    from datetime import datetime
-                    dt = datetime.fromisoformat(raw)
-                    d = dt.date()
-                    key = str(d)
-                    if key not in day_counts:
-                        day_counts[key] = {"date": key, "day": day_names[d.weekday()], "count": 0}
-                    day_counts[key]["count"] += 1
-                except Exception:
-                    pass
-
         by_day = sorted(day_counts.values(), key=lambda x: x["date"])
 
         summary = {
@@ -439,35 +497,89 @@ class AppointmentAdminViewSet(viewsets.ModelViewSet):
             "by_day": by_day,
         }
 
-        if export_format == "excel":
-            return _build_excel_response(appointments, by_day, date_from, date_to)
-
         return Response({"appointments": appointments, "summary": summary}, status=200)
 
 
-def _build_excel_response(appointments, by_day, date_from, date_to):
-    """Genera un archivo .xlsx con dos hojas: Citas y Resumen semanal."""
+def _appointment_report_query(params):
+    """
+    SQL del reporte de citas para los filtros dados (query params o params de
+    un job). Lanza ValueError si una fecha o un id son inválidos.
+    """
+    # Defaults: semana actual (días de negocio)
+    today = business_today()
+    week_start = today - timedelta(days=today.weekday())
+    date_from = parse_business_date(params.get("date_from"), week_start)
+    date_to = parse_business_date(params.get("date_to"), today)
+    status_filter = (params.get("status") or "").strip()
+    service_id_filter = (params.get("service_id") or "").strip()
+
+    date_sql, values = range_filter("a.scheduled_start", date_from, date_to)
+    filters = [date_sql]
+
+    if status_filter:
+        filters.append("a.status = %s")
+        values.append(status_filter)
+
+    if service_id_filter:
+        filters.append("a.service_id = %s")
+        values.append(parse_uuid(service_id_filter, "service_id"))
+
+    where_clause = " and ".join(filters)
+
+    sql = f"""
+    select
+        a.appointment_id,
+        a.scheduled_start,
+        a.scheduled_end,
+        a.status,
+        a.requested_work,
+        a.notes,
+        a.admin_message,
+        c.full_name as customer_name,
+        c.email as customer_email,
+        v.plate as vehicle_plate,
+        v.make as vehicle_make,
+        v.model as vehicle_model,
+        s.name as service_name,
+        u.username as mechanic_username
+    from public.appointments a
+    left join public.customers c on c.customer_id = a.customer_id
+    left join public.vehicles v on v.vehicle_id = a.vehicle_id
+    left join public.services s on s.service_id = a.service_id
+    left join django_app.auth_users u on u.id = a.assigned_mechanic_id
+    where {where_clause}
+    order by a.scheduled_start
+    """
+    return sql, values, date_from, date_to
+
+
+def _build_excel_response(rows, date_from, date_to):
     try:
-        import openpyxl
-        from openpyxl.styles import Alignment, Font, PatternFill
+        xlsx = _write_appointments_xlsx(rows)
     except ImportError:
         return Response({"detail": "openpyxl no está instalado."}, status=500)
+    return xlsx.response(f"reporte_citas_{date_from}_al_{date_to}.xlsx")
 
-    wb = openpyxl.Workbook()
-
-    # ── Hoja 1: Citas ──
-    ws1 = wb.active
-    ws1.title = "Citas"
 
-    headers = ["Fecha", "Hora", "Cliente", "Email", "Vehículo", "Servicio", "Estado", "Mecánico", "Trabajo solicitado", "Notas"]
-    header_fill = PatternFill(start_color="1D63FF", end_color="1D63FF", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-
-    for col_idx, header in enumerate(headers, 1):
-        cell = ws1.cell(row=1, column=col_idx, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
+def appointments_report_job(params, ctx):
+    """Handler del export job 'appointments_report' (ver apps/exports/jobs.py)."""
+    try:
+        sql, values, date_from, date_to = _appointment_report_query(params)
+    except ValueError as e:
+        raise ExportJobError(str(e))
+    total = count_query_rows(sql, values)
+    xlsx = _write_appointments_xlsx(ctx.track(iter_query_rows(sql, values), total))
+    ctx.progress(95, force=True)
+    return ExportResult(xlsx.content(), f"reporte_citas_{date_from}_al_{date_to}.xlsx", XLSX_CONTENT_TYPE)
+
+
+def _write_appointments_xlsx(rows):
+    """
+    Genera un .xlsx con dos hojas: Citas y Resumen semanal.
+    rows es un iterable de dicts (cursor del servidor); el resumen por día se
+    acumula mientras se escriben las filas, sin cargar el reporte en memoria.
+    """
+    xlsx = StreamingXlsx()
 
     status_labels = {
         "scheduled": "Programada",
@@ -476,66 +588,56 @@ def _build_excel_response(appointments, by_day, date_from, date_to):
         "completed": "Completada",
         "cancelled": "Cancelada",
     }
+    day_counts = {}
+
+    def appointment_rows():
+        for ap in rows:
+            start = ap.get("scheduled_start")
+            if start:
+                start = timezone.localtime(start)
+                fecha = start.strftime("%d/%m/%Y")
+                hora = start.strftime("%H:%M")
+                d = start.date()
+                key = str(d)
+                if key not in day_counts:
+                    day_counts[key] = {"date": key, "day": DAY_NAMES[d.weekday()], "count": 0}
+                day_counts[key]["count"] += 1
+            else:
+                fecha = hora = ""
+
+            vehicle_str = f"{ap.get('vehicle_plate') or ''} {ap.get('vehicle_make') or ''} {ap.get('vehicle_model') or ''}".strip()
+            st = ap.get("status") or ""
+
+            yield [
+                fecha,
+                hora,
+                ap.get("customer_name") or "",
+                ap.get("customer_email") or "",
+                vehicle_str,
+                ap.get("service_name") or "",
+                status_labels.get(st, st),
+                ap.get("mechanic_username") or "",
+                ap.get("requested_work") or "",
+                ap.get("notes") or "",
+            ]
 
-    for row_idx, ap in enumerate(appointments, 2):
-        raw_start = ap.get("scheduled_start") or ""
-        try:
-            from datetime import datetime
-            dt = datetime.fromisoformat(raw_start)
-            fecha = dt.strftime("%d/%m/%Y")
-            hora = dt.strftime("%H:%M")
-        except Exception:
-            fecha = raw_start
-            hora = ""
-
-        vehicle_str = f"{ap.get('vehicle_plate', '')} {ap.get('vehicle_make', '')} {ap.get('vehicle_model', '')}".strip()
-        st = ap.get("status") or ""
-
-        ws1.append([
-            fecha,
-            hora,
-            ap.get("customer_name") or "",
-            ap.get("customer_email") or "",
-            vehicle_str,
-            ap.get("service_name") or "",
-            status_labels.get(st, st),
-            ap.get("mechanic_username") or "",
-            ap.get("requested_work") or "",
-            ap.get("notes") or "",
-        ])
-
-    for col in ws1.columns:
-        max_len = max((len(str(cell.value or "")) for cell in col), default=10)
-        ws1.column_dimensions[col[0].column_letter].width = min(max_len + 4, 40)
+    # ── Hoja 1: Citas ──
+    xlsx.add_sheet(
+        "Citas",
+        ["Fecha", "Hora", "Cliente", "Email", "Vehículo", "Servicio", "Estado", "Mecánico", "Trabajo solicitado", "Notas"],
+        appointment_rows(),
+    )
 
     # ── Hoja 2: Resumen semanal ──
-    ws2 = wb.create_sheet("Resumen semanal")
-    ws2.append(["Fecha", "Día", "Cantidad de citas"])
-    h2_fill = PatternFill(start_color="0A3EA6", end_color="0A3EA6", fill_type="solid")
-    h2_font = Font(bold=True, color="FFFFFF")
-    for cell in ws2[1]:
-        cell.fill = h2_fill
-        cell.font = h2_font
-
-    for row in by_day:
-        ws2.append([row["date"], row["day"], row["count"]])
-
-    for col in ws2.columns:
-        max_len = max((len(str(cell.value or "")) for cell in col), default=10)
-        ws2.column_dimensions[col[0].column_letter].width = min(max_len + 4, 30)
-
-    # Escribir en buffer y devolver
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-
-    filename = f"reporte_citas_{date_from}_al_{date_to}.xlsx"
-    response = HttpResponse(
-        buffer.read(),
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    by_day = sorted(day_counts.values(), key=lambda x: x["date"])
+    xlsx.add_sheet(
+        "Resumen semanal",
+        ["Fecha", "Día", "Cantidad de citas"],
+        ([row["date"], row["day"], row["count"]] for row in by_day),
+        header_color="0A3EA6",
+        max_width=30,
     )
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    return response
+    return xlsx
 
 
 class AppointmentCustomerViewSet(viewsets.ModelViewSet):
@@ -546,8 +648,7 @@ class AppointmentCustomerViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         customer = self.request.user
         return (
-            Appointment.objects.select_related("customer", "vehicle", "service", "slot")
-            .prefetch_related("work_orders")
+            _with_linked_work_order(Appointment.objects.select_related("customer", "vehicle", "service", "slot"))
             .filter(customer_id=customer.customer_id)
             .order_by("-scheduled_start")
         )
@@ -581,43 +682,31 @@ class AppointmentCustomerViewSet(viewsets.ModelViewSet):
         if str(vehicle.customer_id) != str(customer.customer_id):
             return Response({"detail": "Ese vehículo no pertenece a tu cuenta."}, status=403)
 
+        # Reserva de cupo + INSERT en un solo statement (sin sobre-reservas)
         try:
-            slot = AppointmentSlot.objects.get(slot_id=slot_id, is_active=True)
-        except AppointmentSlot.DoesNotExist:
-            return Response({"detail": "Horario no disponible."}, status=404)
-
-        used = _count_used_capacity(str(slot.slot_id))
-        remaining = max(int(slot.capacity) - used, 0)
-        if remaining <= 0:
-            return Response({"detail": "No hay cupos disponibles para este horario."}, status=409)
-
-        with connection.cursor() as cursor:
-            cursor.execute(
-                """
-                insert into public.appointments
-                  (customer_id, vehicle_id, service_id, slot_id, scheduled_start, scheduled_end,
-                   requested_work, status, notes, admin_message, progress_percent, created_at, updated_at)
-                values
-                  (%s, %s, %s, %s, %s, %s,
-                   %s, 'scheduled', %s, null, 0, now(), now())
-                returning appointment_id
-                """,
-                [
-                    str(customer.customer_id),
-                    str(vehicle.vehicle_id),
-                    service_id,
-                    str(slot.slot_id),
-                    slot.start_at,
-                    slot.end_at,
-                    requested_work,
-                    notes,
-                ],
+            appointment_id = book_slot(
+                customer_id=customer.customer_id,
+                vehicle_id=vehicle.vehicle_id,
+                service_id=service_id,
+                slot_id=slot_id,
+                requested_work=requested_work,
+                notes=notes,
             )
-            appointment_id = cursor.fetchone()[0]
+        except SlotUnavailable as e:
+            return Response({"detail": str(e)}, status=404)
+        except SlotFull as e:
+            return Response({"detail": str(e)}, status=409)
 
+        invalidate_dashboard()
+
+        invalidate_reception()
         ap = Appointment.objects.select_related("customer", "vehicle", "service", "slot").get(appointment_id=appointment_id)
         return Response(self.get_serializer(ap).data, status=status.HTTP_201_CREATED)
 
+    def update(self, request, *args, **kwargs):
+        # PUT con las mismas restricciones que PATCH (status/slot no editables)
+        return self.partial_update(request, *args, **kwargs)
+
     def partial_update(self, request, *args, **kwargs):
         ap = self.get_object()
         data = request.data or {}
@@ -676,18 +765,42 @@ class AppointmentCustomerViewSet(viewsets.ModelViewSet):
                 status=403,
             )
 
-        with connection.cursor() as cursor:
-            cursor.execute(
-                """
-                update public.appointments
-                set status = 'cancelled', updated_at = now()
-                where appointment_id = %s and customer_id = %s and status = 'scheduled'
-                """,
-                [str(ap.appointment_id), str(request.user.customer_id)],
-            )
-
+        if cancel_customer_appointment(ap.appointment_id, request.user.customer_id):
+            invalidate_dashboard()
+            invalidate_reception()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=False, methods=["get"], url_path="events", renderer_classes=[JSONRenderer, EventStreamRenderer])
+    def events(self, request):
+        """
+        Stream SSE con cambios de las citas del cliente (status, progress_percent,
+        admin_message) y OTs listas para retirar. Reemplaza el polling: el
+        cliente recarga solo cuando llega un evento. Cierra a los
+        CUSTOMER_EVENTS_MAX_LIFETIME segundos y el navegador reconecta.
+        """
+        if not acquire_stream_slot():
+            response = Response(
+                {"detail": "Demasiadas conexiones en vivo; intentá de nuevo más tarde."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+            response["Retry-After"] = "30"
+            return response
+
+        # El stream no usa la base: no retener la conexión del request mientras dura
+        connection.close()
+
+        response = StreamingHttpResponse(
+            CustomerEventStream(
+                request.user.customer_id,
+                settings.CUSTOMER_EVENTS_MAX_LIFETIME,
+                settings.CUSTOMER_EVENTS_HEARTBEAT,
+            ),
+            content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
     @action(detail=False, methods=["get"], url_path="reminders")
     def reminders(self, request):
         """Devuelve recordatorios de citas próximas (1h y 24h) para el cliente autenticado.
@@ -0,0 +1,117 @@
+"""
+Métricas del dashboard principal.
+
+compute_dashboard_metrics() arma todos los grupos en UNA consulta (subconsultas
+escalares que devuelven JSON). dashboard_metrics() la cachea por mes con un TTL
+corto; las escrituras que cambian estas cifras (citas, OTs, caja) llaman a
+invalidate_dashboard().
+"""
+from datetime import date, timedelta
+
+from django.db import connection
+
+from apps.common.cache import cached, invalidate
+from apps.common.dates import business_today, day_start
+
+DASHBOARD_CACHE_NAMESPACE = "dashboard"
+DASHBOARD_CACHE_TTL = 60  # segundos
+
+MONTH_NAMES = ["", "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
+               "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
+
+
+def invalidate_dashboard() -> None:
+    invalidate(DASHBOARD_CACHE_NAMESPACE)
+
+
+def compute_dashboard_metrics(month_start: date, filter_start: date = None, filter_end: date = None) -> dict:
+    """Todas las métricas en un solo round-trip."""
+    params = []
+
+    wo_filter = ""
+    if filter_start:
+        wo_filter = "WHERE opened_at >= %s AND opened_at < %s"
+        params += [day_start(filter_start), day_start(filter_end + timedelta(days=1))]
+
+    # Ingresos (libro diario de caja): diarios si hay filtro de mes, mensuales (12 meses) si no
+    if filter_start:
+        income_sql = """
+            SELECT business_date AS d, SUM(income_total) AS a
+            FROM django_app.cash_daily_ledger
+            WHERE business_date >= %s AND business_date <= %s
+              AND movement_type NOT IN ('_session', '_closing')
+            GROUP BY business_date
+            HAVING SUM(income_total) > 0
+        """
+        params += [filter_start, filter_end]
+    else:
+        income_sql = """
+            SELECT DATE_TRUNC('month', business_date)::date AS d, SUM(income_total) AS a
+            FROM django_app.cash_daily_ledger
+            WHERE business_date >= %s
+              AND movement_type NOT IN ('_session', '_closing')
+            GROUP BY 1
+            HAVING SUM(income_total) > 0
+        """
+        # Primer día del mes de hace 11 meses, en días de negocio (no CURRENT_DATE de la sesión, que es UTC)
+        first = business_today().replace(day=1)
+        months_back = first.year * 12 + first.month - 1 - 11
+        params += [date(months_back // 12, months_back % 12 + 1, 1)]
+
+    params += [month_start, day_start(month_start)]
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT
+                (SELECT coalesce(json_object_agg(st, n), '{{}}'::json)
+                   FROM (SELECT coalesce(status, 'unknown') AS st, count(*) AS n
+                         FROM public.appointments GROUP BY 1) t),
+                (SELECT coalesce(json_object_agg(st, n), '{{}}'::json)
+                   FROM (SELECT coalesce(status, 'unknown') AS st, count(*) AS n
+                         FROM public.work_orders {wo_filter} GROUP BY 1) t),
+                (SELECT coalesce(json_agg(json_build_object('month', d::text, 'amount', a) ORDER BY d), '[]'::json)
+                   FROM ({income_sql}) t),
+                (SELECT coalesce(json_object_agg(movement_type, a), '{{}}'::json)
+                   FROM (SELECT movement_type, SUM(amount_total) AS a
+                         FROM django_app.cash_daily_ledger
+                         WHERE session_date >= %s
+                           AND movement_type NOT IN ('_session', '_closing')
+                         GROUP BY movement_type) t),
+                (SELECT count(*) FROM public.work_orders WHERE status = 'closed' AND closed_at >= %s),
+                EXISTS (SELECT 1 FROM django_app.cash_sessions WHERE status = 'open')
+            """,
+            params,
+        )
+        appointments, work_orders, income, movements, wo_closed, cash_open = cursor.fetchone()
+
+    if filter_start:
+        income_label = f"Ingresos diarios — {MONTH_NAMES[filter_start.month]} {filter_start.year}"
+        wo_label     = f"OTs abiertas en {MONTH_NAMES[filter_start.month]} {filter_start.year}"
+    else:
+        income_label = "Ingresos mensuales — últimos 12 meses"
+        wo_label     = "Pipeline del taller"
+
+    return {
+        "appointments_by_status": {k: int(v) for k, v in appointments.items()},
+        "work_orders_by_status": {k: int(v) for k, v in work_orders.items()},
+        "monthly_income": [{"month": r["month"], "amount": float(r["amount"])} for r in income],
+        "movements_by_type": {k: float(v) for k, v in movements.items()},
+        "wo_closed_month": int(wo_closed),
+        "cash_session_open": bool(cash_open),
+        "income_label": income_label,
+        "wo_label": wo_label,
+        "is_filtered": bool(filter_start),
+        "month_label": MONTH_NAMES[month_start.month] + " " + str(month_start.year),
+    }
+
+
+def dashboard_metrics(month_start: date, filter_start: date = None, filter_end: date = None) -> dict:
+    """compute_dashboard_metrics() cacheado por (mes actual, mes filtrado)."""
+    key = f"{month_start}:{filter_start or 'all'}"
+    return cached(
+        DASHBOARD_CACHE_NAMESPACE,
+        key,
+        lambda: compute_dashboard_metrics(month_start, filter_start, filter_end),
+        DASHBOARD_CACHE_TTL,
+    )
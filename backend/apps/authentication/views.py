@@ -8,6 +8,9 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
 
+from apps.common.cache import conditional_response
+
+from . import metrics
 from .permissions import IsStaffOrAdmin, IsAdminOnly
 from .serializers import (
     UserSerializer,
@@ -93,9 +96,10 @@ def dashboard_metrics(request):
     Acepta ?month=YYYY-MM para filtrar gráficos por un mes específico.
     """
     from datetime import date, timedelta
-    from django.db import connection
 
-    today = date.today()
+    from apps.common.dates import business_today
+
+    today = business_today()
     month_start = today.replace(day=1)
 
     # Filtro de mes opcional para los gráficos
@@ -109,100 +113,7 @@ def dashboard_metrics(request):
         except (ValueError, TypeError):
             pass
 
-    MONTH_NAMES = ["", "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
-                   "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
-
-    with connection.cursor() as cursor:
-        # 1. Citas por estado
-        cursor.execute(
-            "SELECT status, COUNT(*) FROM public.appointments GROUP BY status"
-        )
-        appointments_by_status = {r[0]: int(r[1]) for r in cursor.fetchall()}
-
-        # 2. OTs por estado (filtrado por mes si se indica)
-        if filter_start:
-            cursor.execute(
-                "SELECT status, COUNT(*) FROM public.work_orders WHERE opened_at::date >= %s AND opened_at::date <= %s GROUP BY status",
-                [filter_start, filter_end],
-            )
-        else:
-            cursor.execute(
-                "SELECT status, COUNT(*) FROM public.work_orders GROUP BY status"
-            )
-        work_orders_by_status = {r[0]: int(r[1]) for r in cursor.fetchall()}
-
-        # 3. Ingresos: diarios si hay filtro de mes, mensuales (12 meses) si no
-        if filter_start:
-            cursor.execute(
-                """
-                SELECT cm.created_at::date AS day, COALESCE(SUM(cm.amount), 0)
-                FROM django_app.cash_movements cm
-                JOIN django_app.cash_sessions cs ON cs.cash_session_id = cm.cash_session_id
-                WHERE cm.created_at::date >= %s AND cm.created_at::date <= %s AND cm.amount > 0
-                GROUP BY cm.created_at::date
-                ORDER BY day
-                """,
-                [filter_start, filter_end],
-            )
-            monthly_income = [{"month": str(r[0]), "amount": float(r[1])} for r in cursor.fetchall()]
-        else:
-            cursor.execute(
-                """
-                SELECT DATE_TRUNC('month', cm.created_at)::date AS month, COALESCE(SUM(cm.amount), 0)
-                FROM django_app.cash_movements cm
-                JOIN django_app.cash_sessions cs ON cs.cash_session_id = cm.cash_session_id
-                WHERE cm.created_at::date >= (DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '11 months')::date
-                  AND cm.amount > 0
-                GROUP BY DATE_TRUNC('month', cm.created_at)
-                ORDER BY month
-                """,
-            )
-            monthly_income = [{"month": str(r[0]), "amount": float(r[1])} for r in cursor.fetchall()]
-
-        # 4. Movimientos por tipo en el mes actual
-        cursor.execute(
-            """
-            SELECT cm.movement_type, COALESCE(SUM(cm.amount), 0)
-            FROM django_app.cash_movements cm
-            JOIN django_app.cash_sessions cs ON cs.cash_session_id = cm.cash_session_id
-            WHERE cs.opened_at::date >= %s
-            GROUP BY cm.movement_type
-            """,
-            [month_start],
-        )
-        movements_by_type = {r[0]: float(r[1]) for r in cursor.fetchall()}
-
-        # 5. OTs cerradas este mes
-        cursor.execute(
-            "SELECT COUNT(*) FROM public.work_orders WHERE status = 'closed' AND closed_at::date >= %s",
-            [month_start],
-        )
-        wo_closed_month = int(cursor.fetchone()[0])
-
-        # 6. ¿Hay sesión de caja abierta?
-        cursor.execute(
-            "SELECT COUNT(*) FROM django_app.cash_sessions WHERE status = 'open'"
-        )
-        cash_session_open = int(cursor.fetchone()[0]) > 0
-
-    if filter_start:
-        income_label = f"Ingresos diarios — {MONTH_NAMES[filter_start.month]} {filter_start.year}"
-        wo_label     = f"OTs abiertas en {MONTH_NAMES[filter_start.month]} {filter_start.year}"
-    else:
-        income_label = "Ingresos mensuales — últimos 12 meses"
-        wo_label     = "Pipeline del taller"
-
-    return Response(
-        {
-            "appointments_by_status": appointments_by_status,
-            "work_orders_by_status": work_orders_by_status,
-            "monthly_income": monthly_income,
-            "movements_by_type": movements_by_type,
-            "wo_closed_month": wo_closed_month,
-            "cash_session_open": cash_session_open,
-            "income_label": income_label,
-            "wo_label": wo_label,
-            "is_filtered": bool(filter_start),
-            "month_label": MONTH_NAMES[month_start.month] + " " + str(month_start.year),
-        }
-    )
+    # Una sola consulta, cacheada por mes (TTL corto + invalidación en escrituras).
+    # ETag/If-None-Match permite al dashboard hacer polling con 304.
+    payload = metrics.dashboard_metrics(month_start, filter_start, filter_end)
+    return conditional_response(request, payload)
@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class BenchmarksConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "apps.benchmarks"
+    verbose_name = "Benchmarks"
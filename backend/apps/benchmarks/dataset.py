@@ -0,0 +1,299 @@
+"""
+Esquema y datos sintéticos para la base local de benchmarks.
+
+- ensure_local_database(): se niega a tocar una base que no sea local (los
+  benchmarks truncan tablas).
+- create_base_schema(): aplica schema.sql (tablas de Supabase, managed = False).
+- reset_data() / seed(size, seed): vacía las tablas y genera un dataset
+  determinista dentro de Postgres (INSERT ... SELECT generate_series), escalado
+  por `size` = cantidad de citas históricas. El resto se deriva:
+      clientes/vehículos  size / 4     productos  size / 20 (mín. 50)
+      OTs                 ~80% de las citas pasadas, 2 servicios + 3 productos c/u
+      caja                una sesión cerrada por día (365 días) + una abierta,
+                          un pago por OT cerrada y size / 2 ventas directas
+      slots               30 días futuros × 8 horarios, 1/3 con una cita
+"""
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+from apps.appointments.booking import resync_used_capacity
+from apps.cash_register.ledger import rebuild_ledger
+from apps.work_orders.totals import rebuild_totals
+
+SCHEMA_FILE = Path(__file__).resolve().parent / "schema.sql"
+LOCAL_HOSTS = {"", "localhost", "127.0.0.1", "::1", "db", "postgres"}
+STAFF_USERNAME = "bench-staff"
+CUSTOMER_EMAIL = "cliente1@example.invalid"
+
+# Tablas con datos del benchmark, en orden seguro para TRUNCATE ... CASCADE
+DATA_TABLES = [
+    "django_app.cash_closings",
+    "django_app.cash_movements",
+    "django_app.cash_sessions",
+    "django_app.product_movements",
+    "public.work_order_products",
+    "public.work_order_services",
+    "public.work_orders",
+    "public.appointments",
+    "public.appointment_slots",
+    "public.vehicles",
+    "public.customers",
+    "public.product_change_log",
+    "public.products",
+    "public.categories",
+    "public.service_change_log",
+    "public.services",
+    "public.period_closure_audit",
+    "public.period_closures",
+]
+
+
+class BenchmarkDatabaseError(ValueError):
+    pass
+
+
+def ensure_local_database() -> None:
+    db = settings.DATABASES["default"]
+    host = (db.get("HOST") or "").strip()
+    if host not in LOCAL_HOSTS or "supabase" in host:
+        raise BenchmarkDatabaseError(
+            f"Los benchmarks truncan tablas: solo corren contra una base local (HOST={host!r})."
+        )
+
+
+def create_base_schema() -> None:
+    with connection.cursor() as cursor:
+        cursor.execute(SCHEMA_FILE.read_text(encoding="utf-8"))
+
+
+def reset_data() -> None:
+    with connection.cursor() as cursor:
+        cursor.execute(f"TRUNCATE {', '.join(DATA_TABLES)} CASCADE")
+
+
+def bench_staff_user():
+    User = get_user_model()
+    user, _ = User.objects.get_or_create(
+        username=STAFF_USERNAME,
+        defaults={"user_type": "admin", "is_staff": True, "email": "bench@example.invalid"},
+    )
+    return user
+
+
+def seed(size: int, seed: float = 0.42) -> None:
+    """Genera el dataset para `size` citas históricas. Mismo seed → mismos datos."""
+    staff_id = str(bench_staff_user().id)
+    params = {
+        "tz": settings.TIME_ZONE,
+        "staff": staff_id,
+        "appointments": size,
+        "customers": max(20, size // 4),
+        "products": max(50, size // 20),
+        "sales": max(10, size // 2),
+    }
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT setseed(%s)", [seed])
+        for sql in _SEED_SQL:
+            cursor.execute(sql, params)
+
+    rebuild_ledger()
+    rebuild_totals()
+    resync_used_capacity()
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+
+_SEED_SQL = [
+    # Catálogo
+    """
+    INSERT INTO public.services (name, base_price, estimated_minutes, requires_lift, is_active)
+    SELECT 'Servicio ' || lpad(g::text, 2, '0'), 5000 + g * 1500, 30 + (g %% 4) * 30, g %% 3 = 0, true
+    FROM generate_series(1, 20) g
+    """,
+    """
+    INSERT INTO public.categories (name)
+    SELECT 'Categoría ' || lpad(g::text, 2, '0') FROM generate_series(1, 10) g
+    """,
+    """
+    WITH cats AS (SELECT array_agg(category_id ORDER BY name) AS ids FROM public.categories)
+    INSERT INTO public.products
+      (category_id, sku, name, unit_price, cost, stock_qty, base_unit, secondary_unit, secondary_unit_factor, is_active)
+    SELECT cats.ids[1 + g %% 10],
+           'SKU-' || lpad(g::text, 6, '0'),
+           (ARRAY['Aceite', 'Filtro', 'Bujía', 'Pastillas', 'Refrigerante', 'Batería'])[1 + g %% 6] || ' ' || g,
+           round((2000 + random() * 40000)::numeric, 2),
+           round((1000 + random() * 20000)::numeric, 2),
+           100000,
+           CASE WHEN g %% 6 = 0 THEN 'litro' ELSE 'unidad' END,
+           CASE WHEN g %% 6 = 0 THEN 'galón' END,
+           CASE WHEN g %% 6 = 0 THEN 3.7854 END,
+           true
+    FROM generate_series(1, %(products)s) g, cats
+    """,
+    # Clientes y vehículos (uno por cliente)
+    """
+    INSERT INTO public.customers (full_name, phone, email, is_active)
+    SELECT 'Cliente ' || g, '8' || lpad(g::text, 7, '0'), 'cliente' || g || '@example.invalid', true
+    FROM generate_series(1, %(customers)s) g
+    """,
+    """
+    INSERT INTO public.vehicles (customer_id, plate, make, model, year)
+    SELECT c.customer_id,
+           'BEN' || lpad(row_number() OVER (ORDER BY c.email)::text, 6, '0'),
+           (ARRAY['Toyota', 'Nissan', 'Hyundai', 'Honda', 'Suzuki'])[1 + (row_number() OVER (ORDER BY c.email)) %% 5],
+           (ARRAY['Corolla', 'Sentra', 'Tucson', 'Civic', 'Vitara'])[1 + (row_number() OVER (ORDER BY c.email)) %% 5],
+           2005 + (row_number() OVER (ORDER BY c.email)) %% 19
+    FROM public.customers c
+    """,
+    # Slots futuros: 30 días × 8 horarios desde las 08:00 locales
+    """
+    INSERT INTO public.appointment_slots (start_at, end_at, capacity, is_active)
+    SELECT ((date_trunc('day', now() AT TIME ZONE %(tz)s) + d * interval '1 day' + (8 + h) * interval '1 hour')
+              AT TIME ZONE %(tz)s),
+           ((date_trunc('day', now() AT TIME ZONE %(tz)s) + d * interval '1 day' + (9 + h) * interval '1 hour')
+              AT TIME ZONE %(tz)s),
+           3, true
+    FROM generate_series(1, 30) d, generate_series(0, 7) h
+    """,
+    # Citas históricas del último año (random() en una subconsulta: se evalúa por fila)
+    """
+    WITH v AS (
+        SELECT array_agg(vehicle_id ORDER BY plate) AS vids, array_agg(customer_id ORDER BY plate) AS cids
+        FROM public.vehicles
+    ), s AS (SELECT array_agg(service_id ORDER BY name) AS ids FROM public.services)
+    INSERT INTO public.appointments
+      (customer_id, vehicle_id, service_id, scheduled_start, scheduled_end, status, progress_percent, created_at, updated_at)
+    SELECT v.cids[x.i], v.vids[x.i], s.ids[1 + x.g %% 20], x.t, x.t + interval '1 hour',
+           CASE WHEN x.g %% 10 = 0 THEN 'cancelled' ELSE 'completed' END,
+           CASE WHEN x.g %% 10 = 0 THEN 0 ELSE 100 END,
+           x.t - interval '2 days', x.t
+    FROM (
+        SELECT g, 1 + floor(random() * %(customers)s)::int AS i, now() - random() * interval '365 days' AS t
+        FROM generate_series(1, %(appointments)s) g
+    ) x, v, s
+    """,
+    # Citas futuras: una en un tercio de los slots
+    """
+    WITH v AS (
+        SELECT array_agg(vehicle_id ORDER BY plate) AS vids, array_agg(customer_id ORDER BY plate) AS cids
+        FROM public.vehicles
+    ), s AS (SELECT array_agg(service_id ORDER BY name) AS ids FROM public.services)
+    INSERT INTO public.appointments
+      (customer_id, vehicle_id, service_id, slot_id, scheduled_start, scheduled_end, status, progress_percent)
+    SELECT v.cids[x.i], v.vids[x.i], s.ids[x.j], x.slot_id, x.start_at, x.end_at, 'scheduled', 0
+    FROM (
+        SELECT sl.slot_id, sl.start_at, sl.end_at,
+               1 + floor(random() * %(customers)s)::int AS i, 1 + floor(random() * 20)::int AS j,
+               random() AS r
+        FROM public.appointment_slots sl
+    ) x, v, s
+    WHERE x.r < 0.33
+    """,
+    # OTs: ~80% de las citas completadas; las de la última semana siguen abiertas
+    """
+    INSERT INTO public.work_orders
+      (appointment_id, customer_id, vehicle_id, status, authorization_status, customer_symptoms,
+       created_by, opened_at, closed_at, created_at, updated_at)
+    SELECT a.appointment_id, a.customer_id, a.vehicle_id,
+           CASE WHEN a.scheduled_start > now() - interval '7 days'
+                THEN (ARRAY['open', 'in_progress', 'ready'])[1 + (random() * 2)::int]
+                ELSE 'closed' END,
+           'approved', 'Mantenimiento preventivo', %(staff)s::uuid, a.scheduled_start,
+           CASE WHEN a.scheduled_start > now() - interval '7 days' THEN NULL
+                ELSE a.scheduled_start + interval '3 hours' END,
+           a.scheduled_start, a.scheduled_start
+    FROM public.appointments a
+    WHERE a.status = 'completed' AND random() < 0.8
+    """,
+    """
+    WITH s AS (SELECT array_agg(service_id ORDER BY name) AS ids, array_agg(base_price ORDER BY name) AS prices
+               FROM public.services)
+    INSERT INTO public.work_order_services
+      (work_order_id, service_id, qty, unit_price, status, created_at, updated_at)
+    SELECT x.work_order_id, s.ids[x.j], 1, s.prices[x.j],
+           CASE WHEN x.status = 'closed' THEN 'completed' ELSE 'pending' END,
+           x.opened_at, x.opened_at
+    FROM (
+        SELECT wo.work_order_id, wo.status, wo.opened_at, 1 + floor(random() * 20)::int AS j
+        FROM public.work_orders wo, generate_series(1, 2) n
+    ) x, s
+    """,
+    """
+    WITH p AS (SELECT array_agg(product_id ORDER BY sku) AS ids, array_agg(unit_price ORDER BY sku) AS prices
+               FROM public.products)
+    INSERT INTO public.work_order_products (work_order_id, product_id, qty, unit_price, created_at, updated_at)
+    SELECT x.work_order_id, p.ids[x.j], x.qty, p.prices[x.j], x.opened_at, x.opened_at
+    FROM (
+        SELECT wo.work_order_id, wo.opened_at, 1 + floor(random() * %(products)s)::int AS j,
+               1 + floor(random() * 4)::int AS qty
+        FROM public.work_orders wo, generate_series(1, 3) n
+    ) x, p
+    """,
+    """
+    INSERT INTO django_app.product_movements
+      (product_id, movement_type, qty_before, qty_change, qty_after, reason,
+       reference_id, reference_type, performed_by, created_at)
+    SELECT wop.product_id, 'work_order', 100000, -wop.qty, 100000 - wop.qty, 'Línea OT',
+           wop.work_order_product_id, 'work_order_product', %(staff)s::uuid, wop.created_at
+    FROM public.work_order_products wop
+    """,
+    # Caja: una sesión cerrada por día del último año y la sesión abierta de hoy
+    """
+    INSERT INTO django_app.cash_sessions
+      (opened_by, opened_at, opening_amount, status, closed_by, closed_at, created_at, updated_at)
+    SELECT %(staff)s::uuid, o, 50000, 'closed', %(staff)s::uuid, o + interval '10 hours', o, o
+    FROM generate_series(1, 365) d,
+         LATERAL (SELECT ((date_trunc('day', now() AT TIME ZONE %(tz)s) - d * interval '1 day' + interval '8 hours')
+                            AT TIME ZONE %(tz)s) AS o) x
+    """,
+    """
+    INSERT INTO django_app.cash_sessions (opened_by, opened_at, opening_amount, status)
+    VALUES (%(staff)s::uuid, now(), 50000, 'open')
+    """,
+    """
+    INSERT INTO django_app.cash_movements
+      (cash_session_id, movement_type, amount, work_order_id, description, created_by, created_at, updated_at)
+    SELECT cs.cash_session_id, 'payment', t.total, wo.work_order_id, 'Cobro OT', %(staff)s::uuid,
+           wo.closed_at, wo.closed_at
+    FROM public.work_orders wo
+    JOIN LATERAL (
+        SELECT coalesce((SELECT sum(qty * unit_price) FROM public.work_order_services WHERE work_order_id = wo.work_order_id), 0)
+             + coalesce((SELECT sum(qty * unit_price) FROM public.work_order_products WHERE work_order_id = wo.work_order_id), 0)
+               AS total
+    ) t ON true
+    JOIN django_app.cash_sessions cs
+      ON (cs.opened_at AT TIME ZONE %(tz)s)::date = (wo.closed_at AT TIME ZONE %(tz)s)::date
+    WHERE wo.status = 'closed' AND t.total > 0
+    """,
+    """
+    WITH cs AS (SELECT array_agg(cash_session_id ORDER BY opened_at) AS ids,
+                       array_agg(opened_at ORDER BY opened_at) AS opened
+                FROM django_app.cash_sessions WHERE status = 'closed'),
+         p AS (SELECT array_agg(product_id ORDER BY sku) AS ids, array_agg(unit_price ORDER BY sku) AS prices
+               FROM public.products)
+    INSERT INTO django_app.cash_movements
+      (cash_session_id, movement_type, amount, product_id, product_qty, description, created_by, created_at, updated_at)
+    SELECT cs.ids[x.i], 'sale', p.prices[x.j], p.ids[x.j], 1, 'Venta directa', %(staff)s::uuid,
+           cs.opened[x.i] + x.offset_hours * interval '1 hour', cs.opened[x.i]
+    FROM (
+        SELECT 1 + floor(random() * 365)::int AS i, 1 + floor(random() * %(products)s)::int AS j,
+               random() * 9 AS offset_hours
+        FROM generate_series(1, %(sales)s) g
+    ) x, cs, p
+    """,
+    """
+    INSERT INTO django_app.cash_closings
+      (cash_session_id, closing_type, theoretical_amount, actual_amount, difference, closed_by, closed_at)
+    SELECT cs.cash_session_id, 'final', t.total, t.total, 0, %(staff)s::uuid, cs.closed_at
+    FROM django_app.cash_sessions cs
+    JOIN LATERAL (
+        SELECT cs.opening_amount + coalesce(sum(cm.amount), 0) AS total
+        FROM django_app.cash_movements cm WHERE cm.cash_session_id = cs.cash_session_id
+    ) t ON true
+    WHERE cs.status = 'closed'
+    """,
+]
@@ -0,0 +1,194 @@
+"""
+Benchmark de la búsqueda pg_trgm (apps/common/search.py) contra el ILIKE por
+columna que se usaba antes (plate__icontains), con el mismo volumen por tabla.
+
+Uso:
+    python manage.py benchmark_search                    # 100k filas por tabla
+    python manage.py benchmark_search --rows 20000 --repeat 50 --budget-ms 20
+
+Inserta filas sintéticas en customers, vehicles y products dentro de una
+transacción que se revierte al final (no deja datos), corre ANALYZE y mide
+cada término con las dos estrategias: p50/p95 y si el plan usa el índice
+*_search_trgm_idx. Falla (exit != 0) si el p95 de la búsqueda trigram supera
+--budget-ms o si el plan no usa el índice. Requiere las migraciones aplicadas
+y se niega a correr contra una base que no sea local.
+"""
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.benchmarks import dataset
+from apps.common.search import SEARCH_DOCUMENTS, clean_term, match_sql, rank_sql
+
+SEARCH_INDEXES = {
+    "customers": "customers_search_trgm_idx",
+    "vehicles": "vehicles_search_trgm_idx",
+    "products": "products_search_trgm_idx",
+}
+
+# (tabla, término): substrings exactos, errores de tipeo y fragmentos de código
+TERMS = [
+    ("customers", "maria gonzalez"),
+    ("customers", "gonzales"),
+    ("customers", "rodrigues mora"),
+    ("customers", "8812"),
+    ("vehicles", "toyota corola"),
+    ("vehicles", "hilux"),
+    ("vehicles", "BKR"),
+    ("products", "aceite 10w40"),
+    ("products", "filtro aire"),
+    ("products", "SKU-00421"),
+]
+
+_SYNTHETIC_SQL = [
+    """
+    INSERT INTO public.customers (full_name, email, phone, is_active)
+    SELECT f.v || ' ' || s1.v || ' ' || s2.v,
+           lower(f.v) || '.' || lower(s1.v) || g || '@example.invalid',
+           '8' || lpad((floor(random() * 9999999))::int::text, 7, '0'),
+           true
+    FROM generate_series(1, %(rows)s) g
+    CROSS JOIN LATERAL (SELECT (ARRAY['Maria','Jose','Ana','Luis','Carlos','Laura','Sofia','Diego',
+                                      'Andrea','Pablo','Daniela','Jorge','Valeria','Mario','Paola'])
+                               [1 + floor(random() * 15 + g * 0)::int] AS v) f
+    CROSS JOIN LATERAL (SELECT (ARRAY['Gonzalez','Rodriguez','Mora','Vargas','Jimenez','Rojas','Alvarado',
+                                      'Solano','Castro','Araya','Chaves','Quesada','Campos','Salas'])
+                               [1 + floor(random() * 14 + g * 0)::int] AS v) s1
+    CROSS JOIN LATERAL (SELECT (ARRAY['Gonzalez','Rodriguez','Mora','Vargas','Jimenez','Rojas','Alvarado',
+                                      'Solano','Castro','Araya','Chaves','Quesada','Campos','Salas'])
+                               [1 + floor(random() * 14 + g * 0)::int] AS v) s2
+    """,
+    """
+    INSERT INTO public.vehicles (customer_id, plate, make, model, year, vin)
+    SELECT c.customer_id,
+           chr(65 + floor(random() * 26)::int) || chr(65 + floor(random() * 26)::int)
+             || chr(65 + floor(random() * 26)::int) || lpad((c.n % 1000)::text, 3, '0'),
+           m.make, m.model, 1995 + floor(random() * 30)::int,
+           upper(substr(md5(c.customer_id::text), 1, 17))
+    FROM (SELECT customer_id, row_number() OVER () AS n
+          FROM public.customers ORDER BY created_at DESC LIMIT %(rows)s) c
+    CROSS JOIN LATERAL (
+        SELECT (ARRAY['Toyota','Nissan','Hyundai','Suzuki','Mitsubishi','Honda','Kia','Mazda'])[i] AS make,
+               (ARRAY['Corolla','Sentra','Tucson','Swift','Montero','Civic','Sportage','CX-5'])[i] AS model
+        FROM (SELECT 1 + floor(random() * 8 + c.n * 0)::int AS i) x
+    ) m
+    """,
+    """
+    INSERT INTO public.products (sku, name, unit_price, cost, stock_qty)
+    SELECT 'SKU-' || lpad(g::text, 6, '0'),
+           t.v || ' ' || b.v || ' ' || (ARRAY['5w30','10w40','15w40','20w50','aire','cabina','ATF','DOT4'])
+                                        [1 + floor(random() * 8 + g * 0)::int],
+           round((1000 + random() * 40000)::numeric, 2), 1000, 100
+    FROM generate_series(1, %(rows)s) g
+    CROSS JOIN LATERAL (SELECT (ARRAY['Aceite','Filtro','Liquido','Grasa','Refrigerante','Aditivo'])
+                               [1 + floor(random() * 6 + g * 0)::int] AS v) t
+    CROSS JOIN LATERAL (SELECT (ARRAY['Castrol','Mobil','Shell','Valvoline','Bosch','Mann','Total'])
+                               [1 + floor(random() * 7 + g * 0)::int] AS v) b
+    """,
+]
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _trigram_query(table: str, term: str, limit: int) -> tuple:
+    match, match_params = match_sql(table, term)
+    rank, rank_params = rank_sql(table, term)
+    sql = f"SELECT {table}.* FROM public.{table} WHERE {match} ORDER BY {rank} DESC LIMIT {limit}"
+    return sql, match_params + rank_params
+
+
+def _ilike_query(table: str, term: str, limit: int) -> tuple:
+    """Lo que generaba `<columna>__icontains` por cada columna, unido con OR."""
+    columns = SEARCH_DOCUMENTS[table]
+    where = " OR ".join(f"UPPER({table}.{c}::text) LIKE UPPER(%s)" for c in columns)
+    sql = f"SELECT {table}.* FROM public.{table} WHERE {where} ORDER BY 1 LIMIT {limit}"
+    return sql, [f"%{term}%"] * len(columns)
+
+
+def _time(cursor, sql: str, params: list, repeat: int) -> tuple:
+    timings, rows = [], 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        cursor.execute(sql, params)
+        rows = len(cursor.fetchall())
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, round(0.95 * (len(timings) - 1)))]
+    return statistics.median(timings), p95, rows
+
+
+def _uses_index(cursor, sql: str, params: list, index_name: str) -> bool:
+    cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return index_name in json.dumps(plan)
+
+
+class Command(BaseCommand):
+    help = "Compara la búsqueda pg_trgm contra ILIKE por columna en customers, vehicles y products."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000, help="Filas sintéticas por tabla")
+        parser.add_argument("--repeat", type=int, default=30, help="Ejecuciones medidas por término")
+        parser.add_argument("--limit", type=int, default=50, help="LIMIT de cada búsqueda")
+        parser.add_argument("--budget-ms", type=float, default=20.0, help="p95 máximo aceptado (trigram)")
+
+    def handle(self, *args, **options):
+        try:
+            dataset.ensure_local_database()
+        except dataset.BenchmarkDatabaseError as e:
+            raise CommandError(str(e))
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT indexname FROM pg_indexes WHERE indexname = ANY(%s)", [list(SEARCH_INDEXES.values())])
+            missing = set(SEARCH_INDEXES.values()) - {row[0] for row in cursor.fetchall()}
+        if missing:
+            raise CommandError(f"Faltan índices ({', '.join(sorted(missing))}). Corra migrate primero.")
+
+        repeat, limit = max(options["repeat"], 1), options["limit"]
+        failures = []
+        try:
+            with transaction.atomic():
+                started = time.perf_counter()
+                with connection.cursor() as cursor:
+                    for sql in _SYNTHETIC_SQL:
+                        cursor.execute(sql, {"rows": options["rows"]})
+                    cursor.execute("ANALYZE public.customers, public.vehicles, public.products")
+                self.stdout.write(
+                    f"{options['rows']} filas por tabla generadas en {time.perf_counter() - started:.1f}s\n"
+                )
+                self.stdout.write(
+                    f"{'tabla':<10} {'término':<18} {'trgm p50':>9} {'trgm p95':>9} {'filas':>6} "
+                    f"{'ilike p50':>10} {'ilike p95':>10} {'filas':>6}  índice"
+                )
+                with connection.cursor() as cursor:
+                    for table, raw_term in TERMS:
+                        term = clean_term(raw_term)
+                        trgm_sql, trgm_params = _trigram_query(table, term, limit)
+                        ilike_sql, ilike_params = _ilike_query(table, term, limit)
+                        uses_index = _uses_index(cursor, trgm_sql, trgm_params, SEARCH_INDEXES[table])
+                        t50, t95, t_rows = _time(cursor, trgm_sql, trgm_params, repeat)
+                        i50, i95, i_rows = _time(cursor, ilike_sql, ilike_params, repeat)
+                        self.stdout.write(
+                            f"{table:<10} {term:<18} {t50:>9.2f} {t95:>9.2f} {t_rows:>6} "
+                            f"{i50:>10.2f} {i95:>10.2f} {i_rows:>6}  {'sí' if uses_index else 'NO'}"
+                        )
+                        if not uses_index:
+                            failures.append(f"{table} '{term}': el plan no usa {SEARCH_INDEXES[table]}")
+                        if t95 > options["budget_ms"]:
+                            failures.append(f"{table} '{term}': p95 {t95:.2f} ms > {options['budget_ms']} ms")
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        if failures:
+            for failure in failures:
+                self.stdout.write(self.style.ERROR(f"  {failure}"))
+            raise CommandError(f"{len(failures)} término(s) fuera de presupuesto.")
+        self.stdout.write(self.style.SUCCESS(f"\nBúsqueda trigram dentro de {options['budget_ms']} ms (p95)."))
@@ -0,0 +1,66 @@
+"""
+Compara dos archivos de run_benchmarks y marca regresiones.
+
+Uso:
+    python manage.py compare_benchmarks bench/main.json bench/rama.json --threshold 15
+
+Una regresión es un escenario/tamaño cuya mediana empeora más de --threshold %
+(y más de --min-ms, para no marcar ruido en endpoints de 1 ms) o que hace más
+consultas que antes. Sale con error si hay alguna, para usarlo en CI.
+"""
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _load(path: str) -> dict:
+    try:
+        report = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        raise CommandError(f"No se pudo leer {path}: {e}")
+    return {(r["scenario"], r["size"]): r for r in report.get("results", [])}
+
+
+class Command(BaseCommand):
+    help = "Compara dos corridas de run_benchmarks y falla si hay regresiones."
+
+    def add_arguments(self, parser):
+        parser.add_argument("baseline")
+        parser.add_argument("candidate")
+        parser.add_argument("--threshold", type=float, default=20.0, help="Tolerancia en % sobre la mediana")
+        parser.add_argument("--min-ms", type=float, default=1.0, help="Diferencia mínima en ms para contar")
+
+    def handle(self, *args, **options):
+        baseline = _load(options["baseline"])
+        candidate = _load(options["candidate"])
+        threshold = options["threshold"] / 100
+
+        self.stdout.write(
+            f"{'escenario':<28} {'size':>8} {'antes ms':>9} {'ahora ms':>9} {'cambio':>8} {'queries':>9}"
+        )
+        regressions = []
+        for key in sorted(set(baseline) & set(candidate)):
+            old, new = baseline[key], candidate[key]
+            change = (new["p50_ms"] - old["p50_ms"]) / old["p50_ms"] if old["p50_ms"] else 0.0
+            slower = change > threshold and new["p50_ms"] - old["p50_ms"] > options["min_ms"]
+            more_queries = (new.get("queries") or 0) > (old.get("queries") or 0)
+
+            mark = ""
+            if slower or more_queries:
+                regressions.append(key)
+                mark = self.style.ERROR("  REGRESIÓN")
+            elif change < -threshold:
+                mark = self.style.SUCCESS("  mejora")
+            self.stdout.write(
+                f"{key[0]:<28} {key[1]:>8} {old['p50_ms']:>9.2f} {new['p50_ms']:>9.2f} {change:>+8.1%} "
+                f"{old.get('queries')!s:>4}→{new.get('queries')!s:<4}{mark}"
+            )
+
+        missing = sorted(set(baseline) - set(candidate))
+        for key in missing:
+            self.stdout.write(self.style.WARNING(f"{key[0]} size={key[1]}: no está en {options['candidate']}"))
+
+        if regressions:
+            raise CommandError(f"{len(regressions)} regresión(es) sobre {options['threshold']:.0f}%.")
+        self.stdout.write(self.style.SUCCESS("Sin regresiones."))
@@ -0,0 +1,170 @@
+"""
+Benchmarks de los endpoints críticos contra una base Postgres local.
+
+Uso:
+    # Una vez: esquema base de Supabase + migraciones del repo
+    python manage.py run_benchmarks --setup
+
+    python manage.py run_benchmarks --sizes 1000,10000,100000 --repeat 30 \
+        --output bench/main.json
+    python manage.py compare_benchmarks bench/main.json bench/rama.json
+
+Para cada tamaño vacía las tablas, genera el dataset (apps/benchmarks/dataset.py)
+y mide cada escenario (apps/benchmarks/scenarios.py): mediana, p95 y cantidad
+de consultas por request. Cada iteración se revierte, así todas miden sobre los
+mismos datos. Se niega a correr contra una base que no sea local.
+
+Requiere DATABASE_SSLMODE=disable (o prefer) si el Postgres local no tiene SSL.
+"""
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+import django
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.benchmarks import dataset
+from apps.benchmarks.scenarios import SCENARIOS, BenchContext
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = "Mide tiempo y consultas de los endpoints críticos para varios volúmenes de datos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--setup", action="store_true", help="Crea el esquema base y corre migrate")
+        parser.add_argument("--sizes", default="1000,10000", help="Citas históricas por dataset, separadas por coma")
+        parser.add_argument("--repeat", type=int, default=20, help="Iteraciones medidas por escenario")
+        parser.add_argument("--warmup", type=int, default=3, help="Iteraciones previas sin medir (mín. 1)")
+        parser.add_argument("--seed", type=float, default=0.42, help="Semilla del dataset (-1..1)")
+        parser.add_argument("--only", default="", help="Escenarios a correr, separados por coma")
+        parser.add_argument("--output", default="", help="Archivo JSON de resultados")
+
+    def handle(self, *args, **options):
+        try:
+            dataset.ensure_local_database()
+        except dataset.BenchmarkDatabaseError as e:
+            raise CommandError(str(e))
+
+        if options["setup"]:
+            dataset.create_base_schema()
+            call_command("migrate", interactive=False, verbosity=0)
+            self.stdout.write(self.style.SUCCESS("Esquema base y migraciones aplicados."))
+            if not options["output"]:
+                return
+
+        sizes = [int(s) for s in str(options["sizes"]).split(",") if s.strip()]
+        only = {s.strip() for s in options["only"].split(",") if s.strip()}
+        scenarios = [s for s in SCENARIOS if not only or s.name in only]
+        if not scenarios:
+            raise CommandError(f"Ningún escenario coincide con --only={options['only']}.")
+
+        results = []
+        for size in sizes:
+            started = time.perf_counter()
+            dataset.reset_data()
+            dataset.seed(size, options["seed"])
+            self.stdout.write(f"\nDataset size={size} generado en {time.perf_counter() - started:.1f}s")
+            self.stdout.write(f"{'escenario':<28} {'p50 ms':>9} {'p95 ms':>9} {'media ms':>9} {'queries':>8}")
+
+            ctx = BenchContext()
+            for scenario in scenarios:
+                result = self._measure(scenario, ctx, options["repeat"], options["warmup"])
+                result["size"] = size
+                results.append(result)
+                self.stdout.write(
+                    f"{scenario.name:<28} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+                    f"{result['mean_ms']:>9.2f} {result['queries']:>8}"
+                )
+
+        report = {
+            "meta": {
+                "created_at": datetime.now(dt_timezone.utc).isoformat(),
+                "git_revision": _git_revision(),
+                "postgres": connection.pg_version,
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "repeat": options["repeat"],
+                "warmup": options["warmup"],
+                "seed": options["seed"],
+                "sizes": sizes,
+            },
+            "results": results,
+        }
+        if options["output"]:
+            path = Path(options["output"])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+            self.stdout.write(self.style.SUCCESS(f"\nResultados en {path}"))
+
+    def _measure(self, scenario, ctx, repeat: int, warmup: int) -> dict:
+        timings = []
+        queries = None
+        warmup, repeat = max(warmup, 1), max(repeat, 1)
+        for i in range(warmup + repeat):
+            cache.clear()
+            try:
+                with transaction.atomic():
+                    kwargs = scenario.prepare(ctx) if scenario.prepare else {}
+                    if i == 0:
+                        # Conteo de consultas en una iteración de calentamiento (capturar tiene costo)
+                        with CaptureQueriesContext(connection) as captured:
+                            self._call(scenario, ctx, kwargs)
+                        queries = len(captured.captured_queries)
+                    else:
+                        started = time.perf_counter()
+                        self._call(scenario, ctx, kwargs)
+                        elapsed = (time.perf_counter() - started) * 1000
+                        if i >= warmup:
+                            timings.append(elapsed)
+                    raise _Rollback()
+            except _Rollback:
+                pass
+
+        return {
+            "scenario": scenario.name,
+            "tags": scenario.tags,
+            "n": len(timings),
+            "p50_ms": round(statistics.median(timings), 3),
+            "p95_ms": round(_percentile(timings, 95), 3),
+            "mean_ms": round(statistics.fmean(timings), 3),
+            "min_ms": round(min(timings), 3),
+            "max_ms": round(max(timings), 3),
+            "queries": queries,
+        }
+
+    def _call(self, scenario, ctx, kwargs):
+        response = scenario.run(ctx, **kwargs)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        if response.status_code not in scenario.expected_status:
+            detail = str(getattr(response, "data", ""))[:300]
+            raise CommandError(f"{scenario.name}: HTTP {response.status_code} {detail}")
+        return response
@@ -0,0 +1,69 @@
+"""
+Genera un dataset sintético de varios años de operación del taller.
+
+Uso:
+    python manage.py seed_workload --scale 1 --years 2 --seed 42 --truncate
+    python manage.py seed_workload --scale 45 --years 3 --truncate   # ~10 M filas
+    python manage.py seed_workload --end 2026-06-30 ...               # fecha fija: corridas idénticas
+
+--scale 1 ≈ 20 OTs por día hábil (~12 filas por OT entre citas, líneas,
+movimientos de caja e inventario). Misma semilla, escala y --end → mismos datos.
+Carga con COPY en lotes mensuales; ver apps/benchmarks/workload.py para el
+modelo de estacionalidad y de stock.
+
+Solo corre contra una base local (ver apps/benchmarks/dataset.py).
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.benchmarks import dataset
+from apps.common.dates import parse_business_date
+from apps.benchmarks.workload import WorkloadGenerator
+
+
+class Command(BaseCommand):
+    help = "Genera citas, OTs, caja e inventario sintéticos con estacionalidad realista."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=float, default=1.0, help="Multiplicador del volumen diario")
+        parser.add_argument("--years", type=float, default=2.0, help="Años de historia hasta ayer")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--end", default=None, help="Último día generado, YYYY-MM-DD (default: ayer)")
+        parser.add_argument("--batch-days", type=int, default=31, help="Días por lote de COPY")
+        parser.add_argument("--truncate", action="store_true", help="Vacía las tablas antes de generar")
+
+    def handle(self, *args, **options):
+        if options["scale"] <= 0 or options["years"] <= 0:
+            raise CommandError("--scale y --years deben ser mayores a cero.")
+        try:
+            end = parse_business_date(options["end"]) if options["end"] else None
+        except ValueError as e:
+            raise CommandError(str(e))
+        try:
+            dataset.ensure_local_database()
+        except dataset.BenchmarkDatabaseError as e:
+            raise CommandError(str(e))
+
+        if options["truncate"]:
+            dataset.reset_data()
+
+        generator = WorkloadGenerator(
+            scale=options["scale"],
+            years=options["years"],
+            seed=options["seed"],
+            end=end,
+            batch_days=max(1, options["batch_days"]),
+            stdout=self.stdout,
+        )
+        self.stdout.write(f"Generando {generator.start} → {generator.end} (scale={options['scale']}, seed={options['seed']})")
+        started = time.perf_counter()
+        counts = generator.run()
+        elapsed = time.perf_counter() - started
+
+        for table, count in counts.items():
+            self.stdout.write(f"  {table:<32} {count:>12,}")
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"{total:,} filas en {elapsed:.1f}s ({total / elapsed:,.0f} filas/s)."
+        ))
@@ -0,0 +1,236 @@
+"""
+Escenarios de benchmark: requests HTTP reales contra la API (APIClient), con
+autenticación JWT como la del frontend.
+
+Cada escenario tiene:
+- prepare(ctx) opcional, fuera del cronómetro (p. ej. crear la línea que
+  después se borra); retorna kwargs para run.
+- run(ctx, **kwargs) → response; es lo que se cronometra.
+
+Cada iteración corre dentro de una transacción que se revierte, así las
+escrituras (reservas, ventas, líneas) no cambian el dataset entre iteraciones.
+Antes de cada iteración se limpia la caché: se mide el camino frío (BD).
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Callable, Optional
+
+import jwt
+from django.conf import settings
+from django.db import connection
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.common.dates import business_today
+
+from .dataset import CUSTOMER_EMAIL, bench_staff_user
+
+
+@dataclass
+class Scenario:
+    name: str
+    run: Callable
+    prepare: Optional[Callable] = None
+    expected_status: tuple = (200,)
+    tags: list = field(default_factory=list)
+
+
+class BenchContext:
+    """Ids del dataset y clientes HTTP autenticados (staff y cliente)."""
+
+    def __init__(self):
+        staff = bench_staff_user()
+        self.staff_id = str(staff.id)
+        self.staff = APIClient(SERVER_NAME="localhost")
+        self.staff.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(staff)}")
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT c.customer_id, v.vehicle_id, v.plate
+                FROM public.customers c JOIN public.vehicles v ON v.customer_id = c.customer_id
+                WHERE c.email = %s LIMIT 1
+                """,
+                [CUSTOMER_EMAIL],
+            )
+            self.customer_id, self.vehicle_id, self.vehicle_plate = [str(v) for v in cursor.fetchone()]
+            cursor.execute("SELECT service_id FROM public.services WHERE is_active ORDER BY name LIMIT 1")
+            self.service_id = str(cursor.fetchone()[0])
+            cursor.execute(
+                """
+                SELECT slot_id FROM public.appointment_slots
+                WHERE is_active AND used_capacity < capacity AND start_at > now()
+                ORDER BY start_at LIMIT 1
+                """
+            )
+            self.slot_id = str(cursor.fetchone()[0])
+            cursor.execute(
+                "SELECT product_id, unit_price FROM public.products WHERE is_active AND stock_qty > 100 ORDER BY sku LIMIT 1"
+            )
+            product_id, self.product_price = cursor.fetchone()
+            self.product_id = str(product_id)
+            cursor.execute(
+                "SELECT product_id, unit_price FROM public.products WHERE is_active AND stock_qty > 100 ORDER BY sku LIMIT 10"
+            )
+            self.bulk_products = [(str(pid), str(price)) for pid, price in cursor.fetchall()]
+            cursor.execute(
+                "SELECT work_order_id FROM public.work_orders WHERE status <> 'cancelled' ORDER BY opened_at DESC LIMIT 1"
+            )
+            self.work_order_id = str(cursor.fetchone()[0])
+            cursor.execute("SELECT cash_session_id FROM django_app.cash_sessions WHERE status = 'open' LIMIT 1")
+            self.cash_session_id = str(cursor.fetchone()[0])
+
+        now = datetime.now(dt_timezone.utc)
+        token = jwt.encode(
+            {
+                "token_type": "customer",
+                "customer_id": self.customer_id,
+                "email": CUSTOMER_EMAIL,
+                "iat": now,
+                "exp": now + timedelta(hours=12),
+            },
+            settings.SECRET_KEY,
+            algorithm="HS256",
+        )
+        self.customer = APIClient(SERVER_NAME="localhost")
+        self.customer.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        today = business_today()
+        self.month_start = today.replace(day=1)
+        self.report_from = str(today - timedelta(days=30))
+        self.report_to = str(today)
+        last_month = self.month_start - timedelta(days=1)
+        self.closure_year, self.closure_month = last_month.year, last_month.month
+
+
+def _add_product_line(ctx):
+    return ctx.staff.post(
+        "/api/work-order-products/",
+        {"work_order_id": ctx.work_order_id, "product_id": ctx.product_id, "qty": "1",
+         "unit_price": str(ctx.product_price)},
+        format="json",
+    )
+
+
+def _add_bulk_lines(ctx):
+    return ctx.staff.post(
+        f"/api/work-orders/{ctx.work_order_id}/lines/",
+        {
+            "services": [{"service_id": ctx.service_id, "qty": "1", "unit_price": "0"}],
+            "products": [{"product_id": pid, "qty": "1", "unit_price": price} for pid, price in ctx.bulk_products],
+        },
+        format="json",
+    )
+
+
+def _prepare_product_line(ctx):
+    return {"line_id": _add_product_line(ctx).data["work_order_product_id"]}
+
+
+SCENARIOS = [
+    Scenario(
+        "slot_listing",
+        lambda ctx: ctx.customer.get("/api/customer-slots/"),
+        tags=["appointments"],
+    ),
+    Scenario(
+        "appointment_booking",
+        lambda ctx: ctx.customer.post(
+            "/api/customer-appointments/",
+            {"vehicle_id": ctx.vehicle_id, "service_id": ctx.service_id, "slot_id": ctx.slot_id},
+            format="json",
+        ),
+        expected_status=(201,),
+        tags=["appointments", "write"],
+    ),
+    Scenario(
+        "work_order_full",
+        lambda ctx: ctx.staff.get(f"/api/work-orders/{ctx.work_order_id}/full/"),
+        tags=["work_orders"],
+    ),
+    Scenario(
+        "work_order_product_add",
+        _add_product_line,
+        expected_status=(201,),
+        tags=["work_orders", "write"],
+    ),
+    Scenario(
+        "work_order_bulk_lines",
+        _add_bulk_lines,
+        expected_status=(201,),
+        tags=["work_orders", "write"],
+    ),
+    Scenario(
+        "work_order_product_remove",
+        lambda ctx, line_id: ctx.staff.delete(f"/api/work-order-products/{line_id}/"),
+        prepare=_prepare_product_line,
+        expected_status=(204,),
+        tags=["work_orders", "write"],
+    ),
+    Scenario(
+        "cash_sale",
+        lambda ctx: ctx.staff.post(
+            "/api/cash/movements/",
+            {"cash_session_id": ctx.cash_session_id, "movement_type": "sale",
+             "amount": str(ctx.product_price), "product_id": ctx.product_id, "product_qty": "1",
+             "description": "Venta benchmark"},
+            format="json",
+        ),
+        expected_status=(201,),
+        tags=["cash", "write"],
+    ),
+    Scenario(
+        "cash_ticket",
+        lambda ctx: ctx.staff.post(
+            "/api/cash/movements/ticket/",
+            {"cash_session_id": ctx.cash_session_id, "description": "Ticket benchmark",
+             "items": [{"product_id": pid, "qty": "1"} for pid, _ in ctx.bulk_products[:5]]},
+            format="json",
+        ),
+        expected_status=(201,),
+        tags=["cash", "write"],
+    ),
+    Scenario(
+        "cash_work_orders_summary",
+        lambda ctx: ctx.staff.get("/api/cash/sessions/work-orders-summary/"),
+        tags=["cash"],
+    ),
+    Scenario(
+        "reception_typeahead",
+        lambda ctx: ctx.staff.get("/api/reception/typeahead/", {"q": ctx.vehicle_plate[:3]}),
+        tags=["reception"],
+    ),
+    Scenario(
+        "cash_active_summary",
+        lambda ctx: ctx.staff.get("/api/cash/sessions/active/", {"summary": "1"}),
+        tags=["cash"],
+    ),
+    Scenario(
+        "dashboard_metrics",
+        lambda ctx: ctx.staff.get("/api/dashboard/metrics/"),
+        tags=["dashboard"],
+    ),
+    Scenario(
+        "work_orders_report",
+        lambda ctx: ctx.staff.get(
+            "/api/work-orders/report/", {"date_from": ctx.report_from, "date_to": ctx.report_to}
+        ),
+        tags=["reports"],
+    ),
+    Scenario(
+        "appointments_report",
+        lambda ctx: ctx.staff.get(
+            "/api/appointments/report/", {"date_from": ctx.report_from, "date_to": ctx.report_to}
+        ),
+        tags=["reports"],
+    ),
+    Scenario(
+        "period_closure_preview",
+        lambda ctx: ctx.staff.post(
+            "/api/period-closures/preview/",
+            {"year": ctx.closure_year, "month": ctx.closure_month},
+            format="json",
+        ),
+        tags=["period_closures"],
+    ),
+]
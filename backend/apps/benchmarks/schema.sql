@@ -0,0 +1,268 @@
+-- Esquema base de las tablas que viven en Supabase (modelos managed = False),
+-- tal como existen antes de las migraciones de este repo. Solo para levantar
+-- una base local de benchmarks: run_benchmarks --setup lo aplica y después
+-- corre `migrate`, que agrega índices, triggers y tablas propias del repo
+-- (used_capacity, catalog_version, cash_daily_ledger, export_jobs, ...).
+-- auth_users y las tablas de Django las crean sus propias migraciones.
+
+CREATE SCHEMA IF NOT EXISTS django_app;
+
+CREATE TABLE IF NOT EXISTS public.customers (
+    customer_id           uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id               uuid,
+    full_name             text        NOT NULL,
+    phone                 text,
+    email                 text,
+    notes                 text,
+    password_hash         text,
+    is_active             boolean     NOT NULL DEFAULT true,
+    last_login            timestamptz,
+    password_changed_at   timestamptz,
+    failed_login_attempts integer     NOT NULL DEFAULT 0,
+    locked_until          timestamptz,
+    created_at            timestamptz NOT NULL DEFAULT now(),
+    updated_at            timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS public.vehicles (
+    vehicle_id  uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    customer_id uuid        NOT NULL REFERENCES public.customers (customer_id) ON DELETE CASCADE,
+    plate       text        NOT NULL,
+    make        text,
+    model       text,
+    year        integer,
+    vin         text,
+    color       text,
+    notes       text,
+    image_url   text,
+    created_at  timestamptz NOT NULL DEFAULT now(),
+    updated_at  timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS public.services (
+    service_id        uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    name              text           NOT NULL UNIQUE,
+    description       text,
+    base_price        numeric(12, 2) NOT NULL DEFAULT 0,
+    estimated_minutes integer,
+    requires_lift     boolean        NOT NULL DEFAULT false,
+    is_active         boolean        NOT NULL DEFAULT true,
+    created_at        timestamptz    NOT NULL DEFAULT now(),
+    updated_at        timestamptz    NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS public.service_change_log (
+    log_id        uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    service_id    uuid         NOT NULL REFERENCES public.services (service_id),
+    changed_by_id uuid,
+    changed_at    timestamptz  NOT NULL DEFAULT now(),
+    change_type   varchar(20)  NOT NULL,
+    field_name    varchar(100),
+    old_value     text,
+    new_value     text
+);
+
+CREATE TABLE IF NOT EXISTS public.categories (
+    category_id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    name        text        NOT NULL UNIQUE,
+    description text,
+    created_at  timestamptz NOT NULL DEFAULT now(),
+    updated_at  timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS public.products (
+    product_id            uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    category_id           uuid REFERENCES public.categories (category_id) ON DELETE SET NULL,
+    sku                   text UNIQUE,
+    name                  text           NOT NULL,
+    description           text,
+    image_url             text,
+    unit_price            numeric(12, 2) NOT NULL DEFAULT 0,
+    cost                  numeric(12, 2) NOT NULL DEFAULT 0,
+    stock_qty             numeric(12, 2) NOT NULL DEFAULT 0,
+    base_unit             varchar(50)    NOT NULL DEFAULT 'unidad',
+    secondary_unit        varchar(50),
+    secondary_unit_factor numeric(12, 4),
+    is_active             boolean        NOT NULL DEFAULT true,
+    created_at            timestamptz    NOT NULL DEFAULT now(),
+    updated_at            timestamptz    NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS public.product_change_log (
+    log_id        uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    product_id    uuid         NOT NULL REFERENCES public.products (product_id),
+    changed_by_id uuid,
+    changed_at    timestamptz  NOT NULL DEFAULT now(),
+    change_type   varchar(20)  NOT NULL,
+    field_name    varchar(100),
+    old_value     text,
+    new_value     text
+);
+
+CREATE TABLE IF NOT EXISTS public.appointment_slots (
+    slot_id    uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    start_at   timestamptz NOT NULL,
+    end_at     timestamptz,
+    capacity   integer     NOT NULL,
+    is_active  boolean     NOT NULL DEFAULT true,
+    notes      text,
+    created_at timestamptz NOT NULL DEFAULT now(),
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS public.appointments (
+    appointment_id       uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    customer_id          uuid        NOT NULL REFERENCES public.customers (customer_id) ON DELETE CASCADE,
+    vehicle_id           uuid        NOT NULL REFERENCES public.vehicles (vehicle_id) ON DELETE CASCADE,
+    service_id           uuid        NOT NULL REFERENCES public.services (service_id) ON DELETE RESTRICT,
+    slot_id              uuid REFERENCES public.appointment_slots (slot_id) ON DELETE RESTRICT,
+    scheduled_start      timestamptz NOT NULL,
+    scheduled_end        timestamptz,
+    requested_work       text,
+    status               text        NOT NULL DEFAULT 'scheduled',
+    assigned_mechanic_id uuid,
+    created_by           uuid,
+    notes                text,
+    admin_message        text,
+    progress_percent     integer     NOT NULL DEFAULT 0,
+    created_at           timestamptz NOT NULL DEFAULT now(),
+    updated_at           timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS public.work_orders (
+    work_order_id        uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    appointment_id       uuid REFERENCES public.appointments (appointment_id) ON DELETE SET NULL,
+    customer_id          uuid        NOT NULL REFERENCES public.customers (customer_id) ON DELETE CASCADE,
+    vehicle_id           uuid        NOT NULL REFERENCES public.vehicles (vehicle_id) ON DELETE CASCADE,
+    status               text        NOT NULL DEFAULT 'open',
+    customer_symptoms    text,
+    diagnosis            text,
+    estimated_total      numeric(12, 2),
+    authorization_status text        NOT NULL DEFAULT 'pending',
+    authorized_at        timestamptz,
+    authorized_by        text,
+    assigned_mechanic_id uuid,
+    created_by           uuid,
+    opened_at            timestamptz NOT NULL DEFAULT now(),
+    closed_at            timestamptz,
+    notes                text,
+    created_at           timestamptz NOT NULL DEFAULT now(),
+    updated_at           timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS public.work_order_services (
+    work_order_service_id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    work_order_id         uuid           NOT NULL REFERENCES public.work_orders (work_order_id) ON DELETE CASCADE,
+    service_id            uuid REFERENCES public.services (service_id) ON DELETE SET NULL,
+    description           text,
+    qty                   numeric(12, 2) NOT NULL DEFAULT 1,
+    unit_price            numeric(12, 2) NOT NULL DEFAULT 0,
+    mechanic_id           uuid,
+    status                text           NOT NULL DEFAULT 'pending',
+    started_at            timestamptz,
+    completed_at          timestamptz,
+    created_at            timestamptz    NOT NULL DEFAULT now(),
+    updated_at            timestamptz    NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS public.work_order_products (
+    work_order_product_id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    work_order_id         uuid           NOT NULL REFERENCES public.work_orders (work_order_id) ON DELETE CASCADE,
+    product_id            uuid REFERENCES public.products (product_id) ON DELETE SET NULL,
+    description           text,
+    qty                   numeric(12, 2) NOT NULL DEFAULT 1,
+    unit_price            numeric(12, 2) NOT NULL DEFAULT 0,
+    created_at            timestamptz    NOT NULL DEFAULT now(),
+    updated_at            timestamptz    NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS public.period_closures (
+    closure_id         uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    closure_type       text           NOT NULL DEFAULT 'monthly',
+    period_start       date           NOT NULL,
+    period_end         date           NOT NULL,
+    folio              text           NOT NULL UNIQUE,
+    status             text           NOT NULL DEFAULT 'closed',
+    total_income       numeric(12, 2) NOT NULL DEFAULT 0,
+    total_expenses     numeric(12, 2) NOT NULL DEFAULT 0,
+    total_net          numeric(12, 2) NOT NULL DEFAULT 0,
+    total_sessions     integer        NOT NULL DEFAULT 0,
+    total_movements    integer        NOT NULL DEFAULT 0,
+    cash_discrepancies numeric(12, 2) NOT NULL DEFAULT 0,
+    sales_total        numeric(12, 2) NOT NULL DEFAULT 0,
+    payment_total      numeric(12, 2) NOT NULL DEFAULT 0,
+    withdrawal_total   numeric(12, 2) NOT NULL DEFAULT 0,
+    refund_total       numeric(12, 2) NOT NULL DEFAULT 0,
+    adjustment_total   numeric(12, 2) NOT NULL DEFAULT 0,
+    notes              text,
+    closed_by          uuid,
+    closed_at          timestamptz,
+    reopened_by        uuid,
+    reopened_at        timestamptz,
+    reopen_reason      text,
+    created_at         timestamptz    NOT NULL DEFAULT now(),
+    updated_at         timestamptz    NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS public.period_closure_audit (
+    audit_id     uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    closure_id   uuid        NOT NULL REFERENCES public.period_closures (closure_id) ON DELETE CASCADE,
+    action       text        NOT NULL,
+    performed_by uuid,
+    performed_at timestamptz NOT NULL DEFAULT now(),
+    notes        text
+);
+
+CREATE TABLE IF NOT EXISTS django_app.cash_sessions (
+    cash_session_id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    opened_by       uuid           NOT NULL,
+    opened_at       timestamptz    NOT NULL DEFAULT now(),
+    opening_amount  numeric(12, 2) NOT NULL DEFAULT 0,
+    status          text           NOT NULL DEFAULT 'open',
+    closed_by       uuid,
+    closed_at       timestamptz,
+    created_at      timestamptz    NOT NULL DEFAULT now(),
+    updated_at      timestamptz    NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS django_app.cash_movements (
+    cash_movement_id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    cash_session_id  uuid           NOT NULL REFERENCES django_app.cash_sessions (cash_session_id),
+    movement_type    text           NOT NULL,
+    amount           numeric(12, 2) NOT NULL,
+    work_order_id    uuid,
+    product_id       uuid,
+    product_qty      numeric(12, 2),
+    description      text,
+    created_by       uuid           NOT NULL,
+    created_at       timestamptz    NOT NULL DEFAULT now(),
+    updated_at       timestamptz    NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS django_app.cash_closings (
+    cash_closing_id    uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    cash_session_id    uuid           NOT NULL REFERENCES django_app.cash_sessions (cash_session_id),
+    closing_type       text           NOT NULL,
+    theoretical_amount numeric(12, 2) NOT NULL,
+    actual_amount      numeric(12, 2) NOT NULL,
+    difference         numeric(12, 2) NOT NULL,
+    difference_reason  text,
+    audit_note         text,
+    closed_by          uuid           NOT NULL,
+    closed_at          timestamptz    NOT NULL DEFAULT now(),
+    created_at         timestamptz    NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS django_app.product_movements (
+    movement_id    uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    product_id     uuid           NOT NULL REFERENCES public.products (product_id),
+    movement_type  text           NOT NULL,
+    qty_before     numeric(12, 2) NOT NULL,
+    qty_change     numeric(12, 2) NOT NULL,
+    qty_after      numeric(12, 2) NOT NULL,
+    reason         text,
+    reference_id   uuid,
+    reference_type text,
+    performed_by   uuid,
+    created_at     timestamptz    NOT NULL DEFAULT now()
+);
@@ -0,0 +1,455 @@
+"""
+Generador de carga sintética de un taller (manage.py seed_workload).
+
+A diferencia de dataset.py (datos chicos generados en SQL para los
+benchmarks), este genera años de operación día por día, en orden
+cronológico, con random.Random(seed): misma semilla y escala → mismos datos
+(incluidos los UUID).
+
+Modelo de un día hábil (domingos cerrado):
+- volumen = base × escala × día de semana × mes × tendencia anual, con ruido;
+  las horas siguen la curva del taller (picos 8–10 h y 14–15 h).
+- ~75% de las OTs vienen de una cita en el slot de esa hora (si hay cupo);
+  además hay citas canceladas. Cada OT tiene 1–3 servicios y 0–6 productos.
+- las OTs se cobran el mismo día (movimiento 'payment' en la sesión de caja
+  del día); las de los últimos días quedan abiertas. ~4% se cancelan.
+- ventas directas de mostrador (un movimiento por producto) y retiros.
+- una sesión de caja por día con su cierre final (diferencias ocasionales).
+
+El stock se lleva en memoria: los consumos del día (líneas de OT y ventas de
+mostrador) se juntan y se aplican ordenados por hora, así cada
+product_movement encadena qty_before/qty_after en orden cronológico; si no
+alcanza, antes se registra una compra de reposición. Los movimientos de un
+mismo producto nunca comparten created_at (se corren un segundo si hace
+falta). Al final products.stock_qty = último qty_after.
+
+Las filas se cargan con COPY en lotes mensuales, respetando el orden de las FK.
+"""
+import math
+import random
+import uuid
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import connection
+
+from apps.appointments.booking import resync_used_capacity
+from apps.cash_register.ledger import rebuild_ledger
+from apps.common.dates import business_today
+from apps.work_orders.totals import rebuild_totals
+
+BASE_WORK_ORDERS_PER_DAY = 20
+WEEKDAY_FACTOR = [1.15, 1.0, 0.95, 1.0, 1.2, 0.7, 0.0]  # lunes..domingo
+MONTH_FACTOR = {1: 0.85, 4: 0.9, 7: 1.05, 11: 1.05, 12: 1.25}  # enero flojo, Semana Santa, aguinaldo
+YEARLY_GROWTH = 0.08
+HOUR_WEIGHTS = {7: 0.6, 8: 1.4, 9: 1.3, 10: 1.1, 11: 0.9, 12: 0.5, 13: 0.9, 14: 1.0, 15: 0.9, 16: 0.6}
+OPEN_DAYS_TAIL = 3        # las OTs de los últimos días quedan sin cerrar
+APPOINTMENT_SHARE = 0.75
+CANCELLED_APPOINTMENTS = 0.08
+CANCELLED_WORK_ORDERS = 0.04
+DIRECT_SALES_SHARE = 0.6  # ventas de mostrador por OT
+OPENING_AMOUNT = Decimal("50000.00")
+CENT = Decimal("0.01")
+
+# Columnas por tabla, en el orden en que se escriben las filas (y en que se hace COPY)
+TABLES = {
+    "public.services": (
+        "service_id", "name", "base_price", "estimated_minutes", "requires_lift", "is_active",
+        "created_at", "updated_at",
+    ),
+    "public.categories": ("category_id", "name", "created_at", "updated_at"),
+    "public.products": (
+        "product_id", "category_id", "sku", "name", "unit_price", "cost", "stock_qty",
+        "base_unit", "secondary_unit", "secondary_unit_factor", "is_active", "created_at", "updated_at",
+    ),
+    "public.customers": ("customer_id", "full_name", "phone", "email", "is_active", "created_at", "updated_at"),
+    "public.vehicles": (
+        "vehicle_id", "customer_id", "plate", "make", "model", "year", "created_at", "updated_at",
+    ),
+    "public.appointment_slots": (
+        "slot_id", "start_at", "end_at", "capacity", "used_capacity", "is_active", "created_at", "updated_at",
+    ),
+    "public.appointments": (
+        "appointment_id", "customer_id", "vehicle_id", "service_id", "slot_id", "scheduled_start",
+        "scheduled_end", "status", "progress_percent", "created_at", "updated_at",
+    ),
+    "public.work_orders": (
+        "work_order_id", "appointment_id", "customer_id", "vehicle_id", "status", "customer_symptoms",
+        "estimated_total", "authorization_status", "assigned_mechanic_id", "opened_at", "closed_at",
+        "created_at", "updated_at",
+    ),
+    "public.work_order_services": (
+        "work_order_service_id", "work_order_id", "service_id", "qty", "unit_price", "mechanic_id",
+        "status", "started_at", "completed_at", "created_at", "updated_at",
+    ),
+    "public.work_order_products": (
+        "work_order_product_id", "work_order_id", "product_id", "qty", "unit_price", "created_at", "updated_at",
+    ),
+    "django_app.cash_sessions": (
+        "cash_session_id", "opened_by", "opened_at", "opening_amount", "status", "closed_by", "closed_at",
+        "created_at", "updated_at",
+    ),
+    "django_app.cash_movements": (
+        "cash_movement_id", "cash_session_id", "movement_type", "amount", "work_order_id", "product_id",
+        "product_qty", "description", "created_by", "created_at", "updated_at",
+    ),
+    "django_app.cash_closings": (
+        "cash_closing_id", "cash_session_id", "closing_type", "theoretical_amount", "actual_amount",
+        "difference", "closed_by", "closed_at", "created_at",
+    ),
+    "django_app.product_movements": (
+        "movement_id", "product_id", "movement_type", "qty_before", "qty_change", "qty_after", "reason",
+        "reference_id", "reference_type", "performed_by", "created_at",
+    ),
+}
+
+MAKES = {
+    "Toyota": ["Corolla", "Hilux", "RAV4", "Yaris"],
+    "Hyundai": ["Accent", "Tucson", "Elantra"],
+    "Nissan": ["Sentra", "Frontier", "X-Trail"],
+    "Honda": ["Civic", "CR-V", "Fit"],
+    "Suzuki": ["Vitara", "Swift", "Jimny"],
+    "Mitsubishi": ["L200", "Montero", "ASX"],
+}
+SERVICE_NAMES = [
+    "Cambio de aceite", "Cambio de filtros", "Alineado y balanceo", "Revisión de frenos",
+    "Diagnóstico general", "Cambio de batería", "Limpieza de inyectores", "Cambio de refrigerante",
+    "Revisión de suspensión", "Afinado", "Cambio de pastillas", "Revisión eléctrica",
+]
+PRODUCT_FAMILIES = [
+    ("Aceite 5W-30", "litro", "galón", Decimal("3.7854")), ("Aceite 20W-50", "litro", "galón", Decimal("3.7854")),
+    ("Filtro de aceite", "unidad", None, None), ("Filtro de aire", "unidad", None, None),
+    ("Bujía", "unidad", None, None), ("Pastillas de freno", "juego", None, None),
+    ("Refrigerante", "litro", "galón", Decimal("3.7854")), ("Batería", "unidad", None, None),
+    ("Escobilla", "unidad", None, None), ("Grasa", "unidad", None, None),
+]
+FIRST_NAMES = ["Ana", "Luis", "María", "José", "Carlos", "Laura", "Andrés", "Sofía", "Diego", "Valeria", "Jorge", "Daniela"]
+LAST_NAMES = ["Mora", "Rojas", "Vargas", "Jiménez", "Solano", "Araya", "Quesada", "Castro", "Chaves", "Brenes", "Alfaro"]
+SYMPTOMS = ["Mantenimiento preventivo", "Ruido al frenar", "Luz de motor encendida", "Vibración", None]
+
+
+def _money(value: float) -> Decimal:
+    return Decimal(str(round(value, 2))).quantize(CENT)
+
+
+class WorkloadGenerator:
+    def __init__(self, scale: float = 1.0, years: float = 2.0, seed: int = 42, end: date = None,
+                 batch_days: int = 31, stdout=None):
+        self.scale = scale
+        self.years = years
+        self.rng = random.Random(seed)
+        self.tz = ZoneInfo(settings.TIME_ZONE)
+        self.end = end or business_today() - timedelta(days=1)
+        self.start = self.end - timedelta(days=int(365 * years))
+        self.batch_days = batch_days
+        self.stdout = stdout
+        self.counts = {table: 0 for table in TABLES}
+        self._last_movement_at = {}
+        self._rows = {table: [] for table in TABLES}
+        self.staff_id = self._uuid()
+        self.mechanics = [self._uuid() for _ in range(max(3, round(4 * math.sqrt(scale))))]
+
+    # ── utilidades ────────────────────────────────────────────────────────────
+
+    def _uuid(self) -> uuid.UUID:
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def _at(self, day: date, hour: float) -> datetime:
+        minutes = int(hour * 60)
+        return datetime.combine(day, time(minutes // 60, minutes % 60), tzinfo=self.tz)
+
+    def _count(self, mean: float) -> int:
+        if mean <= 0:
+            return 0
+        return max(0, round(self.rng.gauss(mean, math.sqrt(mean))))
+
+    def _add(self, table: str, row: tuple) -> None:
+        self._rows[table].append(row)
+
+    def flush(self) -> None:
+        with connection.cursor() as cursor:
+            for table, columns in TABLES.items():
+                rows = self._rows[table]
+                if not rows:
+                    continue
+                with cursor.cursor.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+                    for row in rows:
+                        copy.write_row(row)
+                self.counts[table] += len(rows)
+                self._rows[table] = []
+
+    # ── catálogo y clientes ───────────────────────────────────────────────────
+
+    def _expected_work_orders(self) -> float:
+        days = (self.end - self.start).days
+        return BASE_WORK_ORDERS_PER_DAY * self.scale * days * 6 / 7
+
+    def seed_reference_data(self) -> None:
+        created = self._at(self.start - timedelta(days=30), 8)
+
+        self.services = []
+        for i, name in enumerate(SERVICE_NAMES):
+            service_id = self._uuid()
+            price = _money(8000 + self.rng.random() * 40000)
+            self.services.append((service_id, price))
+            self._add("public.services", (service_id, name, price, 30 + (i % 4) * 30, i % 3 == 0, True, created, created))
+
+        categories = []
+        for name in ["Lubricantes", "Filtros", "Encendido", "Frenos", "Refrigeración", "Eléctrico", "Accesorios"]:
+            category_id = self._uuid()
+            categories.append(category_id)
+            self._add("public.categories", (category_id, name, created, created))
+
+        # Productos: el stock arranca en 0 y se carga con una compra inicial
+        self.products = []
+        self.stock = {}
+        n_products = max(60, round(150 * math.sqrt(self.scale)))
+        for i in range(n_products):
+            family, unit, secondary, factor = PRODUCT_FAMILIES[i % len(PRODUCT_FAMILIES)]
+            product_id = self._uuid()
+            price = _money(1500 + self.rng.random() * 45000)
+            self.products.append((product_id, price))
+            self.stock[product_id] = Decimal("0")
+            self._add("public.products", (
+                product_id, categories[i % len(categories)], f"SKU-{i + 1:06d}", f"{family} #{i + 1}",
+                price, _money(float(price) * 0.6), Decimal("0"), unit, secondary, factor, True, created, created,
+            ))
+        # Popularidad tipo Zipf: pocos productos concentran la mayoría del consumo
+        self.product_weights = [1 / (rank + 1) for rank in range(n_products)]
+
+        for product_id, _ in self.products:
+            self._restock(product_id, created, self.rng.randint(20, 200))
+
+        self.vehicles = []
+        n_customers = max(50, round(self._expected_work_orders() / 4))
+        makes = list(MAKES)
+        for i in range(n_customers):
+            customer_id = self._uuid()
+            name = f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+            since = self._at(self.start - timedelta(days=self.rng.randint(0, 365)), 9)
+            self._add("public.customers", (
+                customer_id, name, f"8{i:07d}", f"cliente{i + 1}@example.invalid", True, since, since,
+            ))
+            for _ in range(1 if self.rng.random() < 0.8 else 2):
+                make = self.rng.choice(makes)
+                vehicle_id = self._uuid()
+                self.vehicles.append((vehicle_id, customer_id))
+                self._add("public.vehicles", (
+                    vehicle_id, customer_id, f"{self.rng.choice('BCDFGHJKLMNPRSTV')}{len(self.vehicles):06d}",
+                    make, self.rng.choice(MAKES[make]), self.rng.randint(1998, self.end.year), since, since,
+                ))
+        self.flush()
+
+    # ── stock ─────────────────────────────────────────────────────────────────
+
+    def _movement_at(self, product_id, at: datetime) -> datetime:
+        """Hora del movimiento, estrictamente posterior al anterior del producto."""
+        last = self._last_movement_at.get(product_id)
+        if last is not None and at <= last:
+            at = last + timedelta(seconds=1)
+        self._last_movement_at[product_id] = at
+        return at
+
+    def _restock(self, product_id, at: datetime, qty: int) -> None:
+        at = self._movement_at(product_id, at)
+        before = self.stock[product_id]
+        after = before + qty
+        self.stock[product_id] = after
+        self._add("django_app.product_movements", (
+            self._uuid(), product_id, "purchase", before, Decimal(qty), after, "Compra a proveedor",
+            None, None, self.staff_id, at,
+        ))
+
+    def _consume(self, product_id, qty: Decimal, at: datetime, movement_type: str, reference_id, reference_type):
+        if self.stock[product_id] < qty:
+            self._restock(product_id, at - timedelta(minutes=5), self.rng.randint(50, 300))
+        at = self._movement_at(product_id, at)
+        before = self.stock[product_id]
+        after = before - qty
+        self.stock[product_id] = after
+        self._add("django_app.product_movements", (
+            self._uuid(), product_id, movement_type, before, -qty, after,
+            "Línea OT" if movement_type == "work_order" else "Venta directa",
+            reference_id, reference_type, self.staff_id, at,
+        ))
+
+    # ── un día de operación ───────────────────────────────────────────────────
+
+    def _day_mean(self, day: date) -> float:
+        years_in = (day - self.start).days / 365
+        return (BASE_WORK_ORDERS_PER_DAY * self.scale * WEEKDAY_FACTOR[day.weekday()]
+                * MONTH_FACTOR.get(day.month, 1.0) * (1 + YEARLY_GROWTH) ** years_in)
+
+    def _hour(self) -> int:
+        return self.rng.choices(list(HOUR_WEIGHTS), weights=list(HOUR_WEIGHTS.values()))[0]
+
+    def seed_day(self, day: date) -> None:
+        mean = self._day_mean(day)
+        if mean <= 0:
+            return
+        recent = (self.end - day).days < OPEN_DAYS_TAIL
+
+        # Slots de la agenda (uno por hora) y sesión de caja del día
+        capacity = max(2, math.ceil(mean * APPOINTMENT_SHARE * max(HOUR_WEIGHTS.values()) / sum(HOUR_WEIGHTS.values()) * 1.3))
+        slots = {}
+        created = self._at(day - timedelta(days=14), 9)
+        for hour in HOUR_WEIGHTS:
+            slots[hour] = [self._uuid(), self._at(day, hour), 0]
+
+        session_id = self._uuid()
+        opened_at, closed_at = self._at(day, 6.75), self._at(day, 17.5)
+        session_total = Decimal("0")
+        cash_rows = []
+        stock_events = []  # consumos del día; se aplican en orden de hora al final
+
+        def cash(movement_type, amount, at, work_order_id=None, product_id=None, qty=None, description=None):
+            nonlocal session_total
+            movement_id = self._uuid()
+            session_total += amount
+            cash_rows.append((
+                movement_id, session_id, movement_type, amount, work_order_id, product_id, qty,
+                description, self.staff_id, at, at,
+            ))
+            return movement_id
+
+        def book(hour, vehicle, status):
+            slot = slots[hour]
+            slot_id = None
+            if slot[2] < capacity:
+                slot_id = slot[0]
+                if status != "cancelled":
+                    slot[2] += 1
+            appointment_id = self._uuid()
+            start = slot[1]
+            service_id = self.rng.choice(self.services)[0]
+            self._add("public.appointments", (
+                appointment_id, vehicle[1], vehicle[0], service_id, slot_id, start, start + timedelta(hours=1),
+                status, 100 if status == "completed" else 0, start - timedelta(days=self.rng.randint(1, 10)), start,
+            ))
+            return appointment_id
+
+        for _ in range(self._count(mean * CANCELLED_APPOINTMENTS)):
+            book(self._hour(), self.rng.choice(self.vehicles), "cancelled")
+
+        for _ in range(self._count(mean)):
+            hour = self._hour()
+            vehicle = self.rng.choice(self.vehicles)
+            opened = self._at(day, hour + self.rng.random() * 0.5)
+            appointment_id = None
+            if self.rng.random() < APPOINTMENT_SHARE:
+                appointment_id = book(hour, vehicle, "completed" if not recent else "in_progress")
+
+            cancelled = self.rng.random() < CANCELLED_WORK_ORDERS
+            if cancelled:
+                status = "cancelled"
+            elif recent:
+                status = self.rng.choice(["open", "in_progress", "ready", "completed"])
+            else:
+                status = "closed"
+            done_at = min(opened + timedelta(hours=1 + self.rng.random() * 4), closed_at - timedelta(minutes=10))
+            mechanic = self.rng.choice(self.mechanics)
+            work_order_id = self._uuid()
+            total = Decimal("0")
+
+            for _ in range(self.rng.choices([1, 2, 3], weights=[0.5, 0.35, 0.15])[0]):
+                service_id, price = self.rng.choice(self.services)
+                total += price
+                finished = status in ("closed", "completed")
+                self._add("public.work_order_services", (
+                    self._uuid(), work_order_id, service_id, Decimal("1.00"), price, mechanic,
+                    "completed" if finished else ("cancelled" if cancelled else "pending"),
+                    opened if finished else None, done_at if finished else None, opened, opened,
+                ))
+
+            lines = [] if cancelled else self.rng.choices(
+                self.products, weights=self.product_weights, k=self.rng.choices(range(7), weights=[1, 2, 3, 3, 2, 1, 1])[0]
+            )
+            for product_id, price in lines:
+                qty = Decimal(self.rng.choice([1, 1, 1, 2, 4]))
+                total += price * qty
+                line_id = self._uuid()
+                self._add("public.work_order_products", (line_id, work_order_id, product_id, qty, price, opened, opened))
+                stock_events.append((opened, product_id, qty, "work_order", line_id, "work_order_product"))
+
+            self._add("public.work_orders", (
+                work_order_id, appointment_id, vehicle[1], vehicle[0], status, self.rng.choice(SYMPTOMS),
+                total, "approved" if not cancelled else "rejected", mechanic, opened,
+                done_at if status in ("closed", "cancelled") else None, opened, done_at,
+            ))
+            if status == "closed" and total > 0:
+                cash("payment", total, done_at, work_order_id=work_order_id, description="Cobro OT")
+
+        # Mostrador: un movimiento por producto vendido
+        for _ in range(self._count(mean * DIRECT_SALES_SHARE)):
+            product_id, price = self.rng.choices(self.products, weights=self.product_weights)[0]
+            qty = Decimal(self.rng.choice([1, 1, 2]))
+            at = self._at(day, self._hour() + self.rng.random())
+            movement_id = cash("sale", price * qty, at, product_id=product_id, qty=qty, description="Venta directa")
+            stock_events.append((at, product_id, qty, "sale", movement_id, "cash_movement"))
+
+        for event in sorted(stock_events, key=lambda e: e[0]):
+            self._consume(*event)
+
+        for _ in range(self.rng.choice([0, 0, 1, 2])):
+            amount = -_money(5000 + self.rng.random() * 45000)
+            cash("withdrawal", amount, self._at(day, 12 + self.rng.random() * 4), description="Retiro")
+
+        for slot_id, start, used in slots.values():
+            self._add("public.appointment_slots", (
+                slot_id, start, start + timedelta(hours=1), capacity, used, True, created, created,
+            ))
+
+        self._add("django_app.cash_sessions", (
+            session_id, self.staff_id, opened_at, OPENING_AMOUNT, "closed", self.staff_id, closed_at,
+            opened_at, closed_at,
+        ))
+        for row in cash_rows:
+            self._add("django_app.cash_movements", row)
+        theoretical = OPENING_AMOUNT + session_total
+        difference = Decimal("0")
+        if self.rng.random() < 0.05:
+            difference = _money(self.rng.choice([-1, 1]) * (500 + self.rng.random() * 4500))
+        self._add("django_app.cash_closings", (
+            self._uuid(), session_id, "final", theoretical, theoretical + difference, difference,
+            self.staff_id, closed_at, closed_at,
+        ))
+
+    # ── orquestación ──────────────────────────────────────────────────────────
+
+    def run(self) -> dict:
+        self.seed_reference_data()
+        day = self.start
+        batch_start = day
+        while day <= self.end:
+            self.seed_day(day)
+            day += timedelta(days=1)
+            if (day - batch_start).days >= self.batch_days or day > self.end:
+                self.flush()
+                batch_start = day
+                if self.stdout:
+                    self.stdout.write(f"  {day - timedelta(days=1)}: {sum(self.counts.values()):,} filas")
+        self._finish()
+        return self.counts
+
+    def _finish(self) -> None:
+        """Stock final por producto, libro diario de caja, totales de OTs, cupos de slots y estadísticas."""
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS seed_stock")
+            cursor.execute("CREATE TEMP TABLE seed_stock (product_id uuid PRIMARY KEY, qty numeric(12, 2))")
+            with cursor.cursor.copy("COPY seed_stock (product_id, qty) FROM STDIN") as copy:
+                for product_id, qty in self.stock.items():
+                    copy.write_row((product_id, qty))
+            cursor.execute(
+                """
+                UPDATE public.products p SET stock_qty = s.qty
+                FROM seed_stock s WHERE s.product_id = p.product_id
+                """
+            )
+            cursor.execute("DROP TABLE seed_stock")
+        rebuild_ledger()
+        rebuild_totals()
+        resync_used_capacity()
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
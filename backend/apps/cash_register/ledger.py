@@ -0,0 +1,346 @@
+"""
+Libro diario pre-agregado de caja (django_app.cash_daily_ledger).
+
+Una fila por (business_date, cash_session_id, movement_type) con conteo y
+montos acumulados. Se mantiene con deltas en la misma transacción que escribe
+el movimiento o el cierre, así que cierres de periodo y gráficos del dashboard
+suman unas pocas filas por día en lugar de recorrer cash_movements.
+
+- business_date: día de negocio (TIME_ZONE) en que ocurrió el movimiento/cierre.
+- session_date:  día de negocio en que se abrió la sesión; los cierres de
+  periodo agrupan por esta fecha (igual que antes, por sesión).
+
+Filas sintéticas:
+- SESSION_ROW: una por sesión (para contar sesiones sin recorrer cash_sessions).
+- CLOSING_ROW: cierres de la sesión; amount_total = suma de difference.
+
+Saldo acumulado por sesión: record_movement/unrecord_movement también suman
+el delta a cash_sessions (movements_total, income_total, expense_total,
+movement_count), así el saldo teórico de un cierre y el resumen de la caja
+activa se leen de una fila en lugar de recorrer los movimientos. Cada delta
+también sube cash_sessions.revision en la cantidad de movimientos tocados
+(una edición = unrecord + record = 2), que el cliente incremental compara con
+las filas nuevas que recibió para detectar ediciones y borrados.
+
+rebuild_ledger() / diff_ledger() / diff_session_balances() recalculan desde los
+datos crudos (ver management command reconcile_cash_ledger).
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection
+
+from apps.authentication.metrics import invalidate_dashboard
+
+SESSION_ROW = "_session"
+CLOSING_ROW = "_closing"
+SYNTHETIC_ROWS = (SESSION_ROW, CLOSING_ROW)
+
+PERIOD_TYPES = ("sale", "payment", "withdrawal", "refund", "adjustment")
+
+
+def _apply_delta(cash_session_id, movement_type: str, at, count: int, amount: Decimal,
+                 income: Decimal, expense: Decimal) -> None:
+    """Suma un delta a la fila del día; la crea si no existe. at=None usa opened_at de la sesión."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO django_app.cash_daily_ledger AS l
+              (business_date, cash_session_id, session_date, movement_type,
+               movement_count, amount_total, income_total, expense_total, updated_at)
+            SELECT
+              (coalesce(%s, cs.opened_at) AT TIME ZONE %s)::date,
+              cs.cash_session_id,
+              (cs.opened_at AT TIME ZONE %s)::date,
+              %s, %s, %s, %s, %s, now()
+            FROM django_app.cash_sessions cs
+            WHERE cs.cash_session_id = %s
+            ON CONFLICT (business_date, cash_session_id, movement_type) DO UPDATE SET
+              movement_count = l.movement_count + excluded.movement_count,
+              amount_total   = l.amount_total   + excluded.amount_total,
+              income_total   = l.income_total   + excluded.income_total,
+              expense_total  = l.expense_total  + excluded.expense_total,
+              updated_at     = now()
+            """,
+            [
+                at, settings.TIME_ZONE, settings.TIME_ZONE,
+                movement_type, count, str(amount), str(income), str(expense),
+                str(cash_session_id),
+            ],
+        )
+    invalidate_dashboard()
+
+
+def _split(amount) -> tuple:
+    amount = Decimal(str(amount or 0))
+    return amount, max(amount, Decimal("0")), max(-amount, Decimal("0"))
+
+
+def record_session(cash_session_id) -> None:
+    """Registra la apertura de una sesión."""
+    zero = Decimal("0")
+    _apply_delta(cash_session_id, SESSION_ROW, None, 1, zero, zero, zero)
+
+
+def _apply_session_delta(cash_session_id, count: int, amount: Decimal, income: Decimal, expense: Decimal) -> None:
+    """Suma un delta al saldo acumulado de la sesión y sube su revisión."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            UPDATE django_app.cash_sessions
+            SET movements_total = movements_total + %s,
+                income_total    = income_total + %s,
+                expense_total   = expense_total + %s,
+                movement_count  = movement_count + %s,
+                revision        = revision + %s
+            WHERE cash_session_id = %s
+            """,
+            [str(amount), str(income), str(expense), count, max(abs(count), 1), str(cash_session_id)],
+        )
+
+
+def record_movement(cash_session_id, movement_type: str, amount, created_at) -> None:
+    """Suma un movimiento de caja al libro y al saldo de la sesión."""
+    amount, income, expense = _split(amount)
+    _apply_delta(cash_session_id, movement_type, created_at, 1, amount, income, expense)
+    _apply_session_delta(cash_session_id, 1, amount, income, expense)
+
+
+def record_movements(cash_session_id, movement_type: str, amounts: list, created_at) -> None:
+    """
+    Suma varios movimientos del mismo tipo y momento (ej: un ticket de venta)
+    con un solo delta al libro y a la sesión.
+    """
+    if not amounts:
+        return
+    amount = income = expense = Decimal("0")
+    for value in amounts:
+        a, i, e = _split(value)
+        amount, income, expense = amount + a, income + i, expense + e
+    _apply_delta(cash_session_id, movement_type, created_at, len(amounts), amount, income, expense)
+    _apply_session_delta(cash_session_id, len(amounts), amount, income, expense)
+
+
+def unrecord_movement(cash_session_id, movement_type: str, amount, created_at) -> None:
+    """Resta un movimiento (borrado, o valores previos antes de una edición)."""
+    amount, income, expense = _split(amount)
+    _apply_delta(cash_session_id, movement_type, created_at, -1, -amount, -income, -expense)
+    _apply_session_delta(cash_session_id, -1, -amount, -income, -expense)
+
+
+def record_closing(cash_session_id, difference, closed_at) -> None:
+    """Suma un cierre (normal, forzado o intermedio) y su diferencia."""
+    zero = Decimal("0")
+    _apply_delta(cash_session_id, CLOSING_ROW, closed_at, 1, Decimal(str(difference or 0)), zero, zero)
+
+
+def summarize_period(period_start, period_end) -> dict:
+    """
+    Totales de las sesiones abiertas entre period_start y period_end (días de
+    negocio, inclusivos), con las mismas claves que usa period_closures.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT movement_type,
+                   SUM(movement_count), SUM(amount_total), SUM(income_total), SUM(expense_total)
+            FROM django_app.cash_daily_ledger
+            WHERE session_date >= %s AND session_date <= %s
+            GROUP BY movement_type
+            """,
+            [period_start, period_end],
+        )
+        rows = cursor.fetchall()
+
+    by_type = {}
+    sessions = movements = 0
+    income = expenses = discrepancies = Decimal("0")
+    for movement_type, count, amount, inc, exp in rows:
+        amount = Decimal(str(amount or 0))
+        if movement_type == SESSION_ROW:
+            sessions = int(count or 0)
+        elif movement_type == CLOSING_ROW:
+            discrepancies = amount
+        else:
+            movements += int(count or 0)
+            income += Decimal(str(inc or 0))
+            expenses += Decimal(str(exp or 0))
+            by_type[movement_type] = amount
+
+    result = {
+        "total_sessions": sessions,
+        "total_movements": movements,
+        "total_income": income,
+        "total_expenses": expenses,
+        "total_net": income - expenses,
+        "cash_discrepancies": discrepancies,
+    }
+    for movement_type in PERIOD_TYPES:
+        key = "sales_total" if movement_type == "sale" else f"{movement_type}_total"
+        result[key] = by_type.get(movement_type, Decimal("0"))
+    return result
+
+
+# ── Reconciliación ─────────────────────────────────────────────────────────────
+
+_RAW_LEDGER_SQL = """
+    SELECT (cm.created_at AT TIME ZONE %(tz)s)::date AS business_date,
+           cs.cash_session_id,
+           (cs.opened_at AT TIME ZONE %(tz)s)::date AS session_date,
+           cm.movement_type,
+           COUNT(*) AS movement_count,
+           SUM(cm.amount) AS amount_total,
+           SUM(CASE WHEN cm.amount > 0 THEN cm.amount ELSE 0 END) AS income_total,
+           SUM(CASE WHEN cm.amount < 0 THEN -cm.amount ELSE 0 END) AS expense_total
+    FROM django_app.cash_movements cm
+    JOIN django_app.cash_sessions cs ON cs.cash_session_id = cm.cash_session_id
+    GROUP BY 1, 2, 3, 4
+    UNION ALL
+    SELECT (cc.closed_at AT TIME ZONE %(tz)s)::date, cs.cash_session_id,
+           (cs.opened_at AT TIME ZONE %(tz)s)::date, '_closing',
+           COUNT(*), SUM(cc.difference), 0, 0
+    FROM django_app.cash_closings cc
+    JOIN django_app.cash_sessions cs ON cs.cash_session_id = cc.cash_session_id
+    GROUP BY 1, 2, 3
+    UNION ALL
+    SELECT (cs.opened_at AT TIME ZONE %(tz)s)::date, cs.cash_session_id,
+           (cs.opened_at AT TIME ZONE %(tz)s)::date, '_session',
+           1, 0, 0, 0
+    FROM django_app.cash_sessions cs
+"""
+
+
+def diff_ledger() -> list:
+    """
+    Compara el libro contra los datos crudos. Retorna una lista de dicts con
+    las filas que difieren (ledger_* = libro, raw_* = recalculado).
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH raw AS ({_RAW_LEDGER_SQL})
+            SELECT coalesce(l.business_date, r.business_date),
+                   coalesce(l.cash_session_id, r.cash_session_id)::text,
+                   coalesce(l.movement_type, r.movement_type),
+                   l.movement_count, r.movement_count,
+                   l.amount_total, r.amount_total
+            FROM django_app.cash_daily_ledger l
+            FULL OUTER JOIN raw r
+              ON r.business_date = l.business_date
+             AND r.cash_session_id = l.cash_session_id
+             AND r.movement_type = l.movement_type
+            WHERE l.cash_session_id IS NULL
+               OR (r.cash_session_id IS NULL AND (l.movement_count <> 0 OR l.amount_total <> 0))
+               OR l.movement_count <> r.movement_count
+               OR l.amount_total <> r.amount_total
+               OR l.income_total <> r.income_total
+               OR l.expense_total <> r.expense_total
+               OR l.session_date <> r.session_date
+            ORDER BY 1, 2, 3
+            """,
+            {"tz": settings.TIME_ZONE},
+        )
+        return [
+            {
+                "business_date": str(row[0]),
+                "cash_session_id": row[1],
+                "movement_type": row[2],
+                "ledger_count": row[3],
+                "raw_count": row[4],
+                "ledger_amount": str(row[5]) if row[5] is not None else None,
+                "raw_amount": str(row[6]) if row[6] is not None else None,
+            }
+            for row in cursor.fetchall()
+        ]
+
+
+def rebuild_ledger() -> int:
+    """
+    Reconstruye el libro completo y el saldo de las sesiones desde los datos
+    crudos. Retorna filas insertadas en el libro.
+    """
+    rebuild_session_balances()
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM django_app.cash_daily_ledger")
+        cursor.execute(
+            f"""
+            INSERT INTO django_app.cash_daily_ledger
+              (business_date, cash_session_id, session_date, movement_type,
+               movement_count, amount_total, income_total, expense_total, updated_at)
+            SELECT business_date, cash_session_id, session_date, movement_type,
+                   movement_count, amount_total, income_total, expense_total, now()
+            FROM ({_RAW_LEDGER_SQL}) raw
+            """,
+            {"tz": settings.TIME_ZONE},
+        )
+        return cursor.rowcount
+
+
+_RAW_SESSION_BALANCES_SQL = """
+    SELECT cs.cash_session_id,
+           coalesce(m.amount_total, 0)   AS movements_total,
+           coalesce(m.income_total, 0)   AS income_total,
+           coalesce(m.expense_total, 0)  AS expense_total,
+           coalesce(m.movement_count, 0) AS movement_count
+    FROM django_app.cash_sessions cs
+    LEFT JOIN (
+        SELECT cash_session_id,
+               SUM(amount) AS amount_total,
+               SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END) AS income_total,
+               SUM(CASE WHEN amount < 0 THEN -amount ELSE 0 END) AS expense_total,
+               COUNT(*) AS movement_count
+        FROM django_app.cash_movements
+        GROUP BY cash_session_id
+    ) m ON m.cash_session_id = cs.cash_session_id
+"""
+
+
+def diff_session_balances() -> list:
+    """Sesiones cuyo saldo acumulado no coincide con sus movimientos."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT cs.cash_session_id::text,
+                   cs.movement_count, r.movement_count,
+                   cs.movements_total, r.movements_total
+            FROM django_app.cash_sessions cs
+            JOIN ({_RAW_SESSION_BALANCES_SQL}) r ON r.cash_session_id = cs.cash_session_id
+            WHERE cs.movement_count  <> r.movement_count
+               OR cs.movements_total <> r.movements_total
+               OR cs.income_total    <> r.income_total
+               OR cs.expense_total   <> r.expense_total
+            ORDER BY cs.opened_at
+            """
+        )
+        return [
+            {
+                "cash_session_id": row[0],
+                "stored_count": row[1],
+                "raw_count": row[2],
+                "stored_amount": str(row[3]),
+                "raw_amount": str(row[4]),
+            }
+            for row in cursor.fetchall()
+        ]
+
+
+def rebuild_session_balances() -> int:
+    """Recalcula el saldo acumulado de todas las sesiones. Retorna las sesiones corregidas."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE django_app.cash_sessions cs
+            SET movements_total = r.movements_total,
+                income_total    = r.income_total,
+                expense_total   = r.expense_total,
+                movement_count  = r.movement_count,
+                revision        = cs.revision + 1
+            FROM ({_RAW_SESSION_BALANCES_SQL}) r
+            WHERE r.cash_session_id = cs.cash_session_id
+              AND (cs.movement_count  <> r.movement_count
+                OR cs.movements_total <> r.movements_total
+                OR cs.income_total    <> r.income_total
+                OR cs.expense_total   <> r.expense_total)
+            """
+        )
+        return cursor.rowcount
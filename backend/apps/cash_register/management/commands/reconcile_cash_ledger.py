@@ -0,0 +1,72 @@
+"""
+Reconciliación del libro diario de caja (django_app.cash_daily_ledger).
+
+Uso:
+    python manage.py reconcile_cash_ledger            # solo reporta diferencias
+    python manage.py reconcile_cash_ledger --rebuild  # reconstruye y vuelve a comparar
+
+Compara cada fila del libro contra lo recalculado desde cash_movements,
+cash_closings y cash_sessions, y el saldo acumulado de cada sesión contra sus
+movimientos.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.cash_register.ledger import diff_ledger, diff_session_balances, rebuild_ledger
+
+
+class Command(BaseCommand):
+    help = "Compara (y opcionalmente reconstruye) el libro diario de caja contra los datos crudos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true", help="Reconstruir el libro desde los datos crudos")
+        parser.add_argument("--limit", type=int, default=50, help="Máximo de diferencias a mostrar")
+
+    def handle(self, *args, **options):
+        diffs = diff_ledger()
+        balances = diff_session_balances()
+        self._report(diffs, options["limit"])
+        self._report_balances(balances, options["limit"])
+
+        if not options["rebuild"]:
+            if diffs or balances:
+                raise CommandError(
+                    f"{len(diffs)} fila(s) del libro y {len(balances)} saldo(s) de sesión no coinciden. "
+                    "Use --rebuild para corregir."
+                )
+            return
+
+        with transaction.atomic():
+            inserted = rebuild_ledger()
+        self.stdout.write(f"Libro reconstruido: {inserted} fila(s).")
+
+        remaining = diff_ledger()
+        remaining_balances = diff_session_balances()
+        if remaining or remaining_balances:
+            self._report(remaining, options["limit"])
+            self._report_balances(remaining_balances, options["limit"])
+            raise CommandError(
+                f"{len(remaining) + len(remaining_balances)} diferencia(s) siguen sin coincidir tras reconstruir."
+            )
+        self.stdout.write(self.style.SUCCESS("Libro consistente con los datos crudos."))
+
+    def _report(self, diffs: list, limit: int) -> None:
+        if not diffs:
+            self.stdout.write(self.style.SUCCESS("Sin diferencias."))
+            return
+        self.stdout.write(self.style.WARNING(f"{len(diffs)} diferencia(s):"))
+        for d in diffs[:limit]:
+            self.stdout.write(
+                f"  {d['business_date']} {d['cash_session_id']} {d['movement_type']}: "
+                f"libro={d['ledger_count']}/{d['ledger_amount']} crudo={d['raw_count']}/{d['raw_amount']}"
+            )
+
+    def _report_balances(self, diffs: list, limit: int) -> None:
+        if not diffs:
+            return
+        self.stdout.write(self.style.WARNING(f"{len(diffs)} saldo(s) de sesión distintos:"))
+        for d in diffs[:limit]:
+            self.stdout.write(
+                f"  {d['cash_session_id']}: "
+                f"sesión={d['stored_count']}/{d['stored_amount']} crudo={d['raw_count']}/{d['raw_amount']}"
+            )
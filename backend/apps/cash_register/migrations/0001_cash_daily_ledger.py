@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Libro diario pre-agregado de caja (ver apps/cash_register/ledger.py).
+    Se llena desde los datos existentes; luego se mantiene con deltas.
+    """
+
+    dependencies = []
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE TABLE IF NOT EXISTS django_app.cash_daily_ledger (
+                business_date   date           NOT NULL,
+                cash_session_id uuid           NOT NULL
+                    REFERENCES django_app.cash_sessions (cash_session_id) ON DELETE CASCADE,
+                session_date    date           NOT NULL,
+                movement_type   text           NOT NULL,
+                movement_count  integer        NOT NULL DEFAULT 0,
+                amount_total    numeric(14, 2) NOT NULL DEFAULT 0,
+                income_total    numeric(14, 2) NOT NULL DEFAULT 0,
+                expense_total   numeric(14, 2) NOT NULL DEFAULT 0,
+                updated_at      timestamptz    NOT NULL DEFAULT now(),
+                PRIMARY KEY (business_date, cash_session_id, movement_type)
+            );
+
+            CREATE INDEX IF NOT EXISTS cash_daily_ledger_session_date_idx
+                ON django_app.cash_daily_ledger (session_date);
+            """,
+            reverse_sql="DROP TABLE IF EXISTS django_app.cash_daily_ledger;",
+        ),
+        migrations.RunSQL(
+            sql=[(
+                """
+                INSERT INTO django_app.cash_daily_ledger
+                  (business_date, cash_session_id, session_date, movement_type,
+                   movement_count, amount_total, income_total, expense_total)
+                SELECT (cm.created_at AT TIME ZONE %(tz)s)::date, cs.cash_session_id,
+                       (cs.opened_at AT TIME ZONE %(tz)s)::date, cm.movement_type,
+                       COUNT(*), SUM(cm.amount),
+                       SUM(CASE WHEN cm.amount > 0 THEN cm.amount ELSE 0 END),
+                       SUM(CASE WHEN cm.amount < 0 THEN -cm.amount ELSE 0 END)
+                FROM django_app.cash_movements cm
+                JOIN django_app.cash_sessions cs ON cs.cash_session_id = cm.cash_session_id
+                GROUP BY 1, 2, 3, 4
+                UNION ALL
+                SELECT (cc.closed_at AT TIME ZONE %(tz)s)::date, cs.cash_session_id,
+                       (cs.opened_at AT TIME ZONE %(tz)s)::date, '_closing',
+                       COUNT(*), SUM(cc.difference), 0, 0
+                FROM django_app.cash_closings cc
+                JOIN django_app.cash_sessions cs ON cs.cash_session_id = cc.cash_session_id
+                GROUP BY 1, 2, 3
+                UNION ALL
+                SELECT (cs.opened_at AT TIME ZONE %(tz)s)::date, cs.cash_session_id,
+                       (cs.opened_at AT TIME ZONE %(tz)s)::date, '_session', 1, 0, 0, 0
+                FROM django_app.cash_sessions cs
+                ON CONFLICT DO NOTHING
+                """,
+                {"tz": settings.TIME_ZONE},
+            )],
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
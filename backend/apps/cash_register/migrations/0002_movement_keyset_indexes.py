@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Índices para la paginación keyset (created_at, pk) de movimientos de caja.
+    """
+
+    dependencies = [
+        ("cash_register", "0001_cash_daily_ledger"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS cash_movements_keyset_idx
+                ON django_app.cash_movements (created_at DESC, cash_movement_id DESC);
+            CREATE INDEX IF NOT EXISTS cash_movements_session_keyset_idx
+                ON django_app.cash_movements (cash_session_id, created_at DESC, cash_movement_id DESC);
+            """,
+            reverse_sql="""
+            DROP INDEX IF EXISTS django_app.cash_movements_session_keyset_idx;
+            DROP INDEX IF EXISTS django_app.cash_movements_keyset_idx;
+            """,
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Índice para filtros por rango de fecha (límites timestamptz, ver common/dates.py).
+    """
+
+    dependencies = [
+        ("cash_register", "0002_movement_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS cash_sessions_opened_at_idx
+                ON django_app.cash_sessions (opened_at);
+            """,
+            reverse_sql="""
+            DROP INDEX IF EXISTS django_app.cash_sessions_opened_at_idx;
+            """,
+        ),
+    ]
@@ -0,0 +1,49 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Saldo acumulado por sesión de caja (ver apps/cash_register/ledger.py):
+    suma y cantidad de movimientos, separados en ingresos y egresos.
+    Se inicializa desde los movimientos existentes; luego se mantiene con
+    deltas en la misma transacción que escribe el movimiento.
+    """
+
+    dependencies = [
+        ("cash_register", "0003_cash_sessions_opened_at_index"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            ALTER TABLE django_app.cash_sessions
+                ADD COLUMN IF NOT EXISTS movements_total numeric(14, 2) NOT NULL DEFAULT 0,
+                ADD COLUMN IF NOT EXISTS income_total    numeric(14, 2) NOT NULL DEFAULT 0,
+                ADD COLUMN IF NOT EXISTS expense_total   numeric(14, 2) NOT NULL DEFAULT 0,
+                ADD COLUMN IF NOT EXISTS movement_count  integer        NOT NULL DEFAULT 0;
+
+            UPDATE django_app.cash_sessions cs
+            SET movements_total = m.amount_total,
+                income_total    = m.income_total,
+                expense_total   = m.expense_total,
+                movement_count  = m.movement_count
+            FROM (
+                SELECT cash_session_id,
+                       SUM(amount) AS amount_total,
+                       SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END) AS income_total,
+                       SUM(CASE WHEN amount < 0 THEN -amount ELSE 0 END) AS expense_total,
+                       COUNT(*) AS movement_count
+                FROM django_app.cash_movements
+                GROUP BY cash_session_id
+            ) m
+            WHERE m.cash_session_id = cs.cash_session_id;
+            """,
+            reverse_sql="""
+            ALTER TABLE django_app.cash_sessions
+                DROP COLUMN IF EXISTS movement_count,
+                DROP COLUMN IF EXISTS expense_total,
+                DROP COLUMN IF EXISTS income_total,
+                DROP COLUMN IF EXISTS movements_total;
+            """,
+        ),
+    ]
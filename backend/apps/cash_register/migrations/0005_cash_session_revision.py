@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Revisión de la sesión de caja: se incrementa en cada alta, edición o
+    borrado de movimiento (ledger._apply_session_delta). El resumen de la caja
+    activa la devuelve para que el cliente incremental detecte ediciones, que
+    no cambian movement_count ni el cursor.
+    """
+
+    dependencies = [
+        ("cash_register", "0004_cash_session_running_balance"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            ALTER TABLE django_app.cash_sessions
+                ADD COLUMN IF NOT EXISTS revision bigint NOT NULL DEFAULT 0;
+
+            UPDATE django_app.cash_sessions SET revision = movement_count;
+            """,
+            reverse_sql="""
+            ALTER TABLE django_app.cash_sessions DROP COLUMN IF EXISTS revision;
+            """,
+        ),
+    ]
@@ -12,6 +12,13 @@ class CashSession(models.Model):
     closed_at       = models.DateTimeField(db_column="closed_at", null=True, blank=True)
     created_at      = models.DateTimeField(db_column="created_at")
     updated_at      = models.DateTimeField(db_column="updated_at")
+    # Saldo acumulado, mantenido por ledger.record_movement/unrecord_movement
+    movements_total = models.DecimalField(db_column="movements_total", max_digits=14, decimal_places=2, default=0)
+    income_total    = models.DecimalField(db_column="income_total", max_digits=14, decimal_places=2, default=0)
+    expense_total   = models.DecimalField(db_column="expense_total", max_digits=14, decimal_places=2, default=0)
+    movement_count  = models.IntegerField(db_column="movement_count", default=0)
+    # Sube con cada alta/edición/borrado de movimiento (detecta ediciones en ?summary=1)
+    revision        = models.BigIntegerField(db_column="revision", default=0)
 
     class Meta:
         db_table = "cash_sessions"
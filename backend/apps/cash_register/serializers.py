@@ -69,10 +69,13 @@ class CashSessionSerializer(serializers.ModelSerializer):
         model  = CashSession
         fields = [
             "cash_session_id", "opened_by", "opened_at", "opening_amount", "status",
-            "closed_by", "closed_at", "created_at", "updated_at", "movements", "closings",
+            "closed_by", "closed_at", "created_at", "updated_at",
+            "movements_total", "income_total", "expense_total", "movement_count", "revision",
+            "movements", "closings",
         ]
         read_only_fields = ["cash_session_id", "opened_at", "status",
-                            "closed_by", "closed_at", "created_at", "updated_at"]
+                            "closed_by", "closed_at", "created_at", "updated_at",
+                            "movements_total", "income_total", "expense_total", "movement_count", "revision"]
 
     def validate_opening_amount(self, value):
         if value < 0:
@@ -95,3 +98,19 @@ class CashSessionListSerializer(serializers.ModelSerializer):
             "cash_session_id", "opened_by", "opened_at",
             "opening_amount", "status", "closed_at",
         ]
+
+
+class CashSessionSummarySerializer(serializers.ModelSerializer):
+    """Caja activa en modo resumen: saldo acumulado sin movimientos anidados."""
+    theoretical_amount = serializers.SerializerMethodField()
+
+    class Meta:
+        model  = CashSession
+        fields = [
+            "cash_session_id", "opened_by", "opened_at", "opening_amount", "status",
+            "movements_total", "income_total", "expense_total", "movement_count", "revision",
+            "theoretical_amount",
+        ]
+
+    def get_theoretical_amount(self, obj):
+        return str(obj.opening_amount + obj.movements_total)
@@ -1,6 +1,8 @@
-from decimal import Decimal
+import uuid
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
 
-from django.db import transaction
+from django.db import connection, transaction
+from django.db.models import Q
 from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
@@ -9,16 +11,25 @@ from rest_framework.response import Response
 
 from apps.authentication.permissions import IsStaffOrAdmin
 from apps.catalog.models import Product
-from apps.catalog.stock import apply_stock_change
+from apps.catalog.stock import InsufficientStock, apply_stock_change, apply_stock_changes
+from apps.common.dates import parse_uuid
+from apps.common.pagination import KeysetPagination, decode_cursor, encode_cursor
 from apps.work_orders.models import WorkOrder
+from apps.work_orders.reception import open_work_orders_summary
+from . import ledger
 from .models import CashSession, CashMovement, CashClosing
 from .serializers import (
     CashSessionSerializer,
     CashSessionListSerializer,
+    CashSessionSummarySerializer,
     CashMovementSerializer,
     CashClosingSerializer,
 )
 
+ACTIVE_SUMMARY_LIMIT = 200
+TICKET_MAX_ITEMS = 100
+CENT = Decimal("0.01")
+
 
 class CashSessionViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, IsStaffOrAdmin]
@@ -31,6 +42,7 @@ class CashSessionViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return CashSession.objects.prefetch_related("movements", "closings").all()
 
+    @transaction.atomic
     def create(self, request, *args, **kwargs):
         """Abrir caja — valida que no haya otra sesión abierta."""
         if CashSession.objects.filter(status="open").exists():
@@ -43,18 +55,57 @@ class CashSessionViewSet(viewsets.ModelViewSet):
         serializer = CashSessionSerializer(data=data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        ledger.record_session(serializer.instance.cash_session_id)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @action(detail=False, methods=["get"], url_path="active")
     def active(self, request):
-        """Retorna la sesión actualmente abierta, o 404."""
+        """
+        Retorna la sesión actualmente abierta, o 404.
+
+        Con ?summary=1 responde liviano para el polling de la pantalla de caja:
+        saldo acumulado de la sesión y solo los movimientos posteriores a
+        ?since=<cursor> (sin since, los últimos ACTIVE_SUMMARY_LIMIT). El
+        cursor devuelto se manda en el siguiente poll. revision sube una vez
+        por cada movimiento creado, editado o borrado: si avanzó más que las
+        filas nuevas recibidas (hubo ediciones o borrados, que no mueven el
+        cursor), el cliente recarga sin since.
+        """
+        if request.query_params.get("summary") not in ("1", "true"):
+            try:
+                session = CashSession.objects.prefetch_related("movements", "closings").get(status="open")
+                return Response(CashSessionSerializer(session).data)
+            except CashSession.DoesNotExist:
+                return Response({"detail": "No hay caja abierta."}, status=status.HTTP_404_NOT_FOUND)
+
         try:
-            session = CashSession.objects.prefetch_related("movements", "closings").get(status="open")
-            return Response(CashSessionSerializer(session).data)
+            session = CashSession.objects.get(status="open")
         except CashSession.DoesNotExist:
             return Response({"detail": "No hay caja abierta."}, status=status.HTTP_404_NOT_FOUND)
 
+        since = request.query_params.get("since") or ""
+        movements = session.movements.order_by("-created_at", "-cash_movement_id")
+        if since:
+            try:
+                created_at, pk = decode_cursor(since)
+            except ValueError as e:
+                return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            movements = movements.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, cash_movement_id__gt=pk)
+            )
+        rows = list(movements[: ACTIVE_SUMMARY_LIMIT + 1])
+        truncated = len(rows) > ACTIVE_SUMMARY_LIMIT
+        rows = rows[:ACTIVE_SUMMARY_LIMIT]
+
+        data = CashSessionSummarySerializer(session).data
+        data["movements"] = CashMovementSerializer(rows, many=True).data
+        # Si el lote se cortó, el cliente debe recargar completo (since vacío)
+        data["truncated"] = truncated
+        data["cursor"] = encode_cursor(rows[0].created_at, rows[0].pk) if rows else (since or None)
+        return Response(data)
+
     @action(detail=True, methods=["post"], url_path="close")
+    @transaction.atomic
     def close(self, request, pk=None):
         """Cierre normal: requiere actual_amount; motivo obligatorio si hay diferencia."""
         session = self.get_object()
@@ -90,6 +141,7 @@ class CashSessionViewSet(viewsets.ModelViewSet):
             closed_at=now,
             created_at=now,
         )
+        ledger.record_closing(session.cash_session_id, diff, now)
         session.status    = "closed"
         session.closed_by = request.user.id
         session.closed_at = now
@@ -102,6 +154,7 @@ class CashSessionViewSet(viewsets.ModelViewSet):
         return Response(resp)
 
     @action(detail=True, methods=["post"], url_path="force-close")
+    @transaction.atomic
     def force_close(self, request, pk=None):
         """Cierre forzado de emergencia — requiere audit_note obligatorio."""
         session = self.get_object()
@@ -129,6 +182,7 @@ class CashSessionViewSet(viewsets.ModelViewSet):
             closed_at=now,
             created_at=now,
         )
+        ledger.record_closing(session.cash_session_id, Decimal("0.00"), now)
         session.status    = "force_closed"
         session.closed_by = request.user.id
         session.closed_at = now
@@ -139,6 +193,7 @@ class CashSessionViewSet(viewsets.ModelViewSet):
         return Response(CashSessionSerializer(session).data)
 
     @action(detail=True, methods=["post"], url_path="intermediate-check")
+    @transaction.atomic
     def intermediate_check(self, request, pk=None):
         """Verificación intermedia — genera snapshot sin cerrar la caja."""
         session = self.get_object()
@@ -164,6 +219,7 @@ class CashSessionViewSet(viewsets.ModelViewSet):
             closed_at=now,
             created_at=now,
         )
+        ledger.record_closing(session.cash_session_id, diff, now)
         return Response(CashClosingSerializer(closing).data, status=status.HTTP_201_CREATED)
 
 
@@ -171,44 +227,21 @@ class CashSessionViewSet(viewsets.ModelViewSet):
     def work_orders_summary(self, request):
         """OTs abiertas con info de cliente y vehículo para el dropdown del frontend.
         Acepta ?work_order_id=<uuid> para incluir una OT específica aunque esté cerrada
-        (útil al redirigir desde 'Cerrar y Cobrar')."""
-        qs = WorkOrder.objects.select_related("customer", "vehicle").filter(
-            status__in=["open", "in_progress", "ready"]
-        ).order_by("-opened_at")[:100]
-
-        def wo_to_dict(wo):
-            customer_name = wo.customer.full_name if wo.customer else "—"
-            vehicle_info = ""
-            if wo.vehicle:
-                parts = [wo.vehicle.make, wo.vehicle.model, wo.vehicle.plate]
-                vehicle_info = " ".join(p for p in parts if p)
-            opened = wo.opened_at.strftime("%d/%m/%Y") if wo.opened_at else ""
-            return {
-                "work_order_id":   str(wo.work_order_id),
-                "display":         f"{customer_name} — {vehicle_info} — {opened}",
-                "estimated_total": str(wo.estimated_total or "0.00"),
-            }
-
-        data = [wo_to_dict(wo) for wo in qs]
-
+        (útil al redirigir desde 'Cerrar y Cobrar'). El texto se arma en SQL
+        (ver work_orders/reception.py)."""
         include_id = request.query_params.get("work_order_id")
         if include_id:
-            existing_ids = {d["work_order_id"] for d in data}
-            if include_id not in existing_ids:
-                try:
-                    wo = WorkOrder.objects.select_related("customer", "vehicle").get(
-                        work_order_id=include_id
-                    )
-                    data.insert(0, wo_to_dict(wo))
-                except WorkOrder.DoesNotExist:
-                    pass
-
-        return Response(data)
+            try:
+                include_id = parse_uuid(include_id, "work_order_id")
+            except ValueError as e:
+                return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(open_work_orders_summary(include_id))
 
 
 class CashMovementViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, IsStaffOrAdmin]
     serializer_class   = CashMovementSerializer
+    pagination_class   = KeysetPagination
 
     def get_queryset(self):
         qs = CashMovement.objects.all()
@@ -221,7 +254,10 @@ class CashMovementViewSet(viewsets.ModelViewSet):
     def create(self, request, *args, **kwargs):
         session_id = request.data.get("cash_session_id")
         try:
-            CashSession.objects.get(pk=session_id, status="open")
+            # Lock de la sesión: serializa los movimientos de la caja (el saldo
+            # acumulado y el cursor de ?summary=1 dependen de ese orden) y
+            # espera a un cierre en curso.
+            CashSession.objects.select_for_update().get(pk=session_id, status="open")
         except CashSession.DoesNotExist:
             return Response(
                 {"detail": "No se encontró una sesión de caja abierta con ese ID."},
@@ -250,6 +286,8 @@ class CashMovementViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save(created_by=request.user.id)
+        movement = serializer.instance
+        ledger.record_movement(movement.cash_session_id, movement.movement_type, movement.amount, movement.created_at)
 
         if has_product:
             apply_stock_change(
@@ -264,15 +302,215 @@ class CashMovementViewSet(viewsets.ModelViewSet):
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=["post"], url_path="ticket")
+    def ticket(self, request):
+        """
+        Venta de mostrador con varios productos en un request:
+        {"cash_session_id", "description"?, "items": [{"product_id", "qty",
+         "unit": "base" | "secondary", "unit_price"?}]}.
+
+        qty va en la unidad indicada; con "secondary" se convierte a la unidad
+        base con secondary_unit_factor. unit_price (por unidad vendida) es
+        opcional: por defecto el precio del producto por unidad base.
+
+        Todo o nada, en una transacción: bloquea la sesión, bloquea y descuenta
+        el stock de todos los productos en un lote ordenado, y escribe los
+        movimientos de caja (uno por ítem) y de inventario con INSERTs
+        multi-fila. 409 si a un producto le falta stock.
+        """
+        data = request.data or {}
+        try:
+            session_id = str(parse_uuid(data.get("cash_session_id"), "cash_session_id"))
+            items = _parse_ticket_items(data.get("items"))
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        description = str(data.get("description") or "").strip() or None
+
+        try:
+            with transaction.atomic():
+                movements = _write_ticket(session_id, items, description, request.user.id)
+        except InsufficientStock as e:
+            return Response(
+                {"detail": str(e), "product_id": e.product_id, "available": str(e.available)},
+                status=status.HTTP_409_CONFLICT,
+            )
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            {
+                "cash_session_id": session_id,
+                "total": str(sum((m.amount for m in movements), Decimal("0"))),
+                "movements": CashMovementSerializer(movements, many=True).data,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        old = serializer.instance
+        ledger.unrecord_movement(old.cash_session_id, old.movement_type, old.amount, old.created_at)
+        movement = serializer.save()
+        ledger.record_movement(movement.cash_session_id, movement.movement_type, movement.amount, movement.created_at)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        ledger.unrecord_movement(instance.cash_session_id, instance.movement_type, instance.amount, instance.created_at)
+        instance.delete()
+
 
 # ── helpers ───────────────────────────────────────────────────────────────────
 
+def _ticket_decimal(value, field_name: str, allow_zero: bool = False) -> Decimal:
+    try:
+        d = Decimal(str(value))
+    except (InvalidOperation, TypeError):
+        raise ValueError(f"{field_name} inválido.")
+    if not d.is_finite():
+        raise ValueError(f"{field_name} inválido.")
+    if d < 0 or (d == 0 and not allow_zero):
+        raise ValueError(f"{field_name} debe ser mayor a cero.")
+    return d
+
+
+def _parse_ticket_items(items) -> list:
+    """Valida el carrito completo antes de escribir nada; ValueError indica el ítem."""
+    if not isinstance(items, list) or not items:
+        raise ValueError("items es requerido (lista de productos).")
+    if len(items) > TICKET_MAX_ITEMS:
+        raise ValueError(f"Máximo {TICKET_MAX_ITEMS} ítems por ticket.")
+
+    parsed = []
+    for i, item in enumerate(items):
+        try:
+            if not isinstance(item, dict):
+                raise ValueError("formato inválido.")
+            unit = str(item.get("unit") or "base").strip().lower()
+            if unit not in ("base", "secondary"):
+                raise ValueError("unit debe ser 'base' o 'secondary'.")
+            unit_price = item.get("unit_price")
+            parsed.append({
+                "product_id": str(parse_uuid(item.get("product_id"), "product_id")),
+                "qty": _ticket_decimal(item.get("qty"), "qty"),
+                "unit": unit,
+                "unit_price": (
+                    _ticket_decimal(unit_price, "unit_price", allow_zero=True)
+                    if unit_price not in (None, "") else None
+                ),
+            })
+        except ValueError as e:
+            raise ValueError(f"items[{i}]: {e}")
+    return parsed
+
+
+def _write_ticket(session_id: str, items: list, description, performed_by) -> list:
+    """
+    Escribe el ticket; debe llamarse dentro de transaction.atomic().
+    Orden de locks: sesión, productos (un SELECT ordenado en apply_stock_changes).
+    Retorna los CashMovement creados.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT status FROM django_app.cash_sessions WHERE cash_session_id = %s FOR UPDATE",
+            [session_id],
+        )
+        row = cursor.fetchone()
+        if not row or row[0] != "open":
+            raise ValueError("No se encontró una sesión de caja abierta con ese ID.")
+
+        cursor.execute(
+            """
+            SELECT product_id, name, unit_price, secondary_unit, secondary_unit_factor
+            FROM public.products
+            WHERE product_id = ANY(%s)
+            """,
+            [[uuid.UUID(item["product_id"]) for item in items]],
+        )
+        products = {
+            str(pid): {"name": name, "unit_price": price, "secondary_unit": sec_unit, "factor": factor}
+            for pid, name, price, sec_unit, factor in cursor.fetchall()
+        }
+
+    now = timezone.now()
+    movements = []
+    for i, item in enumerate(items):
+        product = products.get(item["product_id"])
+        if product is None:
+            raise ValueError(f"items[{i}]: producto no encontrado.")
+        if item["unit"] == "secondary":
+            if not product["secondary_unit"] or not product["factor"]:
+                raise ValueError(f"items[{i}]: {product['name']} no tiene unidad secundaria.")
+            base_qty = (item["qty"] * product["factor"]).quantize(CENT, rounding=ROUND_HALF_UP)
+            default_price = Decimal(str(product["unit_price"])) * product["factor"]
+        else:
+            base_qty = item["qty"]
+            default_price = Decimal(str(product["unit_price"]))
+        if base_qty <= 0:
+            raise ValueError(f"items[{i}]: qty inválido.")
+        unit_price = item["unit_price"] if item["unit_price"] is not None else default_price
+        amount = (item["qty"] * unit_price).quantize(CENT, rounding=ROUND_HALF_UP)
+        if amount == 0:
+            raise ValueError(f"items[{i}]: el monto no puede ser cero.")
+
+        movements.append(CashMovement(
+            cash_movement_id=uuid.uuid4(),
+            cash_session_id=session_id,
+            movement_type="sale",
+            amount=amount,
+            product_id=item["product_id"],
+            product_qty=base_qty,
+            description=description,
+            created_by=performed_by,
+            created_at=now,
+            updated_at=now,
+        ))
+
+    apply_stock_changes([
+        {
+            "product_id": m.product_id,
+            "qty_change": -m.product_qty,
+            "movement_type": "sale",
+            "performed_by": performed_by,
+            "reason": description or "Venta directa",
+            "reference_id": m.cash_movement_id,
+            "reference_type": "cash_movement",
+        }
+        for m in movements
+    ])
+
+    values_sql = ", ".join(["(%s, %s, 'sale', %s, %s, %s, %s, %s, %s, %s)"] * len(movements))
+    params = []
+    for m in movements:
+        params.extend([
+            str(m.cash_movement_id), session_id, str(m.amount), m.product_id, str(m.product_qty),
+            m.description, str(m.created_by), now, now,
+        ])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO django_app.cash_movements
+              (cash_movement_id, cash_session_id, movement_type, amount, product_id, product_qty,
+               description, created_by, created_at, updated_at)
+            VALUES {values_sql}
+            """,
+            params,
+        )
+    ledger.record_movements(session_id, "sale", [m.amount for m in movements], now)
+    return movements
+
+
 def _calculate_theoretical(session: CashSession) -> Decimal:
-    """Saldo teórico = monto inicial + suma de todos los movimientos."""
-    total = Decimal("0.00")
-    for m in session.movements.all():
-        total += m.amount
-    return session.opening_amount + total
+    """
+    Saldo teórico = monto inicial + saldo acumulado de la sesión.
+    Bloquea la sesión: un movimiento concurrente espera al cierre y después la
+    encuentra cerrada.
+    """
+    locked = (
+        CashSession.objects.select_for_update()
+        .only("opening_amount", "movements_total")
+        .get(pk=session.pk)
+    )
+    return locked.opening_amount + locked.movements_total
 
 
 def _pending_work_orders(session: CashSession) -> list:
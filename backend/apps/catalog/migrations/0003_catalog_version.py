@@ -0,0 +1,79 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Versión del catálogo para caché/ETag y sincronización incremental.
+    Cada INSERT/UPDATE de products o categories toma un valor nuevo de
+    catalog_version_seq (trigger), así que también se cubren las escrituras
+    con SQL crudo (stock, OTs, caja). Los borrados quedan en catalog_deletions.
+    """
+
+    dependencies = [
+        ("catalog", "0002_alter_category_options_alter_product_options"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE SEQUENCE IF NOT EXISTS public.catalog_version_seq;
+
+            ALTER TABLE public.products
+                ADD COLUMN IF NOT EXISTS catalog_version bigint NOT NULL DEFAULT nextval('public.catalog_version_seq');
+            ALTER TABLE public.categories
+                ADD COLUMN IF NOT EXISTS catalog_version bigint NOT NULL DEFAULT nextval('public.catalog_version_seq');
+
+            CREATE INDEX IF NOT EXISTS products_catalog_version_idx ON public.products (catalog_version);
+            CREATE INDEX IF NOT EXISTS categories_catalog_version_idx ON public.categories (catalog_version);
+
+            CREATE TABLE IF NOT EXISTS public.catalog_deletions (
+                product_id      uuid        PRIMARY KEY,
+                catalog_version bigint      NOT NULL DEFAULT nextval('public.catalog_version_seq'),
+                deleted_at      timestamptz NOT NULL DEFAULT now()
+            );
+            CREATE INDEX IF NOT EXISTS catalog_deletions_version_idx ON public.catalog_deletions (catalog_version);
+
+            CREATE OR REPLACE FUNCTION public.bump_catalog_version() RETURNS trigger AS $$
+            BEGIN
+                NEW.catalog_version := nextval('public.catalog_version_seq');
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql;
+
+            CREATE OR REPLACE FUNCTION public.log_catalog_deletion() RETURNS trigger AS $$
+            BEGIN
+                INSERT INTO public.catalog_deletions (product_id) VALUES (OLD.product_id)
+                ON CONFLICT (product_id) DO UPDATE
+                    SET catalog_version = nextval('public.catalog_version_seq'), deleted_at = now();
+                RETURN OLD;
+            END
+            $$ LANGUAGE plpgsql;
+
+            DROP TRIGGER IF EXISTS products_catalog_version ON public.products;
+            CREATE TRIGGER products_catalog_version
+                BEFORE INSERT OR UPDATE ON public.products
+                FOR EACH ROW EXECUTE FUNCTION public.bump_catalog_version();
+
+            DROP TRIGGER IF EXISTS categories_catalog_version ON public.categories;
+            CREATE TRIGGER categories_catalog_version
+                BEFORE INSERT OR UPDATE ON public.categories
+                FOR EACH ROW EXECUTE FUNCTION public.bump_catalog_version();
+
+            DROP TRIGGER IF EXISTS products_catalog_deletion ON public.products;
+            CREATE TRIGGER products_catalog_deletion
+                AFTER DELETE ON public.products
+                FOR EACH ROW EXECUTE FUNCTION public.log_catalog_deletion();
+            """,
+            reverse_sql="""
+            DROP TRIGGER IF EXISTS products_catalog_deletion ON public.products;
+            DROP TRIGGER IF EXISTS categories_catalog_version ON public.categories;
+            DROP TRIGGER IF EXISTS products_catalog_version ON public.products;
+            DROP FUNCTION IF EXISTS public.log_catalog_deletion();
+            DROP FUNCTION IF EXISTS public.bump_catalog_version();
+            DROP TABLE IF EXISTS public.catalog_deletions;
+            ALTER TABLE public.categories DROP COLUMN IF EXISTS catalog_version;
+            ALTER TABLE public.products DROP COLUMN IF EXISTS catalog_version;
+            DROP SEQUENCE IF EXISTS public.catalog_version_seq;
+            """,
+        ),
+    ]
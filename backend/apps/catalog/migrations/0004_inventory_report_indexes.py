@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Índices para el reporte de inventario: productos activos por stock
+    (sin stock / crítico / normal) y filtro por categoría.
+    """
+
+    dependencies = [
+        ("catalog", "0003_catalog_version"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS products_active_stock_idx
+                ON public.products (stock_qty, name)
+                WHERE is_active;
+            CREATE INDEX IF NOT EXISTS products_category_idx
+                ON public.products (category_id);
+            """,
+            reverse_sql="""
+            DROP INDEX IF EXISTS public.products_category_idx;
+            DROP INDEX IF EXISTS public.products_active_stock_idx;
+            """,
+        ),
+    ]
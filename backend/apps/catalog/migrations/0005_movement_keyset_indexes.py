@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Índices para la paginación keyset (created_at, pk) del historial de movimientos.
+    """
+
+    dependencies = [
+        ("catalog", "0004_inventory_report_indexes"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS product_movements_keyset_idx
+                ON django_app.product_movements (created_at DESC, movement_id DESC);
+            CREATE INDEX IF NOT EXISTS product_movements_product_keyset_idx
+                ON django_app.product_movements (product_id, created_at DESC, movement_id DESC);
+            """,
+            reverse_sql="""
+            DROP INDEX IF EXISTS django_app.product_movements_product_keyset_idx;
+            DROP INDEX IF EXISTS django_app.product_movements_keyset_idx;
+            """,
+        ),
+    ]
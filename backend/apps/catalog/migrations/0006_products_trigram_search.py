@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Índice pg_trgm para ?search= de productos (ver apps/common/search.py).
+    La expresión debe coincidir con document_sql("products").
+    """
+
+    dependencies = [
+        ("catalog", "0005_movement_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+            CREATE INDEX IF NOT EXISTS products_search_trgm_idx
+                ON public.products USING gin (
+                    (coalesce(name, '') || ' ' || coalesce(sku, ''))
+                    gin_trgm_ops
+                );
+            """,
+            reverse_sql="""
+            DROP INDEX IF EXISTS public.products_search_trgm_idx;
+            """,
+        ),
+    ]
@@ -0,0 +1,97 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    catalog_version en orden de commit.
+
+    Con nextval() cada fila tomaba su versión al escribirse, no al confirmar:
+    una transacción larga (líneas de OT, ticket de caja) podía tomar N y hacer
+    commit después de que otra ya publicara N+1, y MAX(catalog_version) no
+    cambiaba con ese commit (ETag y ?since= quedaban atrás para siempre).
+
+    Ahora la versión sale de una fila única (catalog_version_counter) que se
+    actualiza con UPDATE ... RETURNING: la fila queda bloqueada hasta el commit,
+    así que quien escribe después espera y toma un número mayor. Se quitan los
+    DEFAULT nextval(); el trigger y log_catalog_deletion asignan la versión.
+    """
+
+    dependencies = [
+        ("catalog", "0006_products_trigram_search"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE TABLE IF NOT EXISTS public.catalog_version_counter (
+                id boolean PRIMARY KEY DEFAULT true CHECK (id),
+                v  bigint  NOT NULL
+            );
+            INSERT INTO public.catalog_version_counter (id, v)
+            SELECT true, greatest(
+                (SELECT last_value FROM public.catalog_version_seq),
+                coalesce((SELECT max(catalog_version) FROM public.products), 0),
+                coalesce((SELECT max(catalog_version) FROM public.categories), 0),
+                coalesce((SELECT max(catalog_version) FROM public.catalog_deletions), 0)
+            )
+            ON CONFLICT (id) DO NOTHING;
+
+            CREATE OR REPLACE FUNCTION public.next_catalog_version() RETURNS bigint AS $$
+                UPDATE public.catalog_version_counter SET v = v + 1 WHERE id RETURNING v;
+            $$ LANGUAGE sql;
+
+            CREATE OR REPLACE FUNCTION public.bump_catalog_version() RETURNS trigger AS $$
+            BEGIN
+                NEW.catalog_version := public.next_catalog_version();
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql;
+
+            CREATE OR REPLACE FUNCTION public.log_catalog_deletion() RETURNS trigger AS $$
+            DECLARE
+                new_version bigint := public.next_catalog_version();
+            BEGIN
+                INSERT INTO public.catalog_deletions (product_id, catalog_version) VALUES (OLD.product_id, new_version)
+                ON CONFLICT (product_id) DO UPDATE
+                    SET catalog_version = new_version, deleted_at = now();
+                RETURN OLD;
+            END
+            $$ LANGUAGE plpgsql;
+
+            ALTER TABLE public.products ALTER COLUMN catalog_version DROP DEFAULT;
+            ALTER TABLE public.categories ALTER COLUMN catalog_version DROP DEFAULT;
+            ALTER TABLE public.catalog_deletions ALTER COLUMN catalog_version DROP DEFAULT;
+            DROP SEQUENCE IF EXISTS public.catalog_version_seq;
+            """,
+            reverse_sql="""
+            CREATE SEQUENCE IF NOT EXISTS public.catalog_version_seq;
+            SELECT setval('public.catalog_version_seq', (SELECT v FROM public.catalog_version_counter) + 1, false);
+
+            ALTER TABLE public.products
+                ALTER COLUMN catalog_version SET DEFAULT nextval('public.catalog_version_seq');
+            ALTER TABLE public.categories
+                ALTER COLUMN catalog_version SET DEFAULT nextval('public.catalog_version_seq');
+            ALTER TABLE public.catalog_deletions
+                ALTER COLUMN catalog_version SET DEFAULT nextval('public.catalog_version_seq');
+
+            CREATE OR REPLACE FUNCTION public.bump_catalog_version() RETURNS trigger AS $$
+            BEGIN
+                NEW.catalog_version := nextval('public.catalog_version_seq');
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql;
+
+            CREATE OR REPLACE FUNCTION public.log_catalog_deletion() RETURNS trigger AS $$
+            BEGIN
+                INSERT INTO public.catalog_deletions (product_id) VALUES (OLD.product_id)
+                ON CONFLICT (product_id) DO UPDATE
+                    SET catalog_version = nextval('public.catalog_version_seq'), deleted_at = now();
+                RETURN OLD;
+            END
+            $$ LANGUAGE plpgsql;
+
+            DROP FUNCTION IF EXISTS public.next_catalog_version();
+            DROP TABLE IF EXISTS public.catalog_version_counter;
+            """,
+        ),
+    ]
@@ -0,0 +1,110 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    catalog_version se asigna al commit, no en cada escritura.
+
+    Con 0007 cada INSERT/UPDATE de products o categories tomaba el contador
+    con UPDATE ... RETURNING y lo dejaba bloqueado hasta el commit: toda
+    transacción que mueve stock (líneas de OT, tickets de caja, compras) quedaba
+    en fila detrás de la anterior, y quien tocaba un producto antes de bloquear
+    otro podía caer en deadlock.
+
+    Ahora el trigger BEFORE deja la fila en catalog_version = 0 (pendiente) y
+    un constraint trigger DEFERRABLE INITIALLY DEFERRED (assign_catalog_version)
+    le pone el número definitivo al hacer commit. El contador se bloquea solo
+    durante el commit y solo actualiza filas que la transacción ya tiene
+    bloqueadas, así que no hay esperas cruzadas; las versiones siguen saliendo
+    en orden de commit. La fila pendiente nunca es visible fuera de su
+    transacción.
+    """
+
+    dependencies = [
+        ("catalog", "0007_catalog_version_counter"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE OR REPLACE FUNCTION public.bump_catalog_version() RETURNS trigger AS $$
+            BEGIN
+                -- La asignación al commit (assign_catalog_version) pasa sin tocar
+                IF current_setting('catalog.assigning', true) = 'on' THEN
+                    RETURN NEW;
+                END IF;
+                NEW.catalog_version := 0;
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql;
+
+            CREATE OR REPLACE FUNCTION public.log_catalog_deletion() RETURNS trigger AS $$
+            BEGIN
+                INSERT INTO public.catalog_deletions (product_id, catalog_version) VALUES (OLD.product_id, 0)
+                ON CONFLICT (product_id) DO UPDATE
+                    SET catalog_version = 0, deleted_at = now();
+                RETURN OLD;
+            END
+            $$ LANGUAGE plpgsql;
+
+            -- TG_ARGV[0]: columna clave de la tabla
+            CREATE OR REPLACE FUNCTION public.assign_catalog_version() RETURNS trigger AS $$
+            BEGIN
+                PERFORM set_config('catalog.assigning', 'on', true);
+                EXECUTE format(
+                    'UPDATE %s SET catalog_version = public.next_catalog_version() '
+                    'WHERE %I = $1 AND catalog_version = 0',
+                    TG_RELID::regclass, TG_ARGV[0]
+                ) USING (to_jsonb(NEW) ->> TG_ARGV[0])::uuid;
+                PERFORM set_config('catalog.assigning', 'off', true);
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql;
+
+            DROP TRIGGER IF EXISTS products_catalog_version_assign ON public.products;
+            CREATE CONSTRAINT TRIGGER products_catalog_version_assign
+                AFTER INSERT OR UPDATE ON public.products
+                DEFERRABLE INITIALLY DEFERRED
+                FOR EACH ROW WHEN (NEW.catalog_version = 0)
+                EXECUTE FUNCTION public.assign_catalog_version('product_id');
+
+            DROP TRIGGER IF EXISTS categories_catalog_version_assign ON public.categories;
+            CREATE CONSTRAINT TRIGGER categories_catalog_version_assign
+                AFTER INSERT OR UPDATE ON public.categories
+                DEFERRABLE INITIALLY DEFERRED
+                FOR EACH ROW WHEN (NEW.catalog_version = 0)
+                EXECUTE FUNCTION public.assign_catalog_version('category_id');
+
+            DROP TRIGGER IF EXISTS catalog_deletions_version_assign ON public.catalog_deletions;
+            CREATE CONSTRAINT TRIGGER catalog_deletions_version_assign
+                AFTER INSERT OR UPDATE ON public.catalog_deletions
+                DEFERRABLE INITIALLY DEFERRED
+                FOR EACH ROW WHEN (NEW.catalog_version = 0)
+                EXECUTE FUNCTION public.assign_catalog_version('product_id');
+            """,
+            reverse_sql="""
+            DROP TRIGGER IF EXISTS catalog_deletions_version_assign ON public.catalog_deletions;
+            DROP TRIGGER IF EXISTS categories_catalog_version_assign ON public.categories;
+            DROP TRIGGER IF EXISTS products_catalog_version_assign ON public.products;
+            DROP FUNCTION IF EXISTS public.assign_catalog_version();
+
+            CREATE OR REPLACE FUNCTION public.bump_catalog_version() RETURNS trigger AS $$
+            BEGIN
+                NEW.catalog_version := public.next_catalog_version();
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql;
+
+            CREATE OR REPLACE FUNCTION public.log_catalog_deletion() RETURNS trigger AS $$
+            DECLARE
+                new_version bigint := public.next_catalog_version();
+            BEGIN
+                INSERT INTO public.catalog_deletions (product_id, catalog_version) VALUES (OLD.product_id, new_version)
+                ON CONFLICT (product_id) DO UPDATE
+                    SET catalog_version = new_version, deleted_at = now();
+                RETURN OLD;
+            END
+            $$ LANGUAGE plpgsql;
+            """,
+        ),
+    ]
@@ -67,6 +67,8 @@ class Category(models.Model):
     description = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(db_column="created_at")
     updated_at = models.DateTimeField(db_column="updated_at")
+    # Lo asigna un trigger en cada INSERT/UPDATE (ver migración 0003)
+    catalog_version = models.BigIntegerField(db_column="catalog_version", null=True, editable=False)
 
     class Meta:
         db_table = "categories"
@@ -113,6 +115,8 @@ class Product(models.Model):
 
     created_at = models.DateTimeField(db_column="created_at")
     updated_at = models.DateTimeField(db_column="updated_at")
+    # Lo asigna un trigger en cada INSERT/UPDATE (ver migración 0003)
+    catalog_version = models.BigIntegerField(db_column="catalog_version", null=True, editable=False)
 
     class Meta:
         db_table = "products"
@@ -1,18 +1,74 @@
 """
 Helpers para movimientos de stock de inventario.
 
-Dos funciones principales:
+Funciones principales:
 - log_stock_movement(): solo inserta el registro de movimiento.
   Úsala cuando el stock ya fue actualizado por el caller (ej: work_orders/views.py).
   DEBE llamarse dentro de transaction.atomic().
 
+- log_stock_movements(): igual que la anterior pero para varios registros en
+  un solo INSERT multi-fila.
+
 - apply_stock_change(): hace todo: lock FOR UPDATE, valida, actualiza stock y loguea.
   Úsala cuando el caller NO tiene ya un lock (ej: cash_register, ajustes manuales).
+
+- apply_stock_changes(): versión por lote de apply_stock_change(). Bloquea todos
+  los productos en un solo SELECT ordenado por product_id (orden de locks estable,
+  sin deadlocks entre lotes), actualiza el stock con un solo UPDATE ... FROM (VALUES)
+  y registra todos los movimientos con un INSERT multi-fila.
 """
+import uuid
 from decimal import Decimal
 
 from django.db import connection, transaction
 
+MOVEMENT_COLUMNS = (
+    "product_id, movement_type, qty_before, qty_change, qty_after, "
+    "reason, reference_id, reference_type, performed_by"
+)
+
+
+class InsufficientStock(ValueError):
+    """Stock insuficiente para un producto del lote."""
+
+    def __init__(self, message: str, product_id=None, available: Decimal = None):
+        super().__init__(message)
+        self.product_id = product_id
+        self.available = available
+
+
+def _movement_params(m: dict) -> list:
+    return [
+        str(m["product_id"]),
+        m["movement_type"],
+        str(m["qty_before"]),
+        str(m["qty_change"]),
+        str(m["qty_after"]),
+        m.get("reason"),
+        str(m["reference_id"]) if m.get("reference_id") else None,
+        m.get("reference_type"),
+        str(m["performed_by"]) if m.get("performed_by") else None,
+    ]
+
+
+def log_stock_movements(movements: list) -> None:
+    """
+    Inserta varios registros en product_movements con un solo INSERT.
+    Cada elemento es un dict con las claves de log_stock_movement().
+    NO actualiza el stock. Debe llamarse dentro de transaction.atomic().
+    """
+    if not movements:
+        return
+    placeholders = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s, %s)"] * len(movements))
+    params = []
+    for m in movements:
+        params.extend(_movement_params(m))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO django_app.product_movements ({MOVEMENT_COLUMNS}) VALUES {placeholders}",
+            params,
+        )
+
 
 def log_stock_movement(
     product_id,
@@ -30,26 +86,115 @@ def log_stock_movement(
     NO actualiza el stock — asume que el caller ya lo hizo.
     Debe llamarse dentro de un bloque transaction.atomic().
     """
-    with connection.cursor() as cursor:
-        cursor.execute(
-            """
-            INSERT INTO django_app.product_movements
-              (product_id, movement_type, qty_before, qty_change, qty_after,
-               reason, reference_id, reference_type, performed_by)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """,
-            [
-                str(product_id),
-                movement_type,
-                str(qty_before),
-                str(qty_change),
-                str(qty_after),
-                reason,
-                str(reference_id) if reference_id else None,
-                reference_type,
-                str(performed_by) if performed_by else None,
-            ],
-        )
+    log_stock_movements([
+        {
+            "product_id": product_id,
+            "qty_before": qty_before,
+            "qty_change": qty_change,
+            "qty_after": qty_after,
+            "movement_type": movement_type,
+            "performed_by": performed_by,
+            "reason": reason,
+            "reference_id": reference_id,
+            "reference_type": reference_type,
+        }
+    ])
+
+
+def apply_stock_changes(changes: list, require_active: bool = True, ignore_missing: bool = False) -> dict:
+    """
+    Aplica un lote de cambios de stock en una sola transacción.
+
+    changes: lista de dicts con las claves de apply_stock_change()
+      (product_id, qty_change, movement_type y opcionales performed_by, reason,
+      reference_id, reference_type). Un mismo producto puede aparecer varias
+      veces; los cambios se aplican en el orden recibido.
+
+    - require_active=False permite mover stock de productos inactivos
+      (ej: devolución al cancelar una OT). 'deactivation' siempre se permite.
+    - ignore_missing=True omite productos que ya no existen en lugar de fallar.
+
+    Retorna {product_id (str): qty_after final (Decimal)}.
+    Lanza ValueError (InsufficientStock si falta stock); nada se escribe en ese caso.
+    """
+    if not changes:
+        return {}
+
+    try:
+        product_ids = sorted({uuid.UUID(str(c["product_id"])) for c in changes})
+    except ValueError:
+        raise ValueError("Producto no encontrado.")
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT product_id, stock_qty, is_active, name
+                FROM public.products
+                WHERE product_id = ANY(%s)
+                ORDER BY product_id
+                FOR UPDATE
+                """,
+                [product_ids],
+            )
+            locked = {
+                str(pid): {"stock": Decimal(str(stock or 0)), "is_active": is_active, "name": name}
+                for pid, stock, is_active, name in cursor.fetchall()
+            }
+
+            movements = []
+            for change in changes:
+                pid = str(uuid.UUID(str(change["product_id"])))
+                product = locked.get(pid)
+                if product is None:
+                    if ignore_missing:
+                        continue
+                    raise ValueError("Producto no encontrado.")
+
+                movement_type = change["movement_type"]
+                if require_active and not product["is_active"] and movement_type != "deactivation":
+                    raise ValueError(f"Producto inactivo: {product['name']}. No se pueden registrar movimientos.")
+
+                qty_change = Decimal(str(change["qty_change"]))
+                qty_before = product["stock"]
+                qty_after = qty_before + qty_change
+                if qty_after < 0:
+                    raise InsufficientStock(
+                        f"Stock insuficiente para {product['name']}. Disponible: {qty_before}",
+                        product_id=pid,
+                        available=qty_before,
+                    )
+
+                product["stock"] = qty_after
+                movements.append({
+                    **change,
+                    "product_id": pid,
+                    "qty_before": qty_before,
+                    "qty_change": qty_change,
+                    "qty_after": qty_after,
+                })
+
+            if not movements:
+                return {}
+
+            final = {m["product_id"]: locked[m["product_id"]]["stock"] for m in movements}
+            values_sql = ", ".join(["(%s::uuid, %s::numeric)"] * len(final))
+            params = []
+            for pid, qty in final.items():
+                params.extend([pid, str(qty)])
+            cursor.execute(
+                f"""
+                UPDATE public.products p
+                SET stock_qty = v.stock_qty, updated_at = now()
+                FROM (VALUES {values_sql}) AS v(product_id, stock_qty)
+                WHERE p.product_id = v.product_id
+                """,
+                params,
+            )
+
+        log_stock_movements(movements)
+
+    return final
 
 
 def apply_stock_change(
@@ -70,50 +215,15 @@ def apply_stock_change(
     Retorna qty_after (Decimal).
     Lanza ValueError en caso de producto inactivo o stock insuficiente.
     """
-    with transaction.atomic():
-        with connection.cursor() as cursor:
-            cursor.execute(
-                "SELECT stock_qty, is_active FROM public.products WHERE product_id = %s FOR UPDATE",
-                [str(product_id)],
-            )
-            row = cursor.fetchone()
-            if not row:
-                raise ValueError("Producto no encontrado.")
-
-            qty_before = Decimal(str(row[0] or 0))
-            is_active = row[1]
-
-            if not is_active and movement_type != "deactivation":
-                raise ValueError("Producto inactivo. No se pueden registrar movimientos.")
-
-            qty_after = qty_before + qty_change
-
-            if qty_after < 0:
-                raise ValueError(f"Stock insuficiente. Disponible: {qty_before}")
-
-            cursor.execute(
-                "UPDATE public.products SET stock_qty = %s, updated_at = now() WHERE product_id = %s",
-                [str(qty_after), str(product_id)],
-            )
-
-            cursor.execute(
-                """
-                INSERT INTO django_app.product_movements
-                  (product_id, movement_type, qty_before, qty_change, qty_after,
-                   reason, reference_id, reference_type, performed_by)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """,
-                [
-                    str(product_id),
-                    movement_type,
-                    str(qty_before),
-                    str(qty_change),
-                    str(qty_after),
-                    reason,
-                    str(reference_id) if reference_id else None,
-                    reference_type,
-                    str(performed_by) if performed_by else None,
-                ],
-            )
-
-    return qty_after
+    result = apply_stock_changes([
+        {
+            "product_id": product_id,
+            "qty_change": qty_change,
+            "movement_type": movement_type,
+            "performed_by": performed_by,
+            "reason": reason,
+            "reference_id": reference_id,
+            "reference_type": reference_type,
+        }
+    ])
+    return result[str(uuid.UUID(str(product_id)))]
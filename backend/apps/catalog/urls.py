@@ -5,9 +5,12 @@ from .views import (
     ProductListCreateView,
     ProductDetailView,
     ProductChangeLogView,
+    ProductChangesView,
     StockAdjustmentView,
+    StockReceiveView,
     ProductMovementListView,
     GlobalMovementListView,
+    InventoryReportView,
 )
 
 urlpatterns = [
@@ -17,11 +20,16 @@ urlpatterns = [
 
     # Products
     path("products/", ProductListCreateView.as_view(), name="product_list_create"),
+    path("products/changes/", ProductChangesView.as_view(), name="product_changes"),
+    path("products/receive-stock/", StockReceiveView.as_view(), name="product_receive_stock"),
     path("products/<uuid:pk>/", ProductDetailView.as_view(), name="product_detail"),
     path("products/<uuid:pk>/changelog/", ProductChangeLogView.as_view(), name="product_changelog"),
     path("products/<uuid:pk>/adjust-stock/", StockAdjustmentView.as_view(), name="product_adjust_stock"),
     path("products/<uuid:pk>/movements/", ProductMovementListView.as_view(), name="product_movements"),
 
+    # Reporte de inventario
+    path("inventory-report/", InventoryReportView.as_view(), name="inventory_report"),
+
     # Movimientos globales
     path("movements/", GlobalMovementListView.as_view(), name="global_movements"),
 ]
@@ -0,0 +1,60 @@
+"""
+Versión del catálogo (products + categories) para caché, ETag y deltas.
+
+catalog_version es un número monotónico que un trigger asigna en cada
+INSERT/UPDATE de products y categories; los borrados de productos quedan en
+public.catalog_deletions con su propia versión (ver migración 0003). Como lo
+mantiene la base, cualquier escritura (ORM, SQL crudo de stock, OTs, caja)
+cambia la versión sin tener que invalidar nada desde el código.
+
+Los números salen de la fila única public.catalog_version_counter (migración
+0007) y se asignan al commit (constraint trigger diferido, migración 0008):
+mientras la transacción corre la fila queda en 0 y el contador no se toca, así
+que las escrituras de stock no se serializan entre sí. Como el contador se
+bloquea durante el commit, las versiones se hacen visibles en orden de commit
+y una versión leída nunca queda por detrás de un commit posterior.
+
+- current_version(): versión confirmada actual (el contador).
+- catalog_etag(): ETag fuerte para una versión + variante (query string).
+- changed_since(): productos y borrados posteriores a una versión.
+"""
+import hashlib
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Product
+
+CATALOG_CACHE_NAMESPACE = "catalog"
+CATALOG_CACHE_TTL = 300  # segundos; la clave incluye la versión, el TTL solo libera memoria
+
+
+def current_version() -> int:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT v FROM public.catalog_version_counter")
+        row = cursor.fetchone()
+    return int(row[0] or 0)
+
+
+def catalog_etag(version: int, variant: str = "") -> str:
+    suffix = hashlib.md5(variant.encode()).hexdigest()[:12] if variant else "all"
+    return f'"catalog-{version}-{suffix}"'
+
+
+def changed_since(since: int):
+    """
+    Retorna (queryset de productos cambiados, lista de product_id borrados).
+    Un cambio de categoría (ej: renombrar) incluye todos sus productos.
+    """
+    products = (
+        Product.objects.select_related("category")
+        .filter(Q(catalog_version__gt=since) | Q(category__catalog_version__gt=since))
+        .order_by("catalog_version")
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT product_id::text FROM public.catalog_deletions WHERE catalog_version > %s ORDER BY catalog_version",
+            [since],
+        )
+        deleted = [r[0] for r in cursor.fetchall()]
+    return products, deleted
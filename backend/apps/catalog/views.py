@@ -1,11 +1,22 @@
+import uuid
 from decimal import Decimal
 
-from django.db import transaction
+from django.db import connection, transaction
+from django.utils import timezone
 from rest_framework import generics, status
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import NotFound, ParseError
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from apps.authentication.permissions import IsStaffOrAdmin
+from apps.common.cache import cached, if_none_match
+from apps.common.csvstream import streaming_csv_response
+from apps.common.dates import range_lookups
+from apps.common.pagination import KeysetPagination
+from apps.common.search import trigram_search
+from apps.common.xlsx import StreamingXlsx, iter_query_rows
+
 from .models import Category, Product, ProductChangeLog, ProductMovement
 from .serializers import (
     CategorySerializer,
@@ -14,7 +25,14 @@ from .serializers import (
     ProductSerializer,
 )
 from .permissions import IsAdminOrReadOnly
-from .stock import apply_stock_change, log_stock_movement
+from .stock import apply_stock_change, apply_stock_changes, log_stock_movement
+from .versioning import (
+    CATALOG_CACHE_NAMESPACE,
+    CATALOG_CACHE_TTL,
+    catalog_etag,
+    changed_since,
+    current_version,
+)
 
 PRICE_FIELDS = ["unit_price", "cost"]
 ACTIVATION_FIELDS = ["is_active"]
@@ -41,7 +59,31 @@ class ProductListCreateView(generics.ListCreateAPIView):
     permission_classes = [IsAdminOrReadOnly]
 
     def get_queryset(self):
-        return Product.objects.select_related("category").all()
+        qs = Product.objects.select_related("category").all()
+        search = self.request.query_params.get("search")
+        if search:
+            try:
+                qs = trigram_search(qs, "products", search)
+            except ValueError as e:
+                raise ParseError(str(e))
+        return qs
+
+    def list(self, request, *args, **kwargs):
+        """
+        Listado cacheado por versión del catálogo.
+        ETag fuerte (versión + query string): If-None-Match → 304 sin serializar nada.
+        """
+        variant = f"{request.get_host()}?{request.META.get('QUERY_STRING', '')}"
+        etag = catalog_etag(current_version(), variant)
+        if if_none_match(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            def build():
+                return super(ProductListCreateView, self).list(request, *args, **kwargs).data
+            response = Response(cached(CATALOG_CACHE_NAMESPACE, etag, build, CATALOG_CACHE_TTL))
+        response["ETag"] = etag
+        response["Cache-Control"] = "no-cache"
+        return response
 
     def perform_create(self, serializer):
         instance = serializer.save()
@@ -148,6 +190,213 @@ class ProductChangeLogView(generics.ListAPIView):
         return ProductChangeLog.objects.filter(product_id=pk)[:50]
 
 
+class ProductChangesView(APIView):
+    """
+    Delta del catálogo: GET products/changes/?since=<version>
+    Devuelve los productos modificados y los IDs borrados después de esa versión,
+    más la versión actual para la próxima consulta. Sin since (o con una versión
+    desconocida) devuelve el catálogo completo con reset=true.
+    """
+    permission_classes = [IsAdminOrReadOnly]
+
+    def get(self, request):
+        version = current_version()
+        try:
+            since = int(request.query_params.get("since"))
+        except (TypeError, ValueError):
+            since = None
+
+        reset = since is None or since < 0 or since > version
+        etag = catalog_etag(version, "changes" if reset else f"changes-{since}")
+        if if_none_match(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            response["ETag"] = etag
+            return response
+
+        if reset:
+            products, deleted = Product.objects.select_related("category").all(), []
+        else:
+            products, deleted = changed_since(since)
+
+        response = Response({
+            "version": version,
+            "reset": reset,
+            "products": ProductSerializer(products, many=True).data,
+            "deleted": deleted,
+        })
+        response["ETag"] = etag
+        response["Cache-Control"] = "no-cache"
+        return response
+
+
+# --- Reporte de inventario ---
+INVENTORY_SORTS = {
+    "name_asc": "p.name, p.product_id",
+    "stock_asc": "p.stock_qty, p.name, p.product_id",
+    "stock_desc": "p.stock_qty DESC, p.name, p.product_id",
+}
+INVENTORY_STOCK_STATUS = {
+    "out": "p.stock_qty <= 0",
+    "critical": "p.stock_qty > 0 AND p.stock_qty <= %(threshold)s",
+    "ok": "p.stock_qty > %(threshold)s",
+}
+INVENTORY_MAX_PAGE_SIZE = 200
+
+
+class InventoryReportView(APIView):
+    """
+    Reporte de inventario filtrado y ordenado en el servidor.
+
+    GET catalog/inventory-report/
+      ?stock_status=out|critical|ok  &threshold=5  &category_id=<uuid>
+      &is_active=true|false  &sort=name_asc|stock_asc|stock_desc
+      &page=1  &page_size=50  &export=csv|excel
+
+    summary (una sola consulta agregada) cuenta sobre la categoría elegida:
+    total, active, out_of_stock, critical, ok y matched (filas del filtro).
+    """
+    permission_classes = [IsAuthenticated, IsStaffOrAdmin]
+
+    def get(self, request):
+        params = request.query_params
+
+        try:
+            threshold = Decimal(str(params.get("threshold") or "5"))
+        except Exception:
+            return Response({"detail": "threshold inválido."}, status=status.HTTP_400_BAD_REQUEST)
+        if not threshold.is_finite():
+            return Response({"detail": "threshold inválido."}, status=status.HTTP_400_BAD_REQUEST)
+
+        stock_status = (params.get("stock_status") or "").strip()
+        if stock_status and stock_status not in INVENTORY_STOCK_STATUS:
+            return Response({"detail": "stock_status debe ser 'out', 'critical' u 'ok'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        sort = (params.get("sort") or "name_asc").strip()
+        if sort not in INVENTORY_SORTS:
+            return Response({"detail": "sort debe ser 'name_asc', 'stock_asc' o 'stock_desc'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        values = {"threshold": threshold}
+        scope = ["true"]
+        category_id = (params.get("category_id") or "").strip()
+        if category_id:
+            try:
+                values["category_id"] = str(uuid.UUID(category_id))
+            except ValueError:
+                return Response({"detail": "category_id inválido."}, status=status.HTTP_400_BAD_REQUEST)
+            scope.append("p.category_id = %(category_id)s")
+
+        filters = list(scope)
+        is_active = (params.get("is_active") or "").strip().lower()
+        if is_active in ("true", "false"):
+            filters.append("p.is_active" if is_active == "true" else "NOT p.is_active")
+        if stock_status:
+            filters.append(INVENTORY_STOCK_STATUS[stock_status])
+
+        scope_sql = " AND ".join(scope)
+        filter_sql = " AND ".join(filters)
+        rows_sql = f"""
+            SELECT p.product_id::text AS product_id, p.name, p.sku, c.name AS category_name,
+                   p.cost, p.unit_price, p.stock_qty, p.base_unit, p.is_active
+            FROM public.products p
+            LEFT JOIN public.categories c ON c.category_id = p.category_id
+            WHERE {filter_sql}
+            ORDER BY {INVENTORY_SORTS[sort]}
+        """
+
+        export_format = (params.get("export") or "").strip().lower()
+        if export_format in ("csv", "excel"):
+            return _inventory_export(export_format, iter_query_rows(rows_sql, values), threshold)
+
+        try:
+            page = max(int(params.get("page") or 1), 1)
+            page_size = min(max(int(params.get("page_size") or 50), 1), INVENTORY_MAX_PAGE_SIZE)
+        except ValueError:
+            return Response({"detail": "page/page_size inválidos."}, status=status.HTTP_400_BAD_REQUEST)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT
+                    count(*),
+                    count(*) FILTER (WHERE p.is_active),
+                    count(*) FILTER (WHERE p.stock_qty <= 0),
+                    count(*) FILTER (WHERE p.stock_qty > 0 AND p.stock_qty <= %(threshold)s),
+                    count(*) FILTER (WHERE p.stock_qty > %(threshold)s),
+                    count(*) FILTER (WHERE {filter_sql})
+                FROM public.products p
+                WHERE {scope_sql}
+                """,
+                values,
+            )
+            total, active, out_of_stock, critical, ok, matched = cursor.fetchone()
+
+            cursor.execute(
+                rows_sql + " LIMIT %(limit)s OFFSET %(offset)s",
+                {**values, "limit": page_size, "offset": (page - 1) * page_size},
+            )
+            cols = [d[0] for d in cursor.description]
+            results = [dict(zip(cols, row)) for row in cursor.fetchall()]
+
+        for r in results:
+            for k in ("cost", "unit_price", "stock_qty"):
+                r[k] = str(r[k]) if r[k] is not None else None
+            r["stock_status"] = _stock_status(r["stock_qty"], threshold)
+
+        return Response({
+            "count": int(matched),
+            "page": page,
+            "page_size": page_size,
+            "results": results,
+            "summary": {
+                "total": int(total),
+                "active": int(active),
+                "out_of_stock": int(out_of_stock),
+                "critical": int(critical),
+                "ok": int(ok),
+                "matched": int(matched),
+            },
+        })
+
+
+def _stock_status(stock_qty, threshold: Decimal) -> str:
+    stock = Decimal(str(stock_qty or 0))
+    if stock <= 0:
+        return "out"
+    if stock <= threshold:
+        return "critical"
+    return "ok"
+
+
+def _inventory_export(export_format: str, rows, threshold: Decimal):
+    """Exporta el reporte completo (todas las páginas) por streaming."""
+    labels = {"out": "Sin stock", "critical": "Stock crítico", "ok": "Normal"}
+    headers = ["Nombre", "SKU", "Categoría", "Costo", "Precio", "Stock", "Estado", "Activo"]
+
+    def export_rows():
+        for p in rows:
+            yield [
+                p["name"],
+                p["sku"] or "",
+                p["category_name"] or "",
+                float(p["cost"] or 0),
+                float(p["unit_price"] or 0),
+                float(p["stock_qty"] or 0),
+                labels[_stock_status(p["stock_qty"], threshold)],
+                "Sí" if p["is_active"] else "No",
+            ]
+
+    filename = f"inventario_{timezone.localdate()}"
+    if export_format == "csv":
+        return streaming_csv_response(f"{filename}.csv", headers, export_rows())
+
+    try:
+        xlsx = StreamingXlsx()
+    except ImportError:
+        return Response({"detail": "openpyxl no está instalado."}, status=500)
+    xlsx.add_sheet("Inventario", headers, export_rows())
+    return xlsx.response(f"{filename}.xlsx")
+
+
 # --- Stock adjustment (ajuste manual) ---
 class StockAdjustmentView(APIView):
     permission_classes = [IsAdminOrReadOnly]
@@ -199,10 +448,61 @@ class StockAdjustmentView(APIView):
         }, status=status.HTTP_200_OK)
 
 
+# --- Recepción de inventario en lote ---
+class StockReceiveView(APIView):
+    """
+    Entrada de mercadería de varios productos en una sola transacción.
+    Body: {"reason": "...", "items": [{"product_id": "...", "qty": "10"}, ...]}
+    """
+    permission_classes = [IsAdminOrReadOnly]
+
+    def post(self, request):
+        items = request.data.get("items")
+        reason = str(request.data.get("reason") or "").strip()
+
+        if not isinstance(items, list) or not items:
+            return Response({"detail": "items es requerido."}, status=status.HTTP_400_BAD_REQUEST)
+        if not reason:
+            return Response({"detail": "reason es requerido."}, status=status.HTTP_400_BAD_REQUEST)
+
+        changes = []
+        for idx, item in enumerate(items, start=1):
+            if not isinstance(item, dict) or not item.get("product_id"):
+                return Response({"detail": f"Ítem {idx}: product_id es requerido."}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                qty = Decimal(str(item.get("qty")))
+            except Exception:
+                return Response({"detail": f"Ítem {idx}: qty inválido."}, status=status.HTTP_400_BAD_REQUEST)
+            if not qty.is_finite():
+                return Response({"detail": f"Ítem {idx}: qty inválido."}, status=status.HTTP_400_BAD_REQUEST)
+            if qty <= 0:
+                return Response({"detail": f"Ítem {idx}: qty debe ser > 0."}, status=status.HTTP_400_BAD_REQUEST)
+            changes.append({
+                "product_id": item["product_id"],
+                "qty_change": qty,
+                "movement_type": "purchase",
+                "performed_by": request.user.id,
+                "reason": reason,
+            })
+
+        try:
+            result = apply_stock_changes(changes)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "items": [
+                {"product_id": product_id, "new_stock_qty": str(qty)}
+                for product_id, qty in result.items()
+            ],
+        }, status=status.HTTP_200_OK)
+
+
 # --- Historial de movimientos por producto ---
 class ProductMovementListView(generics.ListAPIView):
     serializer_class = ProductMovementSerializer
     permission_classes = [IsAdminOrReadOnly]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         pk = self.kwargs["pk"]
@@ -212,6 +512,8 @@ class ProductMovementListView(generics.ListAPIView):
         movement_type = self.request.query_params.get("movement_type")
         if movement_type:
             qs = qs.filter(movement_type=movement_type)
+        if "cursor" in self.request.query_params:
+            return qs  # keyset: sin tope, se navega con next_cursor
         limit = min(int(self.request.query_params.get("limit", 50)), 200)
         return qs[:limit]
 
@@ -220,6 +522,7 @@ class ProductMovementListView(generics.ListAPIView):
 class GlobalMovementListView(generics.ListAPIView):
     serializer_class = ProductMovementSerializer
     permission_classes = [IsAdminOrReadOnly]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         qs = ProductMovement.objects.select_related("product", "product__category").all()
@@ -232,10 +535,14 @@ class GlobalMovementListView(generics.ListAPIView):
         category_id = self.request.query_params.get("category_id")
         if category_id:
             qs = qs.filter(product__category_id=category_id)
-        date_from = self.request.query_params.get("date_from")
-        if date_from:
-            qs = qs.filter(created_at__date__gte=date_from)
-        date_to = self.request.query_params.get("date_to")
-        if date_to:
-            qs = qs.filter(created_at__date__lte=date_to)
+        try:
+            qs = qs.filter(**range_lookups(
+                "created_at",
+                self.request.query_params.get("date_from"),
+                self.request.query_params.get("date_to"),
+            ))
+        except ValueError as e:
+            raise ParseError(str(e))
+        if "cursor" in self.request.query_params:
+            return qs  # keyset: sin tope, se navega con next_cursor
         return qs[:200]
@@ -0,0 +1,80 @@
+"""
+Helpers de caché para endpoints de solo lectura.
+
+- Claves versionadas por namespace: bump_version() invalida todas las entradas
+  del namespace sin tener que conocerlas (se incrementa el número de versión).
+  invalidate() hace el bump al confirmar la transacción en curso, para que una
+  lectura concurrente no vuelva a cachear datos previos al commit.
+- cached(): get-or-build con TTL.
+- etag_for() / conditional_response(): ETag + If-None-Match → 304.
+
+Con el backend por defecto (LocMem) cada worker de gunicorn tiene su propia
+caché; el bump solo invalida en el worker que atendió la escritura, así que los
+TTL deben ser cortos.
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def _version_key(namespace: str) -> str:
+    return f"cache-version:{namespace}"
+
+
+def get_version(namespace: str) -> int:
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        version = 1
+        cache.add(_version_key(namespace), version, None)
+    return version
+
+
+def bump_version(namespace: str) -> None:
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        cache.set(_version_key(namespace), get_version(namespace) + 1, None)
+
+
+def invalidate(*namespaces: str) -> None:
+    """Invalida los namespaces cuando la transacción actual hace commit."""
+    def _bump():
+        for namespace in namespaces:
+            bump_version(namespace)
+    transaction.on_commit(_bump)
+
+
+def cached(namespace: str, key: str, builder, timeout: int):
+    """Devuelve el valor cacheado para (namespace, key) o lo construye con builder()."""
+    full_key = f"{namespace}:{get_version(namespace)}:{key}"
+    value = cache.get(full_key)
+    if value is None:
+        value = builder()
+        cache.set(full_key, value, timeout)
+    return value
+
+
+def etag_for(payload) -> str:
+    raw = json.dumps(payload, sort_keys=True, default=str).encode()
+    return '"' + hashlib.md5(raw).hexdigest() + '"'
+
+
+def if_none_match(request, etag: str) -> bool:
+    header = request.META.get("HTTP_IF_NONE_MATCH", "")
+    return etag in [t.strip() for t in header.split(",")] or header.strip() == "*"
+
+
+def conditional_response(request, payload, etag: str = None) -> Response:
+    """Response con ETag; 304 sin cuerpo si el cliente ya tiene esa versión."""
+    etag = etag or etag_for(payload)
+    if if_none_match(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(payload)
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
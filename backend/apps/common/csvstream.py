@@ -0,0 +1,29 @@
+"""
+CSV en streaming: cada fila se escribe y se envía al cliente a medida que se
+genera (StreamingHttpResponse), sin armar el archivo en memoria.
+"""
+import csv
+
+from django.http import StreamingHttpResponse
+
+
+class _Echo:
+    """Pseudo-buffer: csv.writer escribe y devolvemos la línea tal cual."""
+
+    def write(self, value):
+        return value
+
+
+def streaming_csv_response(filename: str, headers: list, rows) -> StreamingHttpResponse:
+    """rows es un iterable de listas; se consume de a una fila."""
+    writer = csv.writer(_Echo())
+
+    def generate():
+        # BOM para que Excel detecte UTF-8 (tildes y ñ)
+        yield "\ufeff" + writer.writerow(headers)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(generate(), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
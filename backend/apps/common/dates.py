@@ -0,0 +1,73 @@
+"""
+Rangos de fechas de negocio (TIME_ZONE, America/Costa_Rica) para filtros SQL.
+
+Filtrar con `col::date >= %s` castea la columna (no usa el índice) y toma la
+fecha en la zona de la sesión de Postgres (UTC), no el día de negocio. En su
+lugar se filtra con límites timestamptz semiabiertos:
+
+    col >= inicio_del_día(date_from) AND col < inicio_del_día(date_to + 1)
+
+- business_today():       fecha de hoy en la zona del negocio.
+- parse_business_date():  'YYYY-MM-DD' → date (ValueError si es inválida).
+- business_bounds():      (date_from, date_to) inclusivos → (inicio, fin) aware.
+- range_filter():         fragmento SQL + params para una columna timestamptz.
+- range_lookups():        lo mismo como kwargs de filtro del ORM (en vez de __date).
+- parse_uuid():           para comparar columnas uuid sin castearlas a text.
+"""
+import uuid
+from datetime import date, datetime, time, timedelta
+
+from django.utils import timezone
+
+
+def business_today() -> date:
+    return timezone.localdate()
+
+
+def parse_business_date(value, default: date = None) -> date:
+    if value in (None, ""):
+        if default is None:
+            raise ValueError("Fecha requerida (YYYY-MM-DD).")
+        return default
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(str(value).strip(), "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(f"Fecha inválida: {value} (formato YYYY-MM-DD).")
+
+
+def day_start(day: date) -> datetime:
+    """Medianoche del día de negocio como datetime aware."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def business_bounds(date_from: date, date_to: date) -> tuple:
+    """Días inclusivos [date_from, date_to] → [inicio, fin) en timestamptz."""
+    return day_start(date_from), day_start(date_to + timedelta(days=1))
+
+
+def range_filter(column: str, date_from: date, date_to: date) -> tuple:
+    """('col >= %s AND col < %s', [inicio, fin]) para el rango de días de negocio."""
+    start, end = business_bounds(date_from, date_to)
+    return f"{column} >= %s AND {column} < %s", [start, end]
+
+
+def range_lookups(field: str, date_from=None, date_to=None) -> dict:
+    """
+    Kwargs de filtro ORM para días de negocio; cada extremo es opcional y puede
+    venir como 'YYYY-MM-DD' (ValueError si es inválido).
+    """
+    lookups = {}
+    if date_from:
+        lookups[f"{field}__gte"] = day_start(parse_business_date(date_from))
+    if date_to:
+        lookups[f"{field}__lt"] = day_start(parse_business_date(date_to) + timedelta(days=1))
+    return lookups
+
+
+def parse_uuid(value, field: str = "id") -> uuid.UUID:
+    try:
+        return uuid.UUID(str(value).strip())
+    except (ValueError, AttributeError):
+        raise ValueError(f"{field} inválido.")
@@ -0,0 +1,100 @@
+"""
+Paginación keyset (por cursor) sobre (created_at, pk).
+
+Se activa cuando el request trae ?cursor (vacío = primera página); sin ese
+parámetro se usa la paginación por número de página de siempre, así que los
+clientes actuales no cambian.
+
+En modo cursor:
+- ORDER BY created_at DESC, pk DESC y WHERE (created_at, pk) < (cursor), sin
+  COUNT(*) ni OFFSET: la página N cuesta lo mismo que la primera.
+- Se piden page_size + 1 filas para saber si hay siguiente página.
+- El cursor es opaco (base64 de la última fila devuelta).
+
+Respuesta: {"next": url | null, "next_cursor": str | null, "results": [...]}
+"""
+import base64
+import json
+import uuid
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+DEFAULT_KEYSET_PAGE_SIZE = 50
+MAX_KEYSET_PAGE_SIZE = 200
+
+
+def encode_cursor(created_at, pk) -> str:
+    raw = json.dumps([created_at.isoformat(), str(pk)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """
+    Retorna (created_at aware, pk uuid) o lanza ValueError. Todas las tablas
+    paginadas por keyset tienen pk uuid; validarlo aquí evita que un cursor
+    bien formado pero manipulado llegue al filtro y termine en 500.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = datetime.fromisoformat(created_at)
+        if created_at.tzinfo is None:
+            raise ValueError("fecha sin zona horaria")
+        return created_at, uuid.UUID(pk)
+    except Exception:
+        raise ValueError("cursor inválido.")
+
+
+class KeysetPagination(PageNumberPagination):
+    cursor_query_param = "cursor"
+    keyset_field = "created_at"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        try:
+            self.keyset_page_size = min(
+                max(int(request.query_params.get("page_size") or DEFAULT_KEYSET_PAGE_SIZE), 1),
+                MAX_KEYSET_PAGE_SIZE,
+            )
+        except ValueError:
+            self.keyset_page_size = DEFAULT_KEYSET_PAGE_SIZE
+
+        field = self.keyset_field
+        queryset = queryset.order_by(f"-{field}", "-pk")
+
+        cursor = request.query_params.get(self.cursor_query_param) or ""
+        if cursor:
+            try:
+                created_at, pk = decode_cursor(cursor)
+            except ValueError as e:
+                raise NotFound(str(e))
+            queryset = queryset.filter(
+                Q(**{f"{field}__lt": created_at}) | Q(**{field: created_at, "pk__lt": pk})
+            )
+
+        rows = list(queryset[: self.keyset_page_size + 1])
+        self.has_next = len(rows) > self.keyset_page_size
+        rows = rows[: self.keyset_page_size]
+        self.next_cursor = (
+            encode_cursor(getattr(rows[-1], field), rows[-1].pk) if self.has_next and rows else None
+        )
+        return rows
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        next_url = None
+        if self.next_cursor:
+            next_url = replace_query_param(
+                self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor
+            )
+        return Response({"next": next_url, "next_cursor": self.next_cursor, "results": data})
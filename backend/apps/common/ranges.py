@@ -0,0 +1,67 @@
+"""
+Respuestas de archivos inmutables en memoria con ETag fuerte y Range.
+
+bytes_response() atiende:
+- If-None-Match → 304.
+- Range: bytes=a-b | a- | -n (un solo rango) → 206 + Content-Range; si el
+  rango no es satisfacible → 416. Múltiples rangos se ignoran (200 completo).
+- If-Range: el rango solo se respeta si el ETag coincide.
+"""
+import re
+
+from django.http import HttpResponse
+
+from .cache import if_none_match
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _parse_range(header: str, size: int):
+    """Retorna (start, end) inclusivo, None si no aplica o "invalid" si no es satisfacible."""
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            return "invalid"
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        return "invalid"
+    return start, min(end, size - 1)
+
+
+def bytes_response(request, content: bytes, content_type: str, filename: str, etag: str) -> HttpResponse:
+    if if_none_match(request, etag):
+        response = HttpResponse(status=304)
+        response["ETag"] = etag
+        return response
+
+    size = len(content)
+    byte_range = None
+    range_header = request.META.get("HTTP_RANGE", "")
+    if range_header:
+        if_range = request.META.get("HTTP_IF_RANGE", "").strip()
+        if not if_range or if_range == etag:
+            byte_range = _parse_range(range_header, size)
+
+    if byte_range == "invalid":
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+    elif byte_range:
+        start, end = byte_range
+        response = HttpResponse(content[start:end + 1], content_type=content_type, status=206)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    else:
+        response = HttpResponse(content, content_type=content_type)
+
+    response["ETag"] = etag
+    response["Accept-Ranges"] = "bytes"
+    response["Cache-Control"] = "private, no-cache"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
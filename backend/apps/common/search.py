@@ -0,0 +1,79 @@
+"""
+Búsqueda difusa con pg_trgm para listados del dashboard (?search=).
+
+Cada tabla buscable tiene un "documento": sus columnas de texto concatenadas,
+con un índice GIN gin_trgm_ops sobre exactamente esa expresión (ver las
+migraciones *_trigram_search de customers, vehicles y catalog). Si se cambian
+las columnas de SEARCH_DOCUMENTS hay que recrear el índice con la misma
+expresión, si no el planner vuelve al seq scan.
+
+Filtro: `term <% documento` (word_similarity sobre el umbral de pg_trgm) OR
+`documento ILIKE '%term%'`; ambos usan el mismo índice GIN (BitmapOr).
+Orden: primero coincidencias exactas de substring, luego por word_similarity.
+
+Términos de menos de MIN_TERM_LENGTH caracteres no generan trigramas útiles
+y se rechazan con ValueError.
+"""
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 100
+
+SEARCH_DOCUMENTS = {
+    "customers": ("full_name", "email", "phone"),
+    "vehicles": ("plate", "vin", "make", "model"),
+    "products": ("name", "sku"),
+}
+
+
+def document_sql(table: str) -> str:
+    """Expresión del documento, calificada con la tabla (igual a la del índice)."""
+    return " || ' ' || ".join(f"coalesce({table}.{column}, '')" for column in SEARCH_DOCUMENTS[table])
+
+
+def clean_term(term) -> str:
+    term = " ".join(str(term or "").split())
+    if len(term) < MIN_TERM_LENGTH:
+        raise ValueError(f"search debe tener al menos {MIN_TERM_LENGTH} caracteres.")
+    return term[:MAX_TERM_LENGTH]
+
+
+def like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def match_sql(table: str, term: str) -> tuple:
+    """(sql, params) de la condición de búsqueda, para SQL crudo o RawSQL."""
+    doc = document_sql(table)
+    return f"(%s <%% ({doc}) OR ({doc}) ILIKE %s)", [term, like_pattern(term)]
+
+
+def rank_sql(table: str, term: str) -> tuple:
+    """(sql, params) del puntaje: 1 extra si contiene el término literal + word_similarity."""
+    doc = document_sql(table)
+    return (
+        f"(CASE WHEN ({doc}) ILIKE %s THEN 1 ELSE 0 END + word_similarity(%s, {doc}))",
+        [like_pattern(term), term],
+    )
+
+
+def trigram_search(queryset, table: str, term):
+    """
+    Filtra el queryset por el término y lo ordena por relevancia (desc), con la
+    pk como desempate. Lanza ValueError si el término es muy corto.
+    """
+    term = clean_term(term)
+    match, match_params = match_sql(table, term)
+    rank, rank_params = rank_sql(table, term)
+    return (
+        queryset.filter(RawSQL(match, match_params, output_field=BooleanField()))
+        .annotate(search_rank=RawSQL(rank, rank_params, output_field=FloatField()))
+        .order_by("-search_rank", "pk")
+    )
+
+
+def contains(table: str, column: str, term: str) -> RawSQL:
+    """Condición `columna ILIKE '%term%'` (usa un índice gin_trgm_ops sobre la columna)."""
+    return RawSQL(f"{table}.{column} ILIKE %s", [like_pattern(term)], output_field=BooleanField())
@@ -0,0 +1,132 @@
+"""
+Instrumentación SQL por request.
+
+SqlStatsMiddleware envuelve cada request con connection.execute_wrapper y
+registra cantidad de consultas, tiempo total en la BD y la consulta más lenta.
+Sirve tanto para el ORM como para el SQL crudo con connection.cursor().
+
+Salida:
+- Header Server-Timing: `db;dur=..;desc="N queries", db-slowest;dur=.., app;dur=..`
+  (visible en la pestaña Network/Timing del navegador).
+- Una línea JSON por request con consultas en el logger "apps.sql" (INFO);
+  los estáticos de WhiteNoise no consultan la BD y no se loguean.
+- Detector de N+1 (opt-in, SQL_NPLUSONE_DETECT): si la misma "forma" de
+  consulta (SQL con literales e IN (...) normalizados) se repite al menos
+  SQL_NPLUSONE_THRESHOLD veces en un request, se loguea un WARNING con la forma.
+
+El wrapper es por conexión y cada hilo de gunicorn tiene su propia conexión,
+así que no hay estado compartido entre requests. Las consultas hechas mientras
+se itera un StreamingHttpResponse (CSV, SSE) quedan fuera de la medición.
+"""
+import json
+import logging
+import re
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger("apps.sql")
+
+SQL_INSTRUMENTATION = getattr(settings, "SQL_INSTRUMENTATION", True)
+SQL_NPLUSONE_DETECT = getattr(settings, "SQL_NPLUSONE_DETECT", False)
+SQL_NPLUSONE_THRESHOLD = getattr(settings, "SQL_NPLUSONE_THRESHOLD", 5)
+SHAPE_MAX_LENGTH = 300
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def statement_shape(sql: str) -> str:
+    """SQL normalizado: sin literales ni largo variable de IN (...), espacios colapsados."""
+    shape = _STRING_RE.sub("?", sql)
+    shape = _NUMBER_RE.sub("?", shape)
+    shape = _IN_LIST_RE.sub("(...)", shape)
+    return _SPACES_RE.sub(" ", shape).strip()
+
+
+class QueryStats:
+    """Execute wrapper que acumula las consultas de un request."""
+
+    def __init__(self, track_shapes: bool = False):
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_sql = ""
+        self.shapes = Counter() if track_shapes else None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.total += elapsed
+            if elapsed >= self.slowest:
+                self.slowest = elapsed
+                self.slowest_sql = sql
+            if self.shapes is not None:
+                self.shapes[statement_shape(sql)] += 1
+
+    def repeated(self, threshold: int) -> list:
+        """[(forma, veces)] de las consultas repetidas al menos `threshold` veces."""
+        if self.shapes is None:
+            return []
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+def server_timing(stats: QueryStats, app_seconds: float) -> str:
+    return ", ".join([
+        f'db;dur={stats.total * 1000:.1f};desc="{stats.count} queries"',
+        f"db-slowest;dur={stats.slowest * 1000:.1f}",
+        f"app;dur={app_seconds * 1000:.1f}",
+    ])
+
+
+class SqlStatsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not SQL_INSTRUMENTATION:
+            return self.get_response(request)
+
+        stats = QueryStats(track_shapes=SQL_NPLUSONE_DETECT)
+        start = time.perf_counter()
+        with connection.execute_wrapper(stats):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        response["Server-Timing"] = server_timing(stats, elapsed)
+        if stats.count:
+            self._log(request, response, stats, elapsed, stats.repeated(SQL_NPLUSONE_THRESHOLD))
+        return response
+
+    def _log(self, request, response, stats, elapsed, repeated):
+        route = getattr(getattr(request, "resolver_match", None), "route", None)
+        logger.info(json.dumps({
+            "event": "sql_stats",
+            "method": request.method,
+            "path": request.path,
+            "route": route,
+            "status": response.status_code,
+            "queries": stats.count,
+            "db_ms": round(stats.total * 1000, 1),
+            "slowest_ms": round(stats.slowest * 1000, 1),
+            "slowest_sql": statement_shape(stats.slowest_sql)[:SHAPE_MAX_LENGTH],
+            "app_ms": round(elapsed * 1000, 1),
+            "repeated": len(repeated),
+        }))
+        for shape, times in repeated:
+            logger.warning(json.dumps({
+                "event": "sql_repeated",
+                "method": request.method,
+                "path": request.path,
+                "route": route,
+                "times": times,
+                "sql": shape[:SHAPE_MAX_LENGTH],
+            }))
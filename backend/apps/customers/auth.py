@@ -1,10 +1,114 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
 import jwt
 from django.conf import settings
+from django.db import transaction
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from .models import Customer
 
 
+# ── Caché de clientes autenticados ────────────────────────────────────────────
+#
+# LRU + TTL en memoria del proceso, por customer_id. Evita el SELECT a
+# public.customers en cada request del portal (recordatorios, vehículos,
+# horarios). Solo guarda clientes activos; las escrituras sobre la fila
+# (customer_update_me, CustomerViewSet) llaman a invalidate_customer().
+# Cada worker de gunicorn tiene su propia copia, así que el TTL acota cuánto
+# tarda otro worker en ver una desactivación.
+
+CUSTOMER_CACHE_TTL = 60       # segundos
+CUSTOMER_CACHE_MAX_SIZE = 1024
+
+
+class _CustomerCache:
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()  # customer_id -> (expires_at, Customer)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, customer_id: str):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(customer_id)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._data[customer_id]
+                self.misses += 1
+                return None
+            self._data.move_to_end(customer_id)
+            self.hits += 1
+            # Copia: la vista no debe poder modificar la instancia compartida
+            return copy.copy(entry[1])
+
+    def set(self, customer_id: str, customer) -> None:
+        with self._lock:
+            self._data[customer_id] = (time.monotonic() + self.ttl, copy.copy(customer))
+            self._data.move_to_end(customer_id)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, customer_id: str) -> None:
+        with self._lock:
+            self._data.pop(customer_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else None,
+            }
+
+
+_customer_cache = _CustomerCache(CUSTOMER_CACHE_MAX_SIZE, CUSTOMER_CACHE_TTL)
+
+
+def invalidate_customer(customer_id) -> None:
+    """
+    Saca al cliente de la caché ahora y de nuevo al hacer commit, para que un
+    request concurrente no vuelva a guardar la fila previa a la escritura.
+    """
+    key = str(customer_id)
+    _customer_cache.delete(key)
+    transaction.on_commit(lambda: _customer_cache.delete(key))
+
+
+def customer_cache_stats() -> dict:
+    """Tamaño y tasa de aciertos de la caché (de este proceso)."""
+    return _customer_cache.stats()
+
+
+def _load_customer(customer_id: str):
+    customer = _customer_cache.get(customer_id)
+    if customer is not None:
+        return customer
+
+    try:
+        customer = Customer.objects.get(customer_id=customer_id)
+    except Customer.DoesNotExist:
+        raise AuthenticationFailed("Cliente no existe.")
+
+    if customer.is_active:
+        _customer_cache.set(customer_id, customer)
+    return customer
+
+
 class CustomerJWTAuthentication(BaseAuthentication):
     """
     JWT SOLO para customers (token_type='customer').
@@ -31,10 +135,7 @@ class CustomerJWTAuthentication(BaseAuthentication):
         if not customer_id:
             raise AuthenticationFailed("Token inválido (sin customer_id).")
 
-        try:
-            customer = Customer.objects.get(customer_id=customer_id)
-        except Customer.DoesNotExist:
-            raise AuthenticationFailed("Cliente no existe.")
+        customer = _load_customer(str(customer_id))
 
         if not customer.is_active:
             raise AuthenticationFailed("Cliente inactivo.")
@@ -0,0 +1,27 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Índice pg_trgm para ?search= de clientes (ver apps/common/search.py).
+    La expresión debe coincidir con document_sql("customers").
+    """
+
+    dependencies = []
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+            CREATE INDEX IF NOT EXISTS customers_search_trgm_idx
+                ON public.customers USING gin (
+                    (coalesce(full_name, '') || ' ' || coalesce(email, '') || ' ' || coalesce(phone, ''))
+                    gin_trgm_ops
+                );
+            """,
+            reverse_sql="""
+            DROP INDEX IF EXISTS public.customers_search_trgm_idx;
+            """,
+        ),
+    ]
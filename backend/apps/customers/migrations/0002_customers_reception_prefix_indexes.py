@@ -0,0 +1,35 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Índices por prefijo para el typeahead de recepción (apps/work_orders/reception.py).
+    Las expresiones deben coincidir con CUSTOMER_*_KEY.
+    """
+
+    dependencies = [
+        ("customers", "0001_customers_trigram_search"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS customers_name_prefix_idx
+                ON public.customers (lower(full_name) text_pattern_ops)
+                WHERE is_active;
+
+            CREATE INDEX IF NOT EXISTS customers_email_prefix_idx
+                ON public.customers (lower(email) text_pattern_ops)
+                WHERE is_active;
+
+            CREATE INDEX IF NOT EXISTS customers_phone_prefix_idx
+                ON public.customers ((regexp_replace(phone, '[^0-9]', '', 'g')) text_pattern_ops)
+                WHERE is_active;
+            """,
+            reverse_sql="""
+            DROP INDEX IF EXISTS public.customers_phone_prefix_idx;
+            DROP INDEX IF EXISTS public.customers_email_prefix_idx;
+            DROP INDEX IF EXISTS public.customers_name_prefix_idx;
+            """,
+        ),
+    ]
@@ -6,6 +6,7 @@ from django.contrib.auth.hashers import make_password, check_password
 from django.db import connection
 from rest_framework import serializers
 
+from .auth import invalidate_customer
 from .models import Customer
 
 
@@ -82,6 +83,7 @@ class CustomerLoginSerializer(serializers.Serializer):
                 "update public.customers set last_login = now(), updated_at = now() where customer_id = %s",
                 [str(customer.customer_id)],
             )
+        invalidate_customer(customer.customer_id)
 
         now = datetime.now(timezone.utc)
         exp = now + timedelta(hours=12)
@@ -4,13 +4,16 @@ from datetime import datetime, timedelta, timezone
 from django.conf import settings
 from django.db import connection
 from rest_framework import status, viewsets
-from rest_framework.decorators import api_view, permission_classes, authentication_classes
+from rest_framework.decorators import action, api_view, permission_classes, authentication_classes
+from rest_framework.exceptions import ParseError
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
 from apps.authentication.permissions import IsStaffOrAdmin
 from apps.authentication.views import LoginRateThrottle
-from .auth import CustomerJWTAuthentication
+from apps.common.search import trigram_search
+from apps.work_orders.reception import invalidate_reception
+from .auth import CustomerJWTAuthentication, customer_cache_stats, invalidate_customer
 from .lockout import get_lockout_status, record_failure, clear_failures
 from .permissions import IsAuthenticatedCustomer
 from .models import Customer
@@ -25,6 +28,16 @@ class CustomerViewSet(viewsets.ModelViewSet):
     serializer_class = CustomerSerializer
     permission_classes = [IsAuthenticated, IsStaffOrAdmin]
 
+    def get_queryset(self):
+        qs = super().get_queryset()
+        search = self.request.query_params.get("search")
+        if search:
+            try:
+                qs = trigram_search(qs, "customers", search)
+            except ValueError as e:
+                raise ParseError(str(e))
+        return qs
+
     def create(self, request, *args, **kwargs):
         data = request.data or {}
         full_name = (data.get("full_name") or "").strip()
@@ -48,6 +61,7 @@ class CustomerViewSet(viewsets.ModelViewSet):
                 [full_name, email, phone, notes, is_active],
             )
             customer_id = cursor.fetchone()[0]
+        invalidate_reception()
 
         customer = Customer.objects.get(customer_id=customer_id)
         return Response(CustomerSerializer(customer).data, status=status.HTTP_201_CREATED)
@@ -90,10 +104,32 @@ class CustomerViewSet(viewsets.ModelViewSet):
                 f"update public.customers set {', '.join(sets)} where customer_id = %s",
                 params,
             )
+        self._invalidate(customer.customer_id)
 
         customer.refresh_from_db()
         return Response(CustomerSerializer(customer).data, status=200)
 
+    def perform_update(self, serializer):
+        # PUT (update heredado); PATCH va por partial_update
+        customer = serializer.save()
+        self._invalidate(customer.customer_id)
+
+    def perform_destroy(self, instance):
+        customer_id = instance.customer_id
+        instance.delete()
+        self._invalidate(customer_id)
+
+    @staticmethod
+    def _invalidate(customer_id) -> None:
+        """Toda escritura sobre el cliente: caché de autenticación y typeahead de recepción."""
+        invalidate_customer(customer_id)
+        invalidate_reception()
+
+    @action(detail=False, methods=["get"], url_path="auth-cache-stats")
+    def auth_cache_stats(self, request):
+        """Aciertos de la caché de autenticación del portal (del worker que responde)."""
+        return Response(customer_cache_stats())
+
 
 @api_view(["POST"])
 @permission_classes([AllowAny])
@@ -105,6 +141,7 @@ def customer_register(request):
     serializer = CustomerRegisterSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
     customer = serializer.save()
+    invalidate_reception()
 
     now = datetime.now(timezone.utc)
     token = jwt.encode(
@@ -211,6 +248,8 @@ def customer_update_me(request):
             f"UPDATE public.customers SET {', '.join(sets)} WHERE customer_id = %s",
             params,
         )
+    invalidate_customer(customer.customer_id)
+    invalidate_reception()
 
     customer.refresh_from_db()
     return Response(CustomerSerializer(customer).data)
@@ -0,0 +1,361 @@
+"""
+Cola de exportaciones pesadas (public.export_jobs).
+
+Los reportes grandes (Excel de OTs y citas, PDF/Excel de cierres) no se
+generan dentro del request: la API encola un job y el proceso worker
+(manage.py run_export_worker) lo toma con SELECT ... FOR UPDATE SKIP LOCKED,
+así varios workers/hilos nunca toman el mismo job.
+
+Ciclo de vida: queued → running → done | failed; done → expired cuando vence
+el archivo (EXPORT_JOB_TTL_HOURS). Un error reintenta con backoff hasta
+max_attempts; ExportJobError (parámetros inválidos, datos inexistentes) falla
+sin reintentar. Un job 'running' cuyo worker murió (locked_at más viejo que
+EXPORT_JOB_TIMEOUT_SECONDS) vuelve a la cola.
+
+Mientras corre el handler, run_job() refresca locked_at cada
+HEARTBEAT_INTERVAL desde un hilo aparte (no depende de que el handler llame a
+ctx.progress()), así un job largo no se reencola con su worker vivo. Progreso,
+resultado y error solo se escriben si el job sigue 'running' y tomado por el
+mismo worker (locked_by): si igual se reencoló y lo tomó otro, el primero no
+pisa lo que escriba el segundo.
+
+Cada kind apunta a un handler(params, ctx) -> ExportResult que vive en la app
+dueña del reporte (JOB_HANDLERS).
+"""
+import hashlib
+import json
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.utils.module_loading import import_string
+
+JOB_HANDLERS = {
+    "appointments_report": "apps.appointments.views.appointments_report_job",
+    "work_orders_report": "apps.work_orders.views.work_orders_report_job",
+    "period_closure_pdf": "apps.period_closures.views.period_closure_pdf_job",
+    "period_closure_excel": "apps.period_closures.views.period_closure_excel_job",
+}
+
+EXPORT_JOB_TTL_HOURS = getattr(settings, "EXPORT_JOB_TTL_HOURS", 24)
+EXPORT_JOB_TIMEOUT_SECONDS = getattr(settings, "EXPORT_JOB_TIMEOUT_SECONDS", 15 * 60)
+EXPORT_JOB_MAX_ATTEMPTS = getattr(settings, "EXPORT_JOB_MAX_ATTEMPTS", 3)
+EXPORT_JOB_MAX_PENDING_PER_USER = getattr(settings, "EXPORT_JOB_MAX_PENDING_PER_USER", 3)
+EXPORT_JOB_RETENTION_DAYS = 30
+RETRY_BASE_SECONDS = 30
+PROGRESS_MIN_INTERVAL = 1.0  # segundos entre escrituras de progreso
+HEARTBEAT_INTERVAL = max(1, min(60, EXPORT_JOB_TIMEOUT_SECONDS // 3))  # segundos
+
+JOB_FIELDS = (
+    "job_id", "kind", "params", "status", "progress", "attempts", "max_attempts",
+    "error", "result_filename", "result_content_type", "result_size",
+    "requested_by", "created_at", "started_at", "finished_at", "expires_at",
+)
+
+
+class ExportJobError(ValueError):
+    """Error permanente de un job (no se reintenta)."""
+
+
+class TooManyPendingJobs(ValueError):
+    pass
+
+
+@dataclass
+class ExportResult:
+    content: bytes
+    filename: str
+    content_type: str
+
+
+class JobContext:
+    """Lo que ve un handler: quién pidió el job y cómo reportar progreso."""
+
+    def __init__(self, job_id, requested_by, locked_by=None):
+        self.job_id = str(job_id)
+        self.requested_by = str(requested_by) if requested_by else None
+        self.locked_by = locked_by
+        self._last_write = 0.0
+
+    def progress(self, percent: int, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_write < PROGRESS_MIN_INTERVAL:
+            return
+        self._last_write = now
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                UPDATE public.export_jobs SET progress = %s, locked_at = now()
+                WHERE job_id = %s AND status = 'running' AND locked_by = %s
+                """,
+                [max(0, min(int(percent), 99)), self.job_id, self.locked_by],
+            )
+
+    def track(self, rows, total: int, start: int = 0, end: int = 90):
+        """Envuelve un iterable de filas reportando progreso entre start y end."""
+        for done, row in enumerate(rows, 1):
+            if total:
+                self.progress(start + (end - start) * done // total)
+            yield row
+
+
+def count_query_rows(sql: str, params) -> int:
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM ({sql}) t", params)
+        return int(cursor.fetchone()[0])
+
+
+def _row_to_dict(cols, row) -> dict:
+    job = dict(zip(cols, row))
+    if isinstance(job.get("params"), str):
+        job["params"] = json.loads(job["params"])
+    return job
+
+
+# ── API ───────────────────────────────────────────────────────────────────────
+
+def enqueue(kind: str, params: dict, requested_by) -> dict:
+    if kind not in JOB_HANDLERS:
+        raise ExportJobError(f"Tipo de exportación desconocido: {kind}.")
+    if not isinstance(params, dict):
+        raise ExportJobError("params debe ser un objeto.")
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM public.export_jobs WHERE requested_by = %s AND status IN ('queued', 'running')",
+            [str(requested_by)],
+        )
+        if cursor.fetchone()[0] >= EXPORT_JOB_MAX_PENDING_PER_USER:
+            raise TooManyPendingJobs(
+                f"Ya tenés {EXPORT_JOB_MAX_PENDING_PER_USER} exportaciones en curso; esperá a que terminen."
+            )
+        cursor.execute(
+            f"""
+            INSERT INTO public.export_jobs (kind, params, requested_by, max_attempts)
+            VALUES (%s, %s::jsonb, %s, %s)
+            RETURNING {", ".join(JOB_FIELDS)}
+            """,
+            [kind, json.dumps(params, default=str), str(requested_by), EXPORT_JOB_MAX_ATTEMPTS],
+        )
+        cols = [d[0] for d in cursor.description]
+        return _row_to_dict(cols, cursor.fetchone())
+
+
+def get_job(job_id) -> dict:
+    """Job por id (None si no existe). Lanza ValueError si el id no es un UUID."""
+    job_id = uuid.UUID(str(job_id))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT {', '.join(JOB_FIELDS)} FROM public.export_jobs WHERE job_id = %s",
+            [str(job_id)],
+        )
+        row = cursor.fetchone()
+        if not row:
+            return None
+        cols = [d[0] for d in cursor.description]
+    return _row_to_dict(cols, row)
+
+
+def list_jobs(requested_by, limit: int = 20) -> list:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT {', '.join(JOB_FIELDS)} FROM public.export_jobs
+            WHERE requested_by = %s
+            ORDER BY created_at DESC
+            LIMIT %s
+            """,
+            [str(requested_by), limit],
+        )
+        cols = [d[0] for d in cursor.description]
+        return [_row_to_dict(cols, row) for row in cursor.fetchall()]
+
+
+def get_result(job_id):
+    """Retorna (content, filename, content_type, sha256) de un job terminado, o None."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT result, result_filename, result_content_type, result_sha256
+            FROM public.export_jobs
+            WHERE job_id = %s AND status = 'done' AND result IS NOT NULL
+            """,
+            [str(job_id)],
+        )
+        row = cursor.fetchone()
+    if not row:
+        return None
+    return bytes(row[0]), row[1], row[2], row[3]
+
+
+# ── Worker ────────────────────────────────────────────────────────────────────
+
+def claim_next(worker_id: str):
+    """Toma el próximo job pendiente (o None). Cada llamada es su propia transacción."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            UPDATE public.export_jobs j
+            SET status = 'running',
+                attempts = j.attempts + 1,
+                progress = 0,
+                error = NULL,
+                locked_by = %s,
+                locked_at = now(),
+                started_at = now()
+            WHERE j.job_id = (
+                SELECT job_id FROM public.export_jobs
+                WHERE status = 'queued' AND run_after <= now()
+                ORDER BY run_after, created_at
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING j.job_id, j.kind, j.params, j.attempts, j.max_attempts, j.requested_by, j.locked_by
+            """,
+            [worker_id],
+        )
+        row = cursor.fetchone()
+        if not row:
+            return None
+        cols = [d[0] for d in cursor.description]
+    return _row_to_dict(cols, row)
+
+
+class _Heartbeat(threading.Thread):
+    """Refresca locked_at del job cada `interval` segundos, en su propia conexión."""
+
+    def __init__(self, job_id: str, locked_by: str, interval: float):
+        super().__init__(daemon=True)
+        self.job_id = job_id
+        self.locked_by = locked_by
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        try:
+            while not self._stop_event.wait(self.interval):
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute(
+                            """
+                            UPDATE public.export_jobs SET locked_at = now()
+                            WHERE job_id = %s AND status = 'running' AND locked_by = %s
+                            """,
+                            [self.job_id, self.locked_by],
+                        )
+                except DatabaseError:
+                    # Conexión caída: reintentar en el próximo latido
+                    connection.close()
+        finally:
+            connection.close()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+def run_job(job: dict) -> None:
+    """Ejecuta el handler del job y guarda el resultado o el error."""
+    job_id, locked_by = str(job["job_id"]), job.get("locked_by")
+    ctx = JobContext(job_id, job.get("requested_by"), locked_by)
+    heartbeat = _Heartbeat(job_id, locked_by, HEARTBEAT_INTERVAL)
+    heartbeat.start()
+    try:
+        try:
+            handler = import_string(JOB_HANDLERS[job["kind"]])
+            result = handler(job["params"] or {}, ctx)
+        finally:
+            heartbeat.stop()
+    except ExportJobError as e:
+        _fail(job, str(e), retry=False)
+        return
+    except Exception as e:
+        _fail(job, f"{type(e).__name__}: {e}", retry=True)
+        return
+    _complete(job, result)
+
+
+def _complete(job: dict, result: ExportResult) -> None:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            UPDATE public.export_jobs
+            SET status = 'done',
+                progress = 100,
+                result = %s,
+                result_filename = %s,
+                result_content_type = %s,
+                result_size = %s,
+                result_sha256 = %s,
+                finished_at = now(),
+                expires_at = now() + (%s * interval '1 hour'),
+                locked_by = NULL,
+                locked_at = NULL
+            WHERE job_id = %s AND status = 'running' AND locked_by = %s
+            """,
+            [
+                result.content, result.filename, result.content_type, len(result.content),
+                hashlib.sha256(result.content).hexdigest(), EXPORT_JOB_TTL_HOURS, str(job["job_id"]),
+                job.get("locked_by"),
+            ],
+        )
+
+
+def _fail(job: dict, error: str, retry: bool) -> None:
+    retry = retry and job["attempts"] < job["max_attempts"]
+    delay = RETRY_BASE_SECONDS * 2 ** (job["attempts"] - 1)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            UPDATE public.export_jobs
+            SET status = CASE WHEN %s THEN 'queued' ELSE 'failed' END,
+                run_after = now() + (%s * interval '1 second'),
+                error = %s,
+                finished_at = CASE WHEN %s THEN NULL ELSE now() END,
+                locked_by = NULL,
+                locked_at = NULL
+            WHERE job_id = %s AND status = 'running' AND locked_by = %s
+            """,
+            [retry, delay, error[:2000], retry, str(job["job_id"]), job.get("locked_by")],
+        )
+
+
+def requeue_stale() -> int:
+    """Devuelve a la cola (o falla) los jobs de workers que murieron a mitad de camino."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            UPDATE public.export_jobs
+            SET status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END,
+                error = 'Worker interrumpido.',
+                finished_at = CASE WHEN attempts < max_attempts THEN NULL ELSE now() END,
+                locked_by = NULL,
+                locked_at = NULL
+            WHERE status = 'running'
+              AND locked_at < now() - (%s * interval '1 second')
+            """,
+            [EXPORT_JOB_TIMEOUT_SECONDS],
+        )
+        return cursor.rowcount
+
+
+def expire_old() -> tuple:
+    """Libera los archivos vencidos y borra jobs viejos. Retorna (expirados, borrados)."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            UPDATE public.export_jobs
+            SET status = 'expired', result = NULL
+            WHERE status = 'done' AND expires_at < now()
+            """
+        )
+        expired = cursor.rowcount
+        cursor.execute(
+            "DELETE FROM public.export_jobs WHERE created_at < now() - (%s * interval '1 day') AND status <> 'running'",
+            [EXPORT_JOB_RETENTION_DAYS],
+        )
+        deleted = cursor.rowcount
+    return expired, deleted
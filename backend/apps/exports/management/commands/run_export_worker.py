@@ -0,0 +1,108 @@
+"""
+Worker de exportaciones en segundo plano.
+
+Uso:
+    python manage.py run_export_worker                 # corre hasta SIGTERM
+    python manage.py run_export_worker --concurrency 2
+    python manage.py run_export_worker --once          # procesa lo pendiente y sale
+
+Cada hilo toma jobs con SELECT ... FOR UPDATE SKIP LOCKED (apps/exports/jobs.py),
+así que se pueden correr varias instancias sin duplicar trabajo. La concurrencia
+total es la suma de --concurrency de todas las instancias. Un hilo además
+devuelve a la cola los jobs de workers caídos y vence los archivos viejos.
+"""
+import os
+import signal
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+
+from apps.exports.jobs import claim_next, expire_old, requeue_stale, run_job
+
+POLL_INTERVAL = 2        # segundos sin trabajo entre consultas a la cola
+MAINTENANCE_INTERVAL = 300
+
+
+class Command(BaseCommand):
+    help = "Procesa la cola de exportaciones (public.export_jobs)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency", type=int, default=getattr(settings, "EXPORT_WORKER_CONCURRENCY", 2),
+            help="Jobs simultáneos en este proceso",
+        )
+        parser.add_argument("--once", action="store_true", help="Procesar lo pendiente y salir")
+
+    def handle(self, *args, **options):
+        self.stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: self.stop.set())
+        signal.signal(signal.SIGINT, lambda *_: self.stop.set())
+
+        worker_base = f"{socket.gethostname()}:{os.getpid()}"
+        concurrency = max(1, options["concurrency"])
+        self.stdout.write(f"Worker de exportaciones {worker_base} (concurrencia {concurrency})")
+
+        self._maintenance()
+        threads = [
+            threading.Thread(target=self._loop, args=(f"{worker_base}:{i}", options["once"]), daemon=True)
+            for i in range(concurrency)
+        ]
+        for t in threads:
+            t.start()
+
+        last_maintenance = time.monotonic()
+        while any(t.is_alive() for t in threads):
+            if self.stop.wait(1):
+                break
+            if time.monotonic() - last_maintenance >= MAINTENANCE_INTERVAL:
+                self._maintenance()
+                last_maintenance = time.monotonic()
+
+        # Esperar a que terminen los jobs en curso (SIGTERM da tiempo al deploy)
+        for t in threads:
+            t.join()
+        self.stdout.write("Worker detenido.")
+
+    def _loop(self, worker_id: str, once: bool) -> None:
+        try:
+            while not self.stop.is_set():
+                try:
+                    job = claim_next(worker_id)
+                except DatabaseError as e:
+                    # Conexión caída (pooler, redeploy de la base): reconectar en la próxima vuelta
+                    self.stderr.write(f"[{worker_id}] error tomando jobs: {e}")
+                    connection.close()
+                    self.stop.wait(POLL_INTERVAL)
+                    continue
+                if job is None:
+                    if once:
+                        return
+                    self.stop.wait(POLL_INTERVAL)
+                    continue
+                started = time.monotonic()
+                try:
+                    run_job(job)
+                except DatabaseError as e:
+                    # No se pudo guardar el resultado: requeue_stale() lo devuelve a la cola
+                    self.stderr.write(f"[{worker_id}] {job['job_id']}: {e}")
+                    connection.close()
+                    continue
+                self.stdout.write(
+                    f"[{worker_id}] {job['kind']} {job['job_id']} intento {job['attempts']} "
+                    f"({time.monotonic() - started:.1f}s)"
+                )
+        finally:
+            connection.close()
+
+    def _maintenance(self) -> None:
+        try:
+            requeued = requeue_stale()
+            expired, deleted = expire_old()
+        finally:
+            connection.close()
+        if requeued or expired or deleted:
+            self.stdout.write(f"Mantenimiento: {requeued} reencolados, {expired} vencidos, {deleted} borrados.")
@@ -0,0 +1,50 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Cola de exportaciones en segundo plano (ver apps/exports/jobs.py).
+    """
+
+    dependencies = []
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE TABLE IF NOT EXISTS public.export_jobs (
+                job_id              uuid        PRIMARY KEY DEFAULT gen_random_uuid(),
+                kind                text        NOT NULL,
+                params              jsonb       NOT NULL DEFAULT '{}'::jsonb,
+                status              text        NOT NULL DEFAULT 'queued'
+                                    CHECK (status IN ('queued', 'running', 'done', 'failed', 'expired')),
+                progress            integer     NOT NULL DEFAULT 0,
+                attempts            integer     NOT NULL DEFAULT 0,
+                max_attempts        integer     NOT NULL DEFAULT 3,
+                run_after           timestamptz NOT NULL DEFAULT now(),
+                locked_by           text,
+                locked_at           timestamptz,
+                error               text,
+                result              bytea,
+                result_filename     text,
+                result_content_type text,
+                result_size         integer,
+                result_sha256       text,
+                requested_by        uuid,
+                created_at          timestamptz NOT NULL DEFAULT now(),
+                started_at          timestamptz,
+                finished_at         timestamptz,
+                expires_at          timestamptz
+            );
+
+            -- Cola: solo las filas pendientes, en orden de llegada
+            CREATE INDEX IF NOT EXISTS export_jobs_queue_idx
+                ON public.export_jobs (run_after, created_at)
+                WHERE status = 'queued';
+            CREATE INDEX IF NOT EXISTS export_jobs_requested_by_idx
+                ON public.export_jobs (requested_by, created_at DESC);
+            """,
+            reverse_sql="""
+            DROP TABLE IF EXISTS public.export_jobs;
+            """,
+        ),
+    ]
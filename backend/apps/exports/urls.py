@@ -0,0 +1,9 @@
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+
+from .views import ExportJobViewSet
+
+router = DefaultRouter()
+router.register(r"export-jobs", ExportJobViewSet, basename="export-jobs")
+
+urlpatterns = [path("", include(router.urls))]
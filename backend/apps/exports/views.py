@@ -0,0 +1,64 @@
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from apps.authentication.permissions import IsStaffOrAdmin
+from apps.common.ranges import bytes_response
+
+from .jobs import ExportJobError, TooManyPendingJobs, enqueue, get_job, get_result, list_jobs
+
+
+def _can_see(request, job) -> bool:
+    return str(job["requested_by"]) == str(request.user.id) or request.user.user_type == "admin"
+
+
+class ExportJobViewSet(viewsets.ViewSet):
+    """
+    Exportaciones en segundo plano.
+
+    POST   /api/export-jobs/                 {"kind": "...", "params": {...}} → 202 + job
+    GET    /api/export-jobs/                 últimos jobs del usuario
+    GET    /api/export-jobs/{id}/            estado y progreso (0-100)
+    GET    /api/export-jobs/{id}/download/   archivo (cuando status = done)
+    """
+    permission_classes = [IsAuthenticated, IsStaffOrAdmin]
+
+    def create(self, request):
+        data = request.data or {}
+        try:
+            job = enqueue((data.get("kind") or "").strip(), data.get("params") or {}, request.user.id)
+        except TooManyPendingJobs as e:
+            return Response({"detail": str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        except ExportJobError as e:
+            return Response({"detail": str(e)}, status=400)
+        return Response(job, status=status.HTTP_202_ACCEPTED)
+
+    def list(self, request):
+        return Response(list_jobs(request.user.id))
+
+    def retrieve(self, request, pk=None):
+        try:
+            job = get_job(pk)
+        except ValueError:
+            job = None
+        if not job or not _can_see(request, job):
+            return Response({"detail": "Exportación no encontrada."}, status=404)
+        return Response(job)
+
+    @action(detail=True, methods=["get"], url_path="download")
+    def download(self, request, pk=None):
+        try:
+            job = get_job(pk)
+        except ValueError:
+            job = None
+        if not job or not _can_see(request, job):
+            return Response({"detail": "Exportación no encontrada."}, status=404)
+        if job["status"] == "expired":
+            return Response({"detail": "El archivo expiró; generá la exportación de nuevo."}, status=410)
+
+        result = get_result(pk)
+        if not result:
+            return Response({"detail": "La exportación todavía no terminó.", "status": job["status"]}, status=409)
+        content, filename, content_type, digest = result
+        return bytes_response(request, content, content_type, filename, f'"{digest[:32]}"')
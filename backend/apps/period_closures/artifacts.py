@@ -0,0 +1,72 @@
+"""
+Caché persistente de los archivos exportados de un cierre (PDF / Excel).
+
+Un cierre en estado 'closed' no cambia hasta que se reabre, así que el archivo
+se genera una vez y se guarda en public.period_closure_artifacts con clave
+(closure_id, format, content_version). content_version sale de updated_at del
+cierre: cualquier UPDATE de la fila (reopen incluido) cambia la clave, y además
+reopen borra los artefactos del cierre (invalidate_artifacts).
+
+Los cierres reabiertos no se cachean: su Excel lee movimientos de caja que
+pueden seguir cambiando.
+"""
+import hashlib
+
+from django.db import connection
+
+CACHEABLE_STATUS = "closed"
+
+
+def content_version(closure) -> str:
+    return closure.updated_at.strftime("%Y%m%d%H%M%S%f")
+
+
+def artifact_etag(closure, fmt: str, digest: str) -> str:
+    return f'"{closure.closure_id}-{fmt}-{digest[:16]}"'
+
+
+def get_artifact(closure, fmt: str, builder):
+    """
+    Retorna (content, sha256) del artefacto; lo genera con builder() y lo
+    guarda si no existe. Dos descargas simultáneas pueden generarlo a la vez:
+    la segunda inserción se descarta (ON CONFLICT DO NOTHING).
+    """
+    if closure.status != CACHEABLE_STATUS:
+        content = builder()
+        return content, hashlib.sha256(content).hexdigest()
+
+    version = content_version(closure)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT content, sha256
+            FROM public.period_closure_artifacts
+            WHERE closure_id = %s AND format = %s AND content_version = %s
+            """,
+            [str(closure.closure_id), fmt, version],
+        )
+        row = cursor.fetchone()
+    if row:
+        return bytes(row[0]), row[1]
+
+    content = builder()
+    digest = hashlib.sha256(content).hexdigest()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO public.period_closure_artifacts
+              (closure_id, format, content_version, content, sha256, size_bytes, created_at)
+            VALUES (%s, %s, %s, %s, %s, %s, now())
+            ON CONFLICT (closure_id, format, content_version) DO NOTHING
+            """,
+            [str(closure.closure_id), fmt, version, content, digest, len(content)],
+        )
+    return content, digest
+
+
+def invalidate_artifacts(closure_id) -> None:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "DELETE FROM public.period_closure_artifacts WHERE closure_id = %s",
+            [str(closure_id)],
+        )
@@ -13,6 +13,8 @@ from datetime import date
 from django.core.management.base import BaseCommand, CommandError
 from django.db import connection
 
+from apps.period_closures.views import _aggregate_period, _open_sessions_in_period
+
 
 class Command(BaseCommand):
     help = "Ejecuta un cierre de periodo automático (mensual)."
@@ -54,15 +56,7 @@ class Command(BaseCommand):
                 return
 
         # Verificar sesiones abiertas
-        with connection.cursor() as cursor:
-            cursor.execute(
-                """
-                SELECT COUNT(*) FROM django_app.cash_sessions
-                WHERE opened_at::date >= %s AND opened_at::date <= %s AND status = 'open'
-                """,
-                [period_start, period_end],
-            )
-            open_count = cursor.fetchone()[0]
+        open_count = len(_open_sessions_in_period(period_start, period_end))
 
         if open_count and not options["force"]:
             raise CommandError(
@@ -70,32 +64,10 @@ class Command(BaseCommand):
                 "Use --force para cerrar de igual manera."
             )
 
-        # Aggregar
-        with connection.cursor() as cursor:
-            cursor.execute(
-                """
-                SELECT
-                    COUNT(DISTINCT cs.cash_session_id),
-                    COUNT(cm.cash_movement_id),
-                    COALESCE(SUM(CASE WHEN cm.amount > 0 THEN cm.amount ELSE 0 END), 0),
-                    COALESCE(SUM(CASE WHEN cm.amount < 0 THEN ABS(cm.amount) ELSE 0 END), 0),
-                    COALESCE(SUM(CASE WHEN cm.movement_type = 'sale'       THEN cm.amount ELSE 0 END), 0),
-                    COALESCE(SUM(CASE WHEN cm.movement_type = 'payment'    THEN cm.amount ELSE 0 END), 0),
-                    COALESCE(SUM(CASE WHEN cm.movement_type = 'withdrawal' THEN cm.amount ELSE 0 END), 0),
-                    COALESCE(SUM(CASE WHEN cm.movement_type = 'refund'     THEN cm.amount ELSE 0 END), 0),
-                    COALESCE(SUM(CASE WHEN cm.movement_type = 'adjustment' THEN cm.amount ELSE 0 END), 0),
-                    COALESCE(SUM(cc.difference), 0)
-                FROM django_app.cash_sessions cs
-                LEFT JOIN django_app.cash_movements cm ON cm.cash_session_id = cs.cash_session_id
-                LEFT JOIN django_app.cash_closings cc  ON cc.cash_session_id = cs.cash_session_id
-                WHERE cs.opened_at::date >= %s AND cs.opened_at::date <= %s
-                """,
-                [period_start, period_end],
-            )
-            row = cursor.fetchone()
-            total_income = float(row[2] or 0)
-            total_expenses = float(row[3] or 0)
+        # Agregar desde el libro diario de caja
+        agg = _aggregate_period(period_start, period_end)
 
+        with connection.cursor() as cursor:
             notes = options["notes"] or f"Cierre automático {folio}."
             cursor.execute(
                 """
@@ -115,10 +87,10 @@ class Command(BaseCommand):
                 """,
                 [
                     closure_type, period_start, period_end, folio,
-                    str(row[2] or 0), str(row[3] or 0), str(total_income - total_expenses),
-                    int(row[0] or 0), int(row[1] or 0), str(row[9] or 0),
-                    str(row[4] or 0), str(row[5] or 0), str(row[6] or 0),
-                    str(row[7] or 0), str(row[8] or 0),
+                    str(agg["total_income"]), str(agg["total_expenses"]), str(agg["total_net"]),
+                    agg["total_sessions"], agg["total_movements"], str(agg["cash_discrepancies"]),
+                    str(agg["sales_total"]), str(agg["payment_total"]), str(agg["withdrawal_total"]),
+                    str(agg["refund_total"]), str(agg["adjustment_total"]),
                     notes,
                 ],
             )
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Archivos exportados (PDF/Excel) de cierres cerrados; ver artifacts.py.
+    """
+
+    dependencies = []
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE TABLE IF NOT EXISTS public.period_closure_artifacts (
+                closure_id      uuid        NOT NULL
+                                REFERENCES public.period_closures (closure_id) ON DELETE CASCADE,
+                format          text        NOT NULL,
+                content_version text        NOT NULL,
+                content         bytea       NOT NULL,
+                sha256          text        NOT NULL,
+                size_bytes      integer     NOT NULL,
+                created_at      timestamptz NOT NULL DEFAULT now(),
+                PRIMARY KEY (closure_id, format, content_version)
+            );
+            """,
+            reverse_sql="""
+            DROP TABLE IF EXISTS public.period_closure_artifacts;
+            """,
+        ),
+    ]
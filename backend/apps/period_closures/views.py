@@ -1,17 +1,24 @@
 import calendar
 import io
-from datetime import date, datetime
+from datetime import date
 from decimal import Decimal
 
+from django.core.exceptions import ValidationError
 from django.db import connection
-from django.http import FileResponse
+from django.utils import timezone
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from apps.authentication.permissions import IsStaffOrAdmin
+from apps.cash_register.ledger import summarize_period
+from apps.common.dates import business_bounds
+from apps.common.ranges import bytes_response
+from apps.common.xlsx import XLSX_CONTENT_TYPE
+from apps.exports.jobs import ExportJobError, ExportResult
 
+from .artifacts import artifact_etag, get_artifact, invalidate_artifacts
 from .models import PeriodClosure
 from .serializers import PeriodClosureListSerializer, PeriodClosureSerializer
 
@@ -25,58 +32,22 @@ def _period_dates(year: int, month: int):
 
 
 def _aggregate_period(period_start: date, period_end: date) -> dict:
-    """Agrega datos financieros del periodo desde cash_register (django_app schema)."""
-    with connection.cursor() as cursor:
-        cursor.execute(
-            """
-            SELECT
-                COUNT(DISTINCT cs.cash_session_id),
-                COUNT(cm.cash_movement_id),
-                COALESCE(SUM(CASE WHEN cm.amount > 0 THEN cm.amount ELSE 0 END), 0),
-                COALESCE(SUM(CASE WHEN cm.amount < 0 THEN ABS(cm.amount) ELSE 0 END), 0),
-                COALESCE(SUM(CASE WHEN cm.movement_type = 'sale'       THEN cm.amount ELSE 0 END), 0),
-                COALESCE(SUM(CASE WHEN cm.movement_type = 'payment'    THEN cm.amount ELSE 0 END), 0),
-                COALESCE(SUM(CASE WHEN cm.movement_type = 'withdrawal' THEN cm.amount ELSE 0 END), 0),
-                COALESCE(SUM(CASE WHEN cm.movement_type = 'refund'     THEN cm.amount ELSE 0 END), 0),
-                COALESCE(SUM(CASE WHEN cm.movement_type = 'adjustment' THEN cm.amount ELSE 0 END), 0),
-                COALESCE(SUM(cc.difference), 0)
-            FROM django_app.cash_sessions cs
-            LEFT JOIN django_app.cash_movements cm ON cm.cash_session_id = cs.cash_session_id
-            LEFT JOIN django_app.cash_closings cc  ON cc.cash_session_id = cs.cash_session_id
-            WHERE cs.opened_at::date >= %s AND cs.opened_at::date <= %s
-            """,
-            [period_start, period_end],
-        )
-        row = cursor.fetchone()
-
-    total_income = Decimal(str(row[2] or 0))
-    total_expenses = Decimal(str(row[3] or 0))
-    return {
-        "total_sessions": int(row[0] or 0),
-        "total_movements": int(row[1] or 0),
-        "total_income": total_income,
-        "total_expenses": total_expenses,
-        "total_net": total_income - total_expenses,
-        "sales_total": Decimal(str(row[4] or 0)),
-        "payment_total": Decimal(str(row[5] or 0)),
-        "withdrawal_total": Decimal(str(row[6] or 0)),
-        "refund_total": Decimal(str(row[7] or 0)),
-        "adjustment_total": Decimal(str(row[8] or 0)),
-        "cash_discrepancies": Decimal(str(row[9] or 0)),
-    }
+    """Agrega datos financieros del periodo desde el libro diario de caja (cash_daily_ledger)."""
+    return summarize_period(period_start, period_end)
 
 
 def _open_sessions_in_period(period_start: date, period_end: date) -> list:
     """Devuelve IDs de sesiones aún abiertas en el periodo."""
+    start, end = business_bounds(period_start, period_end)
     with connection.cursor() as cursor:
         cursor.execute(
             """
             SELECT cash_session_id::text
             FROM django_app.cash_sessions
-            WHERE opened_at::date >= %s AND opened_at::date <= %s
+            WHERE opened_at >= %s AND opened_at < %s
               AND status = 'open'
             """,
-            [period_start, period_end],
+            [start, end],
         )
         return [r[0] for r in cursor.fetchall()]
 
@@ -117,7 +88,7 @@ def _generate_pdf(closure: PeriodClosure) -> bytes:
     elements.append(Paragraph(f"<b>Periodo:</b> {periodo}", styles["Normal"]))
     elements.append(Paragraph(f"<b>Estado:</b> {closure.status.title()}", styles["Normal"]))
     elements.append(Paragraph(
-        f"<b>Cerrado el:</b> {closure.closed_at.strftime('%d/%m/%Y %H:%M') if closure.closed_at else '—'}",
+        f"<b>Cerrado el:</b> {timezone.localtime(closure.closed_at).strftime('%d/%m/%Y %H:%M') if closure.closed_at else '—'}",
         styles["Normal"],
     ))
     elements.append(Spacer(1, 0.6 * cm))
@@ -255,14 +226,14 @@ def _generate_excel(closure: PeriodClosure) -> bytes:
                 cm.created_at
             FROM django_app.cash_movements cm
             JOIN django_app.cash_sessions cs ON cs.cash_session_id = cm.cash_session_id
-            WHERE cs.opened_at::date >= %s AND cs.opened_at::date <= %s
+            WHERE cs.opened_at >= %s AND cs.opened_at < %s
             ORDER BY cm.created_at ASC
             """,
-            [closure.period_start, closure.period_end],
+            list(business_bounds(closure.period_start, closure.period_end)),
         )
         for r in cursor.fetchall():
             session_short = str(r[0])[:8] if r[0] else "—"
-            created_at = r[5].strftime("%d/%m/%Y %H:%M") if r[5] else "—"
+            created_at = timezone.localtime(r[5]).strftime("%d/%m/%Y %H:%M") if r[5] else "—"
             ws2.append([session_short, r[1], r[2] or "", float(r[3] or 0), r[4] or "—", created_at])
 
     for col in ["A", "B", "C", "D", "E", "F"]:
@@ -273,6 +244,28 @@ def _generate_excel(closure: PeriodClosure) -> bytes:
     return buffer.getvalue()
 
 
+# ── Export jobs ────────────────────────────────────────────────────────────────
+
+def _closure_job(params, ctx, fmt: str, builder, content_type: str, extension: str) -> ExportResult:
+    try:
+        closure = PeriodClosure.objects.get(closure_id=params.get("closure_id"))
+    except (PeriodClosure.DoesNotExist, ValueError, ValidationError):
+        raise ExportJobError("Cierre no encontrado.")
+    content, _ = get_artifact(closure, fmt, lambda: builder(closure))
+    _insert_audit(str(closure.closure_id), f"exported_{fmt}", ctx.requested_by)
+    return ExportResult(content, f"{closure.folio}.{extension}", content_type)
+
+
+def period_closure_pdf_job(params, ctx):
+    """Handler del export job 'period_closure_pdf' (ver apps/exports/jobs.py)."""
+    return _closure_job(params, ctx, "pdf", _generate_pdf, "application/pdf", "pdf")
+
+
+def period_closure_excel_job(params, ctx):
+    """Handler del export job 'period_closure_excel' (ver apps/exports/jobs.py)."""
+    return _closure_job(params, ctx, "excel", _generate_excel, XLSX_CONTENT_TYPE, "xlsx")
+
+
 # ── ViewSet ────────────────────────────────────────────────────────────────────
 
 class PeriodClosureViewSet(viewsets.ModelViewSet):
@@ -431,37 +424,34 @@ class PeriodClosureViewSet(viewsets.ModelViewSet):
                 [user_id, reopen_reason, str(closure.closure_id)],
             )
 
+        invalidate_artifacts(closure.closure_id)
         _insert_audit(str(closure.closure_id), "reopened", user_id, reopen_reason)
 
         closure = PeriodClosure.objects.prefetch_related("audit_entries").get(closure_id=closure.closure_id)
         return Response(PeriodClosureSerializer(closure).data)
 
-    # ── GET /api/period-closures/{id}/export/pdf/ ───────────────────────────
-    @action(detail=True, methods=["get"], url_path="export/pdf")
-    def export_pdf(self, request, pk=None):
+    def _export(self, request, fmt: str, builder, content_type: str, extension: str):
         closure = self.get_object()
-        pdf_bytes = _generate_pdf(closure)
-        _insert_audit(str(closure.closure_id), "exported_pdf", str(request.user.id))
-
-        response = FileResponse(
-            io.BytesIO(pdf_bytes),
-            content_type="application/pdf",
-            as_attachment=True,
-            filename=f"{closure.folio}.pdf",
+        content, digest = get_artifact(closure, fmt, lambda: builder(closure))
+        response = bytes_response(
+            request, content, content_type, f"{closure.folio}.{extension}", artifact_etag(closure, fmt, digest)
         )
+        # Auditar descargas reales: no las revalidaciones (304) ni la continuación de un Range
+        if response.status_code == 200 or (
+            response.status_code == 206 and response["Content-Range"].startswith("bytes 0-")
+        ):
+            _insert_audit(str(closure.closure_id), f"exported_{fmt}", str(request.user.id))
         return response
 
+    # ── GET /api/period-closures/{id}/export/pdf/ ───────────────────────────
+    @action(detail=True, methods=["get"], url_path="export/pdf")
+    def export_pdf(self, request, pk=None):
+        return self._export(request, "pdf", _generate_pdf, "application/pdf", "pdf")
+
     # ── GET /api/period-closures/{id}/export/excel/ ─────────────────────────
     @action(detail=True, methods=["get"], url_path="export/excel")
     def export_excel(self, request, pk=None):
-        closure = self.get_object()
-        excel_bytes = _generate_excel(closure)
-        _insert_audit(str(closure.closure_id), "exported_excel", str(request.user.id))
-
-        response = FileResponse(
-            io.BytesIO(excel_bytes),
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            as_attachment=True,
-            filename=f"{closure.folio}.xlsx",
+        return self._export(
+            request, "excel", _generate_excel,
+            XLSX_CONTENT_TYPE, "xlsx",
         )
-        return response
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Índices pg_trgm de vehículos (ver apps/common/search.py): el documento de
+    ?search= (debe coincidir con document_sql("vehicles")) y la placa sola
+    para el filtro ?plate= (ILIKE '%...%').
+    """
+
+    dependencies = []
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+            CREATE INDEX IF NOT EXISTS vehicles_search_trgm_idx
+                ON public.vehicles USING gin (
+                    (coalesce(plate, '') || ' ' || coalesce(vin, '') || ' ' || coalesce(make, '') || ' ' || coalesce(model, ''))
+                    gin_trgm_ops
+                );
+            CREATE INDEX IF NOT EXISTS vehicles_plate_trgm_idx
+                ON public.vehicles USING gin (plate gin_trgm_ops);
+            """,
+            reverse_sql="""
+            DROP INDEX IF EXISTS public.vehicles_plate_trgm_idx;
+            DROP INDEX IF EXISTS public.vehicles_search_trgm_idx;
+            """,
+        ),
+    ]
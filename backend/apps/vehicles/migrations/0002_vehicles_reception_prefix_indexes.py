@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Índices para el typeahead de recepción (apps/work_orders/reception.py):
+    placa normalizada por prefijo (igual a VEHICLE_PLATE_KEY) y vehículos de
+    un cliente.
+    """
+
+    dependencies = [
+        ("vehicles", "0001_vehicles_trigram_search"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS vehicles_plate_prefix_idx
+                ON public.vehicles ((upper(regexp_replace(plate, '[^A-Za-z0-9]', '', 'g'))) text_pattern_ops);
+
+            CREATE INDEX IF NOT EXISTS vehicles_customer_idx
+                ON public.vehicles (customer_id);
+            """,
+            reverse_sql="""
+            DROP INDEX IF EXISTS public.vehicles_customer_idx;
+            DROP INDEX IF EXISTS public.vehicles_plate_prefix_idx;
+            """,
+        ),
+    ]
@@ -1,11 +1,14 @@
 from django.db import connection
 from rest_framework import mixins, status, viewsets
+from rest_framework.exceptions import ParseError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from apps.authentication.permissions import IsStaffOrAdmin
+from apps.common.search import contains, trigram_search
 from apps.customers.auth import CustomerJWTAuthentication
 from apps.customers.permissions import IsAuthenticatedCustomer
+from apps.work_orders.reception import invalidate_reception
 
 from .models import Vehicle
 from .serializers import VehicleLiteSerializer, VehicleSerializer
@@ -22,9 +25,16 @@ class VehicleViewSet(viewsets.ModelViewSet):
         if customer_id:
             qs = qs.filter(customer_id=customer_id)
 
-        plate = self.request.query_params.get("plate")
+        plate = (self.request.query_params.get("plate") or "").strip()
         if plate:
-            qs = qs.filter(plate__icontains=str(plate).strip())
+            qs = qs.filter(contains("vehicles", "plate", plate))
+
+        search = self.request.query_params.get("search")
+        if search:
+            try:
+                qs = trigram_search(qs, "vehicles", search)
+            except ValueError as e:
+                raise ParseError(str(e))
 
         return qs
 
@@ -58,6 +68,7 @@ class VehicleViewSet(viewsets.ModelViewSet):
                 [customer_id, plate, make, model, year, vin, color, notes, image_url],
             )
             vehicle_id = cursor.fetchone()[0]
+        invalidate_reception()
 
         v = Vehicle.objects.select_related("customer").get(vehicle_id=vehicle_id)
         return Response(self.get_serializer(v).data, status=status.HTTP_201_CREATED)
@@ -106,6 +117,7 @@ class VehicleViewSet(viewsets.ModelViewSet):
                 f"update public.vehicles set {', '.join(sets)} where vehicle_id = %s",
                 params,
             )
+        invalidate_reception()
 
         v.refresh_from_db()
         v = Vehicle.objects.select_related("customer").get(vehicle_id=v.vehicle_id)
@@ -115,6 +127,7 @@ class VehicleViewSet(viewsets.ModelViewSet):
         v = self.get_object()
         with connection.cursor() as cursor:
             cursor.execute("delete from public.vehicles where vehicle_id = %s", [str(v.vehicle_id)])
+        invalidate_reception()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -156,6 +169,7 @@ class CustomerVehicleViewSet(
                 [str(customer.customer_id), plate, make, model, year, color, image_url],
             )
             vehicle_id = cursor.fetchone()[0]
+        invalidate_reception()
 
         v = Vehicle.objects.get(vehicle_id=vehicle_id)
         return Response(VehicleLiteSerializer(v).data, status=status.HTTP_201_CREATED)
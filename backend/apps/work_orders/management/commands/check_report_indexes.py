@@ -0,0 +1,97 @@
+"""
+Control de regresión: los filtros por fecha de los reportes usan índices.
+
+Uso:
+    python manage.py check_report_indexes --date-from 2026-01-01 --date-to 2026-01-31
+
+Corre EXPLAIN (FORMAT JSON) sobre las consultas de reportes con los filtros de
+apps/common/dates.py y verifica que la tabla filtrada se lea con un Index /
+Bitmap scan. Se desactiva enable_seqscan dentro de una transacción para que el
+resultado no dependa del volumen de datos: con un predicado sargable el
+planner elige el índice; con `col::date >= ...` no puede y cae a Seq Scan.
+Falla (exit != 0) si alguna consulta no usa índice.
+"""
+import json
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.appointments.views import _appointment_report_query
+from apps.catalog.models import ProductMovement
+from apps.common.dates import business_bounds, business_today, parse_business_date, range_lookups
+from apps.work_orders.views import _work_order_report_query
+
+
+def _scans(plan: dict, relation: str) -> list:
+    """Tipos de nodo que leen `relation` en el plan (recursivo)."""
+    found = []
+    if plan.get("Relation Name") == relation:
+        found.append(plan["Node Type"])
+    for child in plan.get("Plans", []):
+        found.extend(_scans(child, relation))
+    return found
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Verifica con EXPLAIN que los filtros de fecha/uuid de los reportes usen índices."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date-from", default=None, help="YYYY-MM-DD (default: primer día del mes)")
+        parser.add_argument("--date-to", default=None, help="YYYY-MM-DD (default: hoy)")
+
+    def handle(self, *args, **options):
+        today = business_today()
+        date_from = parse_business_date(options["date_from"], today.replace(day=1))
+        date_to = parse_business_date(options["date_to"], today)
+        params = {"date_from": str(date_from), "date_to": str(date_to)}
+        any_uuid = str(uuid.uuid4())
+
+        appt_sql, appt_values, _, _ = _appointment_report_query({**params, "service_id": any_uuid})
+        wo_sql, wo_values, _, _ = _work_order_report_query({**params, "mechanic_id": any_uuid})
+        start, end = business_bounds(date_from, date_to)
+
+        cases = [
+            ("reporte de citas", "appointments", appt_sql, appt_values),
+            ("reporte de OTs", "work_orders", wo_sql, wo_values),
+            (
+                "sesiones de caja del periodo",
+                "cash_sessions",
+                "SELECT cash_session_id FROM django_app.cash_sessions WHERE opened_at >= %s AND opened_at < %s",
+                [start, end],
+            ),
+        ]
+        movements_qs = ProductMovement.objects.filter(**range_lookups("created_at", date_from, date_to))
+
+        failures = []
+        try:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+                    for label, relation, sql, values in cases:
+                        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", values)
+                        plan = cursor.fetchone()[0]
+                        if isinstance(plan, str):
+                            plan = json.loads(plan)
+                        failures += self._check(label, relation, _scans(plan[0]["Plan"], relation))
+
+                plan = json.loads(movements_qs.explain(format="json"))
+                failures += self._check("historial de movimientos", "product_movements",
+                                        _scans(plan[0]["Plan"], "product_movements"))
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        if failures:
+            raise CommandError("Consultas sin índice: " + ", ".join(failures))
+        self.stdout.write(self.style.SUCCESS("OK: todos los filtros usan índices."))
+
+    def _check(self, label: str, relation: str, scans: list) -> list:
+        ok = bool(scans) and all("Index" in s or "Bitmap" in s for s in scans)
+        mark = "OK " if ok else "ERR"
+        self.stdout.write(f"[{mark}] {label:<30} {relation:<18} {', '.join(scans) or '—'}")
+        return [] if ok else [label]
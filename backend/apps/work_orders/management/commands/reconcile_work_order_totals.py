@@ -0,0 +1,52 @@
+"""
+Reconciliación de los totales de líneas por OT (work_orders.services_total /
+products_total).
+
+Uso:
+    python manage.py reconcile_work_order_totals            # solo reporta diferencias
+    python manage.py reconcile_work_order_totals --rebuild  # recalcula y vuelve a comparar
+
+Compara cada OT contra la suma de sus work_order_services y work_order_products.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.work_orders.totals import diff_totals, rebuild_totals
+
+
+class Command(BaseCommand):
+    help = "Compara (y opcionalmente recalcula) los totales de OTs contra sus líneas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true", help="Recalcular los totales desde las líneas")
+        parser.add_argument("--limit", type=int, default=50, help="Máximo de diferencias a mostrar")
+
+    def handle(self, *args, **options):
+        diffs = diff_totals()
+        self._report(diffs, options["limit"])
+
+        if not options["rebuild"]:
+            if diffs:
+                raise CommandError(f"{len(diffs)} OT(s) con totales distintos a sus líneas. Use --rebuild para corregir.")
+            return
+
+        with transaction.atomic():
+            updated = rebuild_totals()
+        self.stdout.write(f"Totales recalculados: {updated} OT(s).")
+
+        remaining = diff_totals()
+        if remaining:
+            self._report(remaining, options["limit"])
+            raise CommandError(f"{len(remaining)} OT(s) siguen sin coincidir tras recalcular.")
+        self.stdout.write(self.style.SUCCESS("Totales consistentes con las líneas."))
+
+    def _report(self, diffs: list, limit: int) -> None:
+        if not diffs:
+            self.stdout.write(self.style.SUCCESS("Sin diferencias."))
+            return
+        self.stdout.write(self.style.WARNING(f"{len(diffs)} diferencia(s):"))
+        for d in diffs[:limit]:
+            self.stdout.write(
+                f"  {d['work_order_id']}: servicios={d['stored_services']}/{d['raw_services']} "
+                f"productos={d['stored_products']}/{d['raw_products']} (guardado/líneas)"
+            )
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Índice para la paginación keyset (created_at, pk) del listado de OTs.
+    """
+
+    dependencies = []
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS work_orders_keyset_idx
+                ON public.work_orders (created_at DESC, work_order_id DESC);
+            """,
+            reverse_sql="""
+            DROP INDEX IF EXISTS public.work_orders_keyset_idx;
+            """,
+        ),
+    ]
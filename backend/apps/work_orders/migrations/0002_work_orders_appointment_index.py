@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Índice para buscar la OT de una cita (subconsulta de los listados de citas).
+    """
+
+    dependencies = [
+        ("work_orders", "0001_work_orders_keyset_index"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS work_orders_appointment_idx
+                ON public.work_orders (appointment_id, created_at, work_order_id)
+                WHERE appointment_id IS NOT NULL;
+            """,
+            reverse_sql="""
+            DROP INDEX IF EXISTS public.work_orders_appointment_idx;
+            """,
+        ),
+    ]
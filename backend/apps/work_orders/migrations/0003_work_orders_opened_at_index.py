@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Índice para filtros por rango de fecha (límites timestamptz, ver common/dates.py).
+    """
+
+    dependencies = [
+        ("work_orders", "0002_work_orders_appointment_index"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS work_orders_opened_at_idx
+                ON public.work_orders (opened_at);
+            """,
+            reverse_sql="""
+            DROP INDEX IF EXISTS public.work_orders_opened_at_idx;
+            """,
+        ),
+    ]
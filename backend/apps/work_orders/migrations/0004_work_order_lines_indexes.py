@@ -0,0 +1,27 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Índices por OT en las tablas de líneas: el detalle completo (/full/), los
+    listados ?work_order_id= y la huella del ETag filtran por work_order_id.
+    """
+
+    dependencies = [
+        ("work_orders", "0003_work_orders_opened_at_index"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS work_order_services_work_order_idx
+                ON public.work_order_services (work_order_id);
+            CREATE INDEX IF NOT EXISTS work_order_products_work_order_idx
+                ON public.work_order_products (work_order_id);
+            """,
+            reverse_sql="""
+            DROP INDEX IF EXISTS public.work_order_products_work_order_idx;
+            DROP INDEX IF EXISTS public.work_order_services_work_order_idx;
+            """,
+        ),
+    ]
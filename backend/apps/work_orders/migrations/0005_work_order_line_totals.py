@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Totales de líneas guardados en la OT (ver work_orders/totals.py).
+    Se inicializan desde las líneas existentes; después los mantienen las
+    vistas de líneas con deltas en la misma transacción.
+    """
+
+    dependencies = [
+        ("work_orders", "0004_work_order_lines_indexes"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            ALTER TABLE public.work_orders
+                ADD COLUMN IF NOT EXISTS services_total numeric(14, 2) NOT NULL DEFAULT 0,
+                ADD COLUMN IF NOT EXISTS products_total numeric(14, 2) NOT NULL DEFAULT 0;
+
+            UPDATE public.work_orders wo
+            SET services_total = coalesce((SELECT sum(round(l.qty * l.unit_price, 2))
+                                           FROM public.work_order_services l
+                                           WHERE l.work_order_id = wo.work_order_id), 0),
+                products_total = coalesce((SELECT sum(round(l.qty * l.unit_price, 2))
+                                           FROM public.work_order_products l
+                                           WHERE l.work_order_id = wo.work_order_id), 0);
+            """,
+            reverse_sql="""
+            ALTER TABLE public.work_orders
+                DROP COLUMN IF EXISTS products_total,
+                DROP COLUMN IF EXISTS services_total;
+            """,
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Índices parciales sobre OTs abiertas (reception.OPEN_STATUSES): el
+    dropdown de caja (las más recientes) y el typeahead de recepción (por
+    cliente o vehículo).
+    """
+
+    dependencies = [
+        ("work_orders", "0005_work_order_line_totals"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS work_orders_open_opened_at_idx
+                ON public.work_orders (opened_at DESC, work_order_id DESC)
+                WHERE status IN ('open', 'in_progress', 'ready');
+
+            CREATE INDEX IF NOT EXISTS work_orders_open_customer_idx
+                ON public.work_orders (customer_id)
+                WHERE status IN ('open', 'in_progress', 'ready');
+
+            CREATE INDEX IF NOT EXISTS work_orders_open_vehicle_idx
+                ON public.work_orders (vehicle_id)
+                WHERE status IN ('open', 'in_progress', 'ready');
+            """,
+            reverse_sql="""
+            DROP INDEX IF EXISTS public.work_orders_open_vehicle_idx;
+            DROP INDEX IF EXISTS public.work_orders_open_customer_idx;
+            DROP INDEX IF EXISTS public.work_orders_open_opened_at_idx;
+            """,
+        ),
+    ]
@@ -41,6 +41,9 @@ class WorkOrder(models.Model):
     customer_symptoms = models.TextField(db_column="customer_symptoms", null=True, blank=True)
     diagnosis = models.TextField(db_column="diagnosis", null=True, blank=True)
     estimated_total = models.DecimalField(db_column="estimated_total", max_digits=12, decimal_places=2, null=True, blank=True)
+    # Mantenidos por las vistas de líneas (ver totals.py); no se editan a mano.
+    services_total = models.DecimalField(db_column="services_total", max_digits=14, decimal_places=2, default=0)
+    products_total = models.DecimalField(db_column="products_total", max_digits=14, decimal_places=2, default=0)
     authorization_status = models.TextField(db_column="authorization_status")
     authorized_at = models.DateTimeField(db_column="authorized_at", null=True, blank=True)
     authorized_by = models.TextField(db_column="authorized_by", null=True, blank=True)
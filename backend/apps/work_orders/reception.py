@@ -0,0 +1,310 @@
+"""
+Búsqueda de recepción (typeahead) y listado de OTs abiertas para caja.
+
+typeahead(): un solo round-trip que devuelve resultados mezclados y ordenados
+(cliente, vehículo, OT abierta, cita próxima) para lo que se va tecleando:
+nombre, correo, teléfono o placa. Todo por prefijo, con índices btree
+text_pattern_ops sobre exactamente estas expresiones (ver migraciones
+*_reception_prefix_indexes); si se cambia una expresión hay que recrear su
+índice, si no el planner vuelve al seq scan:
+
+- nombre:   lower(full_name)       LIKE 'mar%'
+- correo:   lower(email)           LIKE 'mar%'
+- teléfono: solo dígitos           LIKE '8812%'   (desde MIN_DIGITS dígitos)
+- placa:    mayúsculas sin guiones LIKE 'BKR1%'   ('bkr-1' = 'BKR 1' = 'bkr1')
+
+Las OTs abiertas y las citas próximas salen de los clientes y vehículos que
+coinciden (índices parciales por customer_id / vehicle_id) y heredan su
+puntaje: 3 = coincidencia exacta, 2 = prefijo de nombre o placa, 1 = prefijo
+de correo o teléfono. A igual puntaje van primero las OTs (es a donde salta
+recepción), luego citas, vehículos y clientes.
+
+La respuesta se cachea por prefijo normalizado con TTL corto
+(TYPEAHEAD_CACHE_TTL): el frontend dispara una búsqueda por tecla y varias
+recepcionistas suelen teclear lo mismo (la placa del carro que entra). Las
+escrituras sobre clientes, vehículos, OTs y citas llaman a
+invalidate_reception(); con LocMem eso solo invalida el worker que atendió la
+escritura, el TTL acota lo que tarda en verse en los demás.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+
+from apps.common.cache import cached, invalidate
+from apps.common.dates import business_today, day_start
+
+RECEPTION_CACHE_NAMESPACE = "reception-typeahead"
+TYPEAHEAD_CACHE_TTL = 10  # segundos
+
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 60
+MIN_DIGITS = 3
+TYPEAHEAD_DEFAULT_LIMIT = 5
+TYPEAHEAD_MAX_LIMIT = 10
+
+OPEN_STATUSES = ("open", "in_progress", "ready")
+CLOSED_APPOINTMENT_STATUSES = ("completed", "cancelled")
+OPEN_SUMMARY_LIMIT = 100
+
+# Expresiones indexadas (deben coincidir con las migraciones)
+CUSTOMER_NAME_KEY = "lower(full_name)"
+CUSTOMER_EMAIL_KEY = "lower(email)"
+CUSTOMER_PHONE_KEY = "regexp_replace(phone, '[^0-9]', '', 'g')"
+VEHICLE_PLATE_KEY = "upper(regexp_replace(plate, '[^A-Za-z0-9]', '', 'g'))"
+
+# Literales para el SQL (constantes, así el planner puede usar los índices parciales)
+_OPEN_STATUSES_SQL = "(" + ", ".join(f"'{s}'" for s in OPEN_STATUSES) + ")"
+_CLOSED_APPOINTMENT_STATUSES_SQL = "(" + ", ".join(f"'{s}'" for s in CLOSED_APPOINTMENT_STATUSES) + ")"
+
+# Orden a igual puntaje
+_TYPE_ORDER = {"work_order": 0, "appointment": 1, "vehicle": 2, "customer": 3}
+
+
+def invalidate_reception() -> None:
+    invalidate(RECEPTION_CACHE_NAMESPACE)
+
+
+def _prefix(value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
+
+
+def parse_term(raw) -> dict:
+    """
+    Normaliza el término una sola vez (también es la clave de caché).
+    ValueError si es muy corto.
+    """
+    text = " ".join(str(raw or "").split()).lower()[:MAX_TERM_LENGTH]
+    if len(text) < MIN_TERM_LENGTH:
+        raise ValueError(f"q debe tener al menos {MIN_TERM_LENGTH} caracteres.")
+    digits = re.sub(r"\D", "", text)
+    plate = re.sub(r"[^0-9a-z]", "", text).upper()
+    return {
+        "text": text,
+        "digits": digits if len(digits) >= MIN_DIGITS else None,
+        "plate": plate if len(plate) >= MIN_TERM_LENGTH else None,
+    }
+
+
+def parse_limit(raw) -> int:
+    if raw in (None, ""):
+        return TYPEAHEAD_DEFAULT_LIMIT
+    try:
+        limit = int(raw)
+    except (TypeError, ValueError):
+        raise ValueError("limit debe ser un entero.")
+    return max(1, min(limit, TYPEAHEAD_MAX_LIMIT))
+
+
+# Etiqueta de una OT (mismo texto que mostraba el dropdown de caja).
+# Requiere los alias wo, cu, ve y el parámetro %(tz)s.
+_WORK_ORDER_DISPLAY_SQL = """
+    coalesce(cu.full_name, '—')
+    || ' — ' || concat_ws(' ', nullif(ve.make, ''), nullif(ve.model, ''), nullif(ve.plate, ''))
+    || ' — ' || coalesce(to_char(wo.opened_at AT TIME ZONE %(tz)s, 'DD/MM/YYYY'), '')
+"""
+
+_TYPEAHEAD_SQL = """
+WITH c AS (
+    SELECT customer_id, full_name, phone, email,
+           CASE WHEN {name_key} = %(text)s OR {phone_key} = %(digits)s THEN 3
+                WHEN {name_key} LIKE %(text_prefix)s THEN 2
+                ELSE 1 END AS rank
+    FROM public.customers
+    WHERE is_active AND ({customer_where})
+    ORDER BY rank DESC, full_name
+    LIMIT %(limit)s
+),
+v AS (
+    SELECT vehicle_id, customer_id, plate, make, model,
+           CASE WHEN {plate_key} = %(plate)s THEN 3 ELSE 2 END AS rank
+    FROM public.vehicles
+    WHERE {vehicle_where}
+    ORDER BY rank DESC, plate
+    LIMIT %(limit)s
+),
+wo_ids AS (
+    SELECT wo.work_order_id, c.rank
+    FROM c JOIN public.work_orders wo ON wo.customer_id = c.customer_id
+    WHERE wo.status IN {open_statuses}
+    UNION ALL
+    SELECT wo.work_order_id, v.rank
+    FROM v JOIN public.work_orders wo ON wo.vehicle_id = v.vehicle_id
+    WHERE wo.status IN {open_statuses}
+),
+w AS (
+    SELECT wo.work_order_id, wo.customer_id, wo.vehicle_id, wo.status, wo.opened_at, m.rank
+    FROM (SELECT work_order_id, max(rank) AS rank FROM wo_ids GROUP BY work_order_id) m
+    JOIN public.work_orders wo ON wo.work_order_id = m.work_order_id
+    ORDER BY m.rank DESC, wo.opened_at DESC
+    LIMIT %(limit)s
+),
+ap_ids AS (
+    SELECT a.appointment_id, c.rank
+    FROM c JOIN public.appointments a ON a.customer_id = c.customer_id
+    WHERE a.scheduled_start >= %(today)s AND a.status NOT IN {closed_appointment_statuses}
+    UNION ALL
+    SELECT a.appointment_id, v.rank
+    FROM v JOIN public.appointments a ON a.vehicle_id = v.vehicle_id
+    WHERE a.scheduled_start >= %(today)s AND a.status NOT IN {closed_appointment_statuses}
+),
+ap AS (
+    SELECT a.appointment_id, a.customer_id, a.vehicle_id, a.service_id, a.status, a.scheduled_start, m.rank
+    FROM (SELECT appointment_id, max(rank) AS rank FROM ap_ids GROUP BY appointment_id) m
+    JOIN public.appointments a ON a.appointment_id = m.appointment_id
+    ORDER BY m.rank DESC, a.scheduled_start
+    LIMIT %(limit)s
+)
+SELECT 'work_order', wo.work_order_id::text, wo.rank,
+       {work_order_display},
+       wo.status,
+       wo.customer_id::text, wo.vehicle_id::text, wo.opened_at
+FROM w wo
+LEFT JOIN public.customers cu ON cu.customer_id = wo.customer_id
+LEFT JOIN public.vehicles ve ON ve.vehicle_id = wo.vehicle_id
+UNION ALL
+SELECT 'appointment', ap.appointment_id::text, ap.rank,
+       coalesce(cu.full_name, '—') || ' — ' || coalesce(ve.plate, ''),
+       concat_ws(' · ', s.name, to_char(ap.scheduled_start AT TIME ZONE %(tz)s, 'DD/MM/YYYY HH24:MI'), ap.status),
+       ap.customer_id::text, ap.vehicle_id::text, ap.scheduled_start
+FROM ap
+LEFT JOIN public.customers cu ON cu.customer_id = ap.customer_id
+LEFT JOIN public.vehicles ve ON ve.vehicle_id = ap.vehicle_id
+LEFT JOIN public.services s ON s.service_id = ap.service_id
+UNION ALL
+SELECT 'vehicle', v.vehicle_id::text, v.rank,
+       v.plate,
+       concat_ws(' · ', nullif(concat_ws(' ', v.make, v.model), ''), cu.full_name),
+       v.customer_id::text, v.vehicle_id::text, NULL::timestamptz
+FROM v
+LEFT JOIN public.customers cu ON cu.customer_id = v.customer_id
+UNION ALL
+SELECT 'customer', c.customer_id::text, c.rank,
+       c.full_name,
+       concat_ws(' · ', c.phone, c.email),
+       c.customer_id::text, NULL, NULL::timestamptz
+FROM c
+"""
+
+
+def compute_typeahead(term: dict, limit: int) -> list:
+    """Resultados para un término ya normalizado (parse_term), sin caché."""
+    customer_where = [f"{CUSTOMER_NAME_KEY} LIKE %(text_prefix)s", f"{CUSTOMER_EMAIL_KEY} LIKE %(text_prefix)s"]
+    if term["digits"]:
+        customer_where.append(f"{CUSTOMER_PHONE_KEY} LIKE %(digits_prefix)s")
+    vehicle_where = f"{VEHICLE_PLATE_KEY} LIKE %(plate_prefix)s" if term["plate"] else "false"
+
+    sql = _TYPEAHEAD_SQL.format(
+        name_key=CUSTOMER_NAME_KEY,
+        phone_key=CUSTOMER_PHONE_KEY,
+        plate_key=VEHICLE_PLATE_KEY,
+        customer_where=" OR ".join(customer_where),
+        vehicle_where=vehicle_where,
+        work_order_display=_WORK_ORDER_DISPLAY_SQL,
+        open_statuses=_OPEN_STATUSES_SQL,
+        closed_appointment_statuses=_CLOSED_APPOINTMENT_STATUSES_SQL,
+    )
+    params = {
+        "text": term["text"],
+        "text_prefix": _prefix(term["text"]),
+        "digits": term["digits"],
+        "digits_prefix": _prefix(term["digits"] or ""),
+        "plate": term["plate"],
+        "plate_prefix": _prefix(term["plate"] or ""),
+        "limit": limit,
+        "today": day_start(business_today()),
+        "tz": settings.TIME_ZONE,
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    results = [
+        {
+            "type": kind,
+            "id": object_id,
+            "rank": rank,
+            "label": label,
+            "detail": detail or "",
+            "customer_id": customer_id,
+            "vehicle_id": vehicle_id,
+            "at": at.isoformat() if at else None,
+        }
+        for kind, object_id, rank, label, detail, customer_id, vehicle_id, at in rows
+    ]
+    results.sort(key=lambda r: (-r["rank"], _TYPE_ORDER[r["type"]], r["label"] or ""))
+    return results
+
+
+def typeahead(raw_term, raw_limit=None) -> dict:
+    """
+    Payload del endpoint, cacheado por (término normalizado, limit).
+    ValueError si el término o el limit son inválidos.
+    """
+    term = parse_term(raw_term)
+    limit = parse_limit(raw_limit)
+    results = cached(
+        RECEPTION_CACHE_NAMESPACE,
+        f"{limit}:{term['text']}",
+        lambda: compute_typeahead(term, limit),
+        TYPEAHEAD_CACHE_TTL,
+    )
+    return {"q": term["text"], "results": results}
+
+
+# ── OTs abiertas para el dropdown de caja ──────────────────────────────────────
+
+_OPEN_SUMMARY_SQL = f"""
+WITH top AS (
+    SELECT work_order_id, opened_at
+    FROM public.work_orders
+    WHERE status IN {_OPEN_STATUSES_SQL}
+    ORDER BY opened_at DESC, work_order_id DESC
+    LIMIT %(limit)s
+),
+picked AS (
+    SELECT work_order_id, opened_at, 1 AS grp FROM top
+    UNION ALL
+    SELECT wo.work_order_id, wo.opened_at, 0
+    FROM public.work_orders wo
+    WHERE wo.work_order_id = %(include_id)s::uuid
+      AND NOT EXISTS (SELECT 1 FROM top WHERE top.work_order_id = wo.work_order_id)
+)
+SELECT wo.work_order_id::text,
+       {_WORK_ORDER_DISPLAY_SQL},
+       coalesce(wo.estimated_total, 0.00)::text,
+       (wo.services_total + wo.products_total)::text
+FROM picked p
+JOIN public.work_orders wo ON wo.work_order_id = p.work_order_id
+LEFT JOIN public.customers cu ON cu.customer_id = wo.customer_id
+LEFT JOIN public.vehicles ve ON ve.vehicle_id = wo.vehicle_id
+ORDER BY p.grp, p.opened_at DESC, p.work_order_id DESC
+"""
+
+
+def open_work_orders_summary(include_id=None, limit: int = OPEN_SUMMARY_LIMIT) -> list:
+    """
+    Las `limit` OTs abiertas más recientes con su texto para mostrar, armado en
+    SQL. include_id (uuid) agrega al inicio esa OT aunque esté cerrada o fuera
+    del top, si no venía ya en la lista.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _OPEN_SUMMARY_SQL,
+            {
+                "limit": limit,
+                "include_id": str(include_id) if include_id else None,
+                "tz": settings.TIME_ZONE,
+            },
+        )
+        rows = cursor.fetchall()
+    return [
+        {
+            "work_order_id": work_order_id,
+            "display": display,
+            "estimated_total": estimated_total,
+            "lines_total": lines_total,
+        }
+        for work_order_id, display, estimated_total, lines_total in rows
+    ]
@@ -6,6 +6,7 @@ class WorkOrderSerializer(serializers.ModelSerializer):
     customer_name = serializers.CharField(source="customer.full_name", read_only=True)
     customer_email = serializers.CharField(source="customer.email", read_only=True)
     vehicle_plate = serializers.CharField(source="vehicle.plate", read_only=True)
+    lines_total = serializers.SerializerMethodField()
 
     class Meta:
         model = WorkOrder
@@ -21,6 +22,9 @@ class WorkOrderSerializer(serializers.ModelSerializer):
             "customer_symptoms",
             "diagnosis",
             "estimated_total",
+            "services_total",
+            "products_total",
+            "lines_total",
             "authorization_status",
             "authorized_at",
             "authorized_by",
@@ -35,8 +39,12 @@ class WorkOrderSerializer(serializers.ModelSerializer):
         read_only_fields = [
             "work_order_id", "created_at", "updated_at",
             "authorization_status", "authorized_at", "authorized_by",
+            "services_total", "products_total",
         ]
 
+    def get_lines_total(self, obj):
+        return str((obj.services_total or 0) + (obj.products_total or 0))
+
 class WorkOrderServiceSerializer(serializers.ModelSerializer):
     service_name = serializers.CharField(source="service.name", read_only=True)
 
@@ -182,23 +190,11 @@ class WorkOrderCustomerSerializer(serializers.ModelSerializer):
             "computed_total",
         ]
 
-    def _sum_lines(self, lines):
-        total = Decimal("0")
-        for ln in lines:
-            try:
-                total += Decimal(str(ln.qty or 0)) * Decimal(str(ln.unit_price or 0))
-            except Exception:
-                continue
-        return total
-
     def get_services_total(self, obj):
-        return self._sum_lines(getattr(obj, "service_lines", []).all() if hasattr(obj, "service_lines") else [])
+        return obj.services_total
 
     def get_products_total(self, obj):
-        return self._sum_lines(getattr(obj, "product_lines", []).all() if hasattr(obj, "product_lines") else [])
+        return obj.products_total
 
     def get_computed_total(self, obj):
-        try:
-            return self.get_services_total(obj) + self.get_products_total(obj)
-        except Exception:
-            return None
+        return (obj.services_total or 0) + (obj.products_total or 0)
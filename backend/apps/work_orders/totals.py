@@ -0,0 +1,161 @@
+"""
+Totales de líneas por OT (work_orders.services_total / products_total).
+
+Se mantienen con deltas en la misma transacción que escribe la línea (alta,
+edición o borrado), así reportes y cobro en caja leen una columna en lugar de
+sumar work_order_services / work_order_products.
+
+- Monto de una línea: round(qty * unit_price, 2), igual en Python y en SQL, así
+  la suma de deltas coincide al céntimo con lo recalculado.
+- Orden de locks: quien escribe líneas bloquea primero la OT
+  (lock_work_order), después la línea y por último los productos; así un alta
+  de línea y el borrado de la OT no se bloquean mutuamente.
+
+diff_totals() / rebuild_totals() recalculan desde las líneas
+(ver management command reconcile_work_order_totals).
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import connection
+
+SERVICES = "services"
+PRODUCTS = "products"
+
+_LINE_TABLES = {
+    SERVICES: ("public.work_order_services", "work_order_service_id"),
+    PRODUCTS: ("public.work_order_products", "work_order_product_id"),
+}
+
+CENT = Decimal("0.01")
+
+
+def line_amount(qty, unit_price) -> Decimal:
+    """Monto de una línea redondeado a céntimos (mismo criterio que _RAW_TOTALS_SQL)."""
+    amount = Decimal(str(qty or 0)) * Decimal(str(unit_price or 0))
+    return amount.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def lock_work_order(work_order_id) -> str:
+    """Bloquea la OT (FOR UPDATE) y retorna su estado. ValueError si no existe."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "select status from public.work_orders where work_order_id = %s for update",
+            [str(work_order_id)],
+        )
+        row = cursor.fetchone()
+    if not row:
+        raise ValueError("Work order no existe.")
+    return (row[0] or "").strip().lower()
+
+
+def lock_line(kind: str, line_id):
+    """Bloquea una línea y retorna (work_order_id, qty, unit_price), o None si no existe."""
+    table, pk = _LINE_TABLES[kind]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"select work_order_id, qty, unit_price from {table} where {pk} = %s for update",
+            [str(line_id)],
+        )
+        return cursor.fetchone()
+
+
+def apply_delta(work_order_id, services=0, products=0) -> None:
+    """Suma los deltas a los totales de la OT."""
+    services, products = Decimal(str(services)), Decimal(str(products))
+    if not services and not products:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            UPDATE public.work_orders
+            SET services_total = services_total + %s,
+                products_total = products_total + %s
+            WHERE work_order_id = %s
+            """,
+            [str(services), str(products), str(work_order_id)],
+        )
+
+
+def record_line(kind: str, work_order_id, qty, unit_price) -> None:
+    """Suma una línea nueva al total de su tipo."""
+    amount = line_amount(qty, unit_price)
+    apply_delta(work_order_id, **{kind: amount})
+
+
+def unrecord_line(kind: str, work_order_id, qty, unit_price) -> None:
+    """Resta una línea (borrado, o valores previos antes de una edición)."""
+    amount = line_amount(qty, unit_price)
+    apply_delta(work_order_id, **{kind: -amount})
+
+
+def record_line_change(kind: str, old_work_order_id, old_qty, old_price,
+                       new_work_order_id, new_qty, new_price) -> None:
+    """Aplica la edición de una línea: resta los valores previos y suma los nuevos."""
+    if str(old_work_order_id) == str(new_work_order_id):
+        delta = line_amount(new_qty, new_price) - line_amount(old_qty, old_price)
+        apply_delta(new_work_order_id, **{kind: delta})
+        return
+    unrecord_line(kind, old_work_order_id, old_qty, old_price)
+    record_line(kind, new_work_order_id, new_qty, new_price)
+
+
+# ── Reconciliación ─────────────────────────────────────────────────────────────
+
+_RAW_TOTALS_SQL = """
+    SELECT wo.work_order_id,
+           coalesce((SELECT sum(round(l.qty * l.unit_price, 2))
+                     FROM public.work_order_services l
+                     WHERE l.work_order_id = wo.work_order_id), 0) AS services_total,
+           coalesce((SELECT sum(round(l.qty * l.unit_price, 2))
+                     FROM public.work_order_products l
+                     WHERE l.work_order_id = wo.work_order_id), 0) AS products_total
+    FROM public.work_orders wo
+"""
+
+
+def diff_totals() -> list:
+    """
+    Compara los totales guardados contra las líneas. Retorna una lista de
+    dicts con las OTs que difieren (stored_* = columna, raw_* = recalculado).
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH raw AS ({_RAW_TOTALS_SQL})
+            SELECT wo.work_order_id::text,
+                   wo.services_total, r.services_total,
+                   wo.products_total, r.products_total
+            FROM public.work_orders wo
+            JOIN raw r ON r.work_order_id = wo.work_order_id
+            WHERE wo.services_total <> r.services_total
+               OR wo.products_total <> r.products_total
+            ORDER BY wo.opened_at
+            """
+        )
+        rows = cursor.fetchall()
+    return [
+        {
+            "work_order_id": work_order_id,
+            "stored_services": stored_services,
+            "raw_services": raw_services,
+            "stored_products": stored_products,
+            "raw_products": raw_products,
+        }
+        for work_order_id, stored_services, raw_services, stored_products, raw_products in rows
+    ]
+
+
+def rebuild_totals() -> int:
+    """Recalcula los totales de todas las OTs desde las líneas. Retorna las OTs corregidas."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE public.work_orders wo
+            SET services_total = r.services_total,
+                products_total = r.products_total
+            FROM ({_RAW_TOTALS_SQL}) r
+            WHERE r.work_order_id = wo.work_order_id
+              AND (wo.services_total <> r.services_total OR wo.products_total <> r.products_total)
+            """
+        )
+        return cursor.rowcount
@@ -7,6 +7,7 @@ from .views import (
     WorkOrderCustomerViewSet,
     WorkOrderProductAdminViewSet,
     WorkOrderServiceAdminViewSet,
+    reception_typeahead,
 )
 
 router = DefaultRouter()
@@ -19,4 +20,5 @@ router.register(r"work-order-products", WorkOrderProductAdminViewSet, basename="
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("reception/typeahead/", reception_typeahead, name="reception_typeahead"),
 ]
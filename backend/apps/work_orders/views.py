@@ -1,20 +1,32 @@
-import io
+import uuid
 from decimal import Decimal, InvalidOperation
 
-from django.db import connection, transaction
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection, transaction
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
 from django.http import HttpResponse
 from django.utils import timezone
 from rest_framework import status, viewsets
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ParseError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from apps.authentication.metrics import invalidate_dashboard
 from apps.authentication.permissions import IsStaffOrAdmin
-from apps.catalog.stock import log_stock_movement
+from apps.catalog.stock import InsufficientStock, apply_stock_changes, log_stock_movement
+from apps.common.cache import conditional_response, etag_for, if_none_match
+from apps.common.dates import business_today, parse_business_date, parse_uuid, range_filter, range_lookups
+from apps.common.pagination import KeysetPagination
+from apps.common.search import clean_term, match_sql
+from apps.common.xlsx import XLSX_CONTENT_TYPE, StreamingXlsx, iter_query_rows
 from apps.customers.auth import CustomerJWTAuthentication
 from apps.customers.permissions import IsAuthenticatedCustomer
+from apps.exports.jobs import ExportJobError, ExportResult, count_query_rows
 
 from .models import WorkOrder, WorkOrderProduct, WorkOrderService
+from . import reception, totals
 from .serializers import (
     WorkOrderCustomerSerializer,
     WorkOrderProductSerializer,
@@ -23,6 +35,25 @@ from .serializers import (
 )
 
 PRODUCT_STOCK_COLUMN = "stock_qty"
+BULK_LINES_MAX = 200
+
+# Huella de las líneas de una OT: md5 de las filas completas (más lo que el
+# serializer trae de la tabla relacionada). Cambia con cualquier alta, baja o
+# edición aunque el update no toque updated_at.
+SERVICE_LINES_FINGERPRINT_SQL = """
+    SELECT md5(coalesce(string_agg(l::text || coalesce(s.name, ''), ','
+                                   ORDER BY l.work_order_service_id), ''))
+    FROM public.work_order_services l
+    LEFT JOIN public.services s ON s.service_id = l.service_id
+    WHERE l.work_order_id = work_orders.work_order_id
+"""
+PRODUCT_LINES_FINGERPRINT_SQL = """
+    SELECT md5(coalesce(string_agg(l::text || coalesce(p.catalog_version::text, ''), ','
+                                   ORDER BY l.work_order_product_id), ''))
+    FROM public.work_order_products l
+    LEFT JOIN public.products p ON p.product_id = l.product_id
+    WHERE l.work_order_id = work_orders.work_order_id
+"""
 
 
 def _to_decimal(value, field_name: str) -> Decimal:
@@ -30,19 +61,180 @@ def _to_decimal(value, field_name: str) -> Decimal:
         d = Decimal(str(value))
     except (InvalidOperation, TypeError):
         raise ValueError(f"{field_name} inválido.")
+    if not d.is_finite():
+        raise ValueError(f"{field_name} inválido.")
     if d <= 0:
         raise ValueError(f"{field_name} debe ser > 0.")
     return d
 
 
 def _ensure_work_order_not_cancelled(work_order_id: str) -> None:
+    """Bloquea la OT (ver totals.lock_work_order) y valida que no esté cancelada."""
+    if totals.lock_work_order(work_order_id) == "cancelled":
+        raise ValueError("No se puede modificar una work order cancelada.")
+
+
+def _unit_price(value) -> Decimal:
+    try:
+        d = Decimal(str(value))
+    except (InvalidOperation, TypeError):
+        raise ValueError("unit_price inválido.")
+    if not d.is_finite():
+        raise ValueError("unit_price inválido.")
+    if d < 0:
+        raise ValueError("unit_price no puede ser negativo.")
+    return d
+
+
+def _optional_uuid(value, field_name: str):
+    return str(parse_uuid(value, field_name)) if value else None
+
+
+def _parse_bulk_lines(data) -> tuple:
+    """
+    Valida el cuerpo de POST /work-orders/<id>/lines/ completo antes de
+    escribir nada. Retorna (services, products) como listas de dicts listos
+    para insertar; lanza ValueError indicando la línea inválida.
+    """
+    services_in = data.get("services") or []
+    products_in = data.get("products") or []
+    if not isinstance(services_in, list) or not isinstance(products_in, list):
+        raise ValueError("services y products deben ser listas.")
+    if not services_in and not products_in:
+        raise ValueError("Debe enviar al menos una línea.")
+    if len(services_in) + len(products_in) > BULK_LINES_MAX:
+        raise ValueError(f"Máximo {BULK_LINES_MAX} líneas por lote.")
+
+    services, products = [], []
+    for kind, items, out in (("services", services_in, services), ("products", products_in, products)):
+        for i, item in enumerate(items):
+            try:
+                if not isinstance(item, dict):
+                    raise ValueError("formato inválido.")
+                line = {
+                    "line_id": str(uuid.uuid4()),
+                    "description": (item.get("description") or "").strip() or None,
+                    "qty": _to_decimal(item.get("qty", "1"), "qty"),
+                    "unit_price": _unit_price(item.get("unit_price", "0")),
+                }
+                if kind == "products":
+                    if not item.get("product_id"):
+                        raise ValueError("product_id es requerido.")
+                    line["product_id"] = _optional_uuid(item.get("product_id"), "product_id")
+                else:
+                    line["service_id"] = _optional_uuid(item.get("service_id"), "service_id")
+                    line["mechanic_id"] = _optional_uuid(item.get("mechanic_id"), "mechanic_id")
+                    line["status"] = (item.get("status") or "pending").strip()
+            except ValueError as e:
+                raise ValueError(f"{kind}[{i}]: {e}")
+            out.append(line)
+    return services, products
+
+
+def _validate_bulk_references(services: list, products: list) -> None:
+    """
+    Verifica que existan los servicios, mecánicos y productos del lote (una
+    consulta por tabla) para responder 400 con la línea en lugar de dejar que
+    la FK falle en el insert multi-fila. ValueError indica la primera inválida.
+    """
+    checks = (
+        ("services", services, "service_id", "SELECT service_id::text FROM public.services WHERE service_id = ANY(%s::uuid[])"),
+        ("services", services, "mechanic_id", None),
+        ("products", products, "product_id", "SELECT product_id::text FROM public.products WHERE product_id = ANY(%s::uuid[])"),
+    )
+    for kind, lines, field, sql in checks:
+        ids = sorted({line[field] for line in lines if line.get(field)})
+        if not ids:
+            continue
+        if sql is None:
+            found = {str(pk) for pk in get_user_model().objects.filter(id__in=ids).values_list("id", flat=True)}
+        else:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [ids])
+                found = {row[0] for row in cursor.fetchall()}
+        for i, line in enumerate(lines):
+            if line.get(field) and line[field] not in found:
+                raise ValueError(f"{kind}[{i}]: {field} no existe.")
+
+
+def _insert_bulk_lines(work_order_id: str, services: list, products: list, performed_by) -> None:
+    """
+    Inserta las líneas del lote. Orden de locks: OT (ya bloqueada por el
+    caller), productos ordenados por id (apply_stock_changes) y luego las
+    inserciones multi-fila. Lanza InsufficientStock si algún producto no alcanza.
+    """
+    apply_stock_changes(
+        [
+            {
+                "product_id": line["product_id"],
+                "qty_change": -line["qty"],
+                "movement_type": "work_order",
+                "performed_by": performed_by,
+                "reason": f"OT {work_order_id}",
+                "reference_id": line["line_id"],
+                "reference_type": "work_order_product",
+            }
+            for line in products
+        ],
+        require_active=False,
+    )
+
     with connection.cursor() as cursor:
-        cursor.execute("select status from public.work_orders where work_order_id = %s", [work_order_id])
-        row = cursor.fetchone()
-        if not row:
-            raise ValueError("Work order no existe.")
-        if (row[0] or "").strip().lower() == "cancelled":
-            raise ValueError("No se puede modificar una work order cancelada.")
+        if services:
+            values_sql = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s, now(), now())"] * len(services))
+            params = []
+            for line in services:
+                params.extend([
+                    line["line_id"], work_order_id, line["service_id"], line["description"],
+                    str(line["qty"]), str(line["unit_price"]), line["mechanic_id"], line["status"],
+                ])
+            cursor.execute(
+                f"""
+                insert into public.work_order_services
+                  (work_order_service_id, work_order_id, service_id, description, qty, unit_price,
+                   mechanic_id, status, created_at, updated_at)
+                values {values_sql}
+                """,
+                params,
+            )
+        if products:
+            values_sql = ", ".join(["(%s, %s, %s, %s, %s, %s, now(), now())"] * len(products))
+            params = []
+            for line in products:
+                params.extend([
+                    line["line_id"], work_order_id, line["product_id"], line["description"],
+                    str(line["qty"]), str(line["unit_price"]),
+                ])
+            cursor.execute(
+                f"""
+                insert into public.work_order_products
+                  (work_order_product_id, work_order_id, product_id, description, qty, unit_price,
+                   created_at, updated_at)
+                values {values_sql}
+                """,
+                params,
+            )
+
+    totals.apply_delta(
+        work_order_id,
+        services=sum((totals.line_amount(line["qty"], line["unit_price"]) for line in services), Decimal("0")),
+        products=sum((totals.line_amount(line["qty"], line["unit_price"]) for line in products), Decimal("0")),
+    )
+
+
+def _work_order_search(term) -> RawSQL:
+    """OTs cuyo cliente o vehículo coincide con ?search= (índices pg_trgm, ver common/search.py)."""
+    term = clean_term(term)
+    customer_sql, customer_params = match_sql("customers", term)
+    vehicle_sql, vehicle_params = match_sql("vehicles", term)
+    return RawSQL(
+        f"""
+        (work_orders.customer_id IN (SELECT customers.customer_id FROM public.customers WHERE {customer_sql})
+         OR work_orders.vehicle_id IN (SELECT vehicles.vehicle_id FROM public.vehicles WHERE {vehicle_sql}))
+        """,
+        customer_params + vehicle_params,
+        output_field=BooleanField(),
+    )
 
 
 def _lock_product_and_get_stock(product_id: str) -> Decimal:
@@ -70,6 +262,21 @@ def _update_product_stock(product_id: str, new_stock: Decimal) -> None:
         )
 
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsStaffOrAdmin])
+def reception_typeahead(request):
+    """
+    Búsqueda de recepción: ?q=<prefijo de nombre, correo, teléfono o placa>
+    (&limit=, máximo por tipo). Devuelve clientes, vehículos, OTs abiertas y
+    citas próximas mezclados y ordenados por relevancia (ver reception.py).
+    """
+    try:
+        payload = reception.typeahead(request.query_params.get("q"), request.query_params.get("limit"))
+    except ValueError as e:
+        return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return conditional_response(request, payload)
+
+
 class OpenAppointmentsAdminViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated, IsStaffOrAdmin]
 
@@ -126,6 +333,7 @@ class OpenAppointmentsAdminViewSet(viewsets.ViewSet):
 class WorkOrderAdminViewSet(viewsets.ModelViewSet):
     serializer_class = WorkOrderSerializer
     permission_classes = [IsAuthenticated, IsStaffOrAdmin]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         qs = WorkOrder.objects.select_related("customer", "vehicle", "appointment").all()
@@ -148,18 +356,26 @@ class WorkOrderAdminViewSet(viewsets.ModelViewSet):
             if allowed:
                 qs = qs.filter(status__in=allowed)
 
-        date_from = self.request.query_params.get("date_from")
-        if date_from:
-            qs = qs.filter(opened_at__date__gte=date_from)
-
-        date_to = self.request.query_params.get("date_to")
-        if date_to:
-            qs = qs.filter(opened_at__date__lte=date_to)
+        try:
+            qs = qs.filter(**range_lookups(
+                "opened_at",
+                self.request.query_params.get("date_from"),
+                self.request.query_params.get("date_to"),
+            ))
+        except ValueError as e:
+            raise ParseError(str(e))
 
         mechanic_id = self.request.query_params.get("mechanic_id")
         if mechanic_id:
             qs = qs.filter(assigned_mechanic_id=mechanic_id)
 
+        search = self.request.query_params.get("search")
+        if search:
+            try:
+                qs = qs.filter(_work_order_search(search))
+            except ValueError as e:
+                raise ParseError(str(e))
+
         return qs.order_by("-opened_at")
 
     @action(detail=False, methods=["get"], url_path="report")
@@ -167,58 +383,17 @@ class WorkOrderAdminViewSet(viewsets.ModelViewSet):
         """Reporte de órdenes de trabajo con filtros por fecha, estado y mecánico.
         Soporta export=excel para descargar .xlsx (openpyxl)."""
         params = request.query_params
-        today = timezone.now().date()
-        month_start = today.replace(day=1)
-
-        date_from = (params.get("date_from") or str(month_start)).strip()
-        date_to = (params.get("date_to") or str(today)).strip()
-        status_filter = (params.get("status") or "").strip()
-        mechanic_id_filter = (params.get("mechanic_id") or "").strip()
         export_format = (params.get("export") or "json").strip().lower()
+        try:
+            sql, values, date_from, date_to = _work_order_report_query(params)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
 
-        filters = ["wo.opened_at::date >= %s", "wo.opened_at::date <= %s"]
-        values = [date_from, date_to]
-
-        if status_filter:
-            filters.append("wo.status = %s")
-            values.append(status_filter)
-
-        if mechanic_id_filter:
-            filters.append("wo.assigned_mechanic_id::text = %s")
-            values.append(mechanic_id_filter)
-
-        where_clause = " and ".join(filters)
+        if export_format == "excel":
+            return _build_wo_excel_response(iter_query_rows(sql, values), date_from, date_to)
 
         with connection.cursor() as cursor:
-            cursor.execute(
-                f"""
-                select
-                    wo.work_order_id,
-                    wo.status,
-                    wo.authorization_status,
-                    wo.estimated_total,
-                    wo.opened_at,
-                    wo.closed_at,
-                    wo.customer_symptoms,
-                    wo.diagnosis,
-                    wo.notes,
-                    c.full_name                         as customer_name,
-                    c.email                             as customer_email,
-                    v.plate                             as vehicle_plate,
-                    v.make                              as vehicle_make,
-                    v.model                             as vehicle_model,
-                    v.year                              as vehicle_year,
-                    u.first_name || ' ' || u.last_name  as mechanic_name,
-                    u.username                          as mechanic_username
-                from public.work_orders wo
-                left join public.customers      c on c.customer_id = wo.customer_id
-                left join public.vehicles       v on v.vehicle_id  = wo.vehicle_id
-                left join django_app.auth_users u on u.id = wo.assigned_mechanic_id
-                where {where_clause}
-                order by wo.opened_at desc
-                """,
-                values,
-            )
+            cursor.execute(sql, values)
             rows = cursor.fetchall()
             cols = [d[0] for d in cursor.description]
 
@@ -248,17 +423,128 @@ class WorkOrderAdminViewSet(viewsets.ModelViewSet):
             if wo.get("estimated_total") is not None
         )
 
+        total_lines = sum(Decimal(str(wo["lines_total"])) for wo in work_orders)
+
         summary = {
             "total": len(work_orders),
             "by_status": by_status,
             "total_estimated": str(total_estimated),
+            "total_lines": str(total_lines),
         }
 
-        if export_format == "excel":
-            return _build_wo_excel_response(work_orders, summary, date_from, date_to)
-
         return Response({"work_orders": work_orders, "summary": summary}, status=200)
 
+    @action(detail=True, methods=["get"], url_path="full")
+    def full(self, request, pk=None):
+        """
+        Detalle completo para el workbench: OT, líneas de servicio, líneas de
+        producto (con unidades) y subtotales (columnas de la OT, ver totals.py),
+        en máximo tres consultas.
+
+        La primera consulta trae la OT junto con la huella de sus líneas; con
+        eso se calcula el ETag y, si el cliente ya tiene esa versión
+        (If-None-Match), se responde 304 sin leer las líneas.
+        """
+        try:
+            work_order_id = parse_uuid(pk, "work_order_id")
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+
+        try:
+            wo = (
+                WorkOrder.objects.select_related("customer", "vehicle")
+                .annotate(
+                    services_fingerprint=RawSQL(SERVICE_LINES_FINGERPRINT_SQL, []),
+                    products_fingerprint=RawSQL(PRODUCT_LINES_FINGERPRINT_SQL, []),
+                )
+                .get(work_order_id=work_order_id)
+            )
+        except WorkOrder.DoesNotExist:
+            return Response({"detail": "Work order no existe."}, status=404)
+
+        work_order = WorkOrderSerializer(wo).data
+        etag = etag_for([work_order, wo.services_fingerprint, wo.products_fingerprint])
+        if if_none_match(request, etag):
+            return conditional_response(request, None, etag)
+
+        services = list(
+            WorkOrderService.objects.select_related("service")
+            .filter(work_order_id=work_order_id)
+            .order_by("created_at", "work_order_service_id")
+        )
+        products = list(
+            WorkOrderProduct.objects.select_related("product")
+            .filter(work_order_id=work_order_id)
+            .order_by("created_at", "work_order_product_id")
+        )
+
+        payload = {
+            "work_order": work_order,
+            "services": WorkOrderServiceSerializer(services, many=True).data,
+            "products": WorkOrderProductSerializer(products, many=True).data,
+            "totals": {
+                "services": work_order["services_total"],
+                "products": work_order["products_total"],
+                "total": work_order["lines_total"],
+                "estimated_total": work_order["estimated_total"],
+            },
+        }
+        return conditional_response(request, payload, etag)
+
+    @action(detail=True, methods=["post"], url_path="lines")
+    def lines(self, request, pk=None):
+        """
+        Agrega varias líneas de servicio y producto a la OT en una transacción:
+        {"services": [{service_id, qty, unit_price, ...}], "products": [{product_id, qty, unit_price, ...}]}.
+
+        Todo o nada: si una línea es inválida (400) o a un producto le falta
+        stock (409) no se escribe ninguna. Los productos se bloquean en un solo
+        SELECT ordenado; stock, movimientos y líneas se escriben con un
+        statement por tabla.
+        """
+        data = request.data or {}
+        try:
+            work_order_id = str(parse_uuid(pk, "work_order_id"))
+            services, products = _parse_bulk_lines(data)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+
+        try:
+            with transaction.atomic():
+                _ensure_work_order_not_cancelled(work_order_id)
+                _validate_bulk_references(services, products)
+                _insert_bulk_lines(work_order_id, services, products, request.user.id)
+        except InsufficientStock as e:
+            return Response(
+                {"detail": str(e), "product_id": e.product_id, "available": str(e.available)},
+                status=409,
+            )
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+        except IntegrityError:
+            # Referencia borrada entre la validación y el insert
+            return Response({"detail": "Alguna línea referencia un registro que no existe."}, status=400)
+
+        # Mismo orden que el lote recibido (todas las líneas comparten created_at)
+        position = {line["line_id"]: i for i, line in enumerate(services + products)}
+        service_lines = sorted(
+            WorkOrderService.objects.select_related("service")
+            .filter(work_order_service_id__in=[line["line_id"] for line in services]),
+            key=lambda ln: position[str(ln.work_order_service_id)],
+        ) if services else []
+        product_lines = sorted(
+            WorkOrderProduct.objects.select_related("product")
+            .filter(work_order_product_id__in=[line["line_id"] for line in products]),
+            key=lambda ln: position[str(ln.work_order_product_id)],
+        ) if products else []
+        return Response(
+            {
+                "services": WorkOrderServiceSerializer(service_lines, many=True).data,
+                "products": WorkOrderProductSerializer(product_lines, many=True).data,
+            },
+            status=201,
+        )
+
     @action(detail=False, methods=["post"], url_path="create-from-appointment")
     def create_from_appointment(self, request):
         appointment_id = (request.data or {}).get("appointment_id")
@@ -304,6 +590,9 @@ class WorkOrderAdminViewSet(viewsets.ModelViewSet):
                 [str(appointment_id)],
             )
 
+        invalidate_dashboard()
+
+        reception.invalidate_reception()
         wo = WorkOrder.objects.select_related("customer", "vehicle", "appointment").get(work_order_id=wo_id)
         return Response(self.get_serializer(wo).data, status=201)
 
@@ -337,6 +626,9 @@ class WorkOrderAdminViewSet(viewsets.ModelViewSet):
             )
             work_order_id = cursor.fetchone()[0]
 
+        invalidate_dashboard()
+
+        reception.invalidate_reception()
         wo = WorkOrder.objects.select_related("customer", "vehicle", "appointment").get(work_order_id=work_order_id)
         return Response(self.get_serializer(wo).data, status=status.HTTP_201_CREATED)
 
@@ -422,6 +714,9 @@ class WorkOrderAdminViewSet(viewsets.ModelViewSet):
                 params,
             )
 
+        invalidate_dashboard()
+
+        reception.invalidate_reception()
         wo.refresh_from_db()
         wo = WorkOrder.objects.select_related("customer", "vehicle", "appointment").get(work_order_id=wo.work_order_id)
         return Response(self.get_serializer(wo).data, status=200)
@@ -446,43 +741,29 @@ class WorkOrderAdminViewSet(viewsets.ModelViewSet):
             )
             prod_lines = cursor.fetchall() or []
 
-            for product_id, qty in prod_lines:
-                if not product_id:
-                    continue
-
-                cursor.execute(
-                    f"select {PRODUCT_STOCK_COLUMN} from public.products where product_id = %s for update",
-                    [str(product_id)],
-                )
-                pr = cursor.fetchone()
-                if pr is None:
-                    continue
-
-                current_stock = Decimal(str(pr[0] or 0))
-                qty_dec = Decimal(str(qty))
-                new_stock = current_stock + qty_dec
-                cursor.execute(
-                    f"""
-                    update public.products
-                    set {PRODUCT_STOCK_COLUMN} = %s,
-                        updated_at = now()
-                    where product_id = %s
-                    """,
-                    [str(new_stock), str(product_id)],
-                )
-                log_stock_movement(
-                    product_id=str(product_id),
-                    qty_before=current_stock,
-                    qty_change=qty_dec,
-                    qty_after=new_stock,
-                    movement_type="work_order_refund",
-                    reason=f"Cancelación OT {wo_id}",
-                )
+            # Devolución en lote: un lock ordenado, un UPDATE y un INSERT para todas las líneas
+            apply_stock_changes(
+                [
+                    {
+                        "product_id": product_id,
+                        "qty_change": qty,
+                        "movement_type": "work_order_refund",
+                        "reason": f"Cancelación OT {wo_id}",
+                    }
+                    for product_id, qty in prod_lines
+                    if product_id
+                ],
+                require_active=False,
+                ignore_missing=True,
+            )
 
             cursor.execute("delete from public.work_order_products where work_order_id = %s", [wo_id])
             cursor.execute("delete from public.work_order_services where work_order_id = %s", [wo_id])
             cursor.execute("delete from public.work_orders where work_order_id = %s", [wo_id])
 
+        invalidate_dashboard()
+
+        reception.invalidate_reception()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -512,6 +793,7 @@ class WorkOrderServiceAdminViewSet(viewsets.ModelViewSet):
             qs = qs.filter(work_order_id=work_order_id)
         return qs
 
+    @transaction.atomic
     def create(self, request, *args, **kwargs):
         data = request.data or {}
         work_order_id = data.get("work_order_id")
@@ -553,10 +835,28 @@ class WorkOrderServiceAdminViewSet(viewsets.ModelViewSet):
                 [work_order_id, service_id, desc, str(qty), str(unit_price), mechanic_id, status_v, started_at, completed_at],
             )
             line_id = cursor.fetchone()[0]
+        totals.record_line(totals.SERVICES, work_order_id, qty, unit_price)
 
         line = WorkOrderService.objects.select_related("work_order", "service").get(work_order_service_id=line_id)
         return Response(self.get_serializer(line).data, status=201)
 
+    @transaction.atomic
+    def perform_update(self, serializer):
+        line = serializer.instance
+        totals.lock_work_order(line.work_order_id)
+        old = totals.lock_line(totals.SERVICES, line.work_order_service_id)
+        line = serializer.save()
+        if old:
+            totals.record_line_change(totals.SERVICES, *old, line.work_order_id, line.qty, line.unit_price)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        totals.lock_work_order(instance.work_order_id)
+        old = totals.lock_line(totals.SERVICES, instance.work_order_service_id)
+        instance.delete()
+        if old:
+            totals.unrecord_line(totals.SERVICES, *old)
+
 
 class WorkOrderProductAdminViewSet(viewsets.ModelViewSet):
     serializer_class = WorkOrderProductSerializer
@@ -619,6 +919,7 @@ class WorkOrderProductAdminViewSet(viewsets.ModelViewSet):
                 [work_order_id, product_id, desc, str(qty), str(unit_price)],
             )
             line_id = cursor.fetchone()[0]
+        totals.record_line(totals.PRODUCTS, work_order_id, qty, unit_price)
 
         log_stock_movement(
             product_id=str(product_id),
@@ -635,6 +936,11 @@ class WorkOrderProductAdminViewSet(viewsets.ModelViewSet):
         line = WorkOrderProduct.objects.select_related("work_order", "product").get(work_order_product_id=line_id)
         return Response(self.get_serializer(line).data, status=201)
 
+    def update(self, request, *args, **kwargs):
+        # PUT pasa por el mismo camino que PATCH: el update heredado haría
+        # serializer.save() sin mover stock ni los totales de la OT.
+        return self.partial_update(request, *args, **kwargs)
+
     @transaction.atomic
     def partial_update(self, request, *args, **kwargs):
         line = self.get_object()
@@ -645,6 +951,12 @@ class WorkOrderProductAdminViewSet(viewsets.ModelViewSet):
         except ValueError as e:
             return Response({"detail": str(e)}, status=400)
 
+        locked = totals.lock_line(totals.PRODUCTS, line.work_order_product_id)
+        if not locked:
+            return Response({"detail": "Línea no existe."}, status=404)
+        _, line.qty, line.unit_price = locked
+        new_qty, new_unit_price = line.qty, line.unit_price
+
         sets = []
         params = []
 
@@ -653,15 +965,13 @@ class WorkOrderProductAdminViewSet(viewsets.ModelViewSet):
             params.append((data.get("description") or "").strip() or None)
 
         if "unit_price" in data:
-            unit_price_raw = data.get("unit_price", "0")
             try:
-                unit_price = Decimal(str(unit_price_raw))
-            except Exception:
-                return Response({"detail": "unit_price inválido."}, status=400)
-            if unit_price < 0:
-                return Response({"detail": "unit_price no puede ser negativo."}, status=400)
+                unit_price = _unit_price(data.get("unit_price", "0"))
+            except ValueError as e:
+                return Response({"detail": str(e)}, status=400)
             sets.append("unit_price = %s")
             params.append(str(unit_price))
+            new_unit_price = unit_price
 
         if "qty" in data:
             try:
@@ -724,6 +1034,11 @@ class WorkOrderProductAdminViewSet(viewsets.ModelViewSet):
                 f"update public.work_order_products set {', '.join(sets)} where work_order_product_id = %s",
                 params,
             )
+        totals.record_line_change(
+            totals.PRODUCTS,
+            line.work_order_id, line.qty, line.unit_price,
+            line.work_order_id, new_qty, new_unit_price,
+        )
 
         line.refresh_from_db()
         line = WorkOrderProduct.objects.select_related("work_order", "product").get(work_order_product_id=line.work_order_product_id)
@@ -738,6 +1053,11 @@ class WorkOrderProductAdminViewSet(viewsets.ModelViewSet):
         except ValueError as e:
             return Response({"detail": str(e)}, status=400)
 
+        locked = totals.lock_line(totals.PRODUCTS, line.work_order_product_id)
+        if not locked:
+            return Response({"detail": "Línea no existe."}, status=404)
+        _, line.qty, line.unit_price = locked
+
         if line.product_id:
             try:
                 current_stock = _lock_product_and_get_stock(str(line.product_id))
@@ -763,17 +1083,96 @@ class WorkOrderProductAdminViewSet(viewsets.ModelViewSet):
                 "delete from public.work_order_products where work_order_product_id = %s",
                 [str(line.work_order_product_id)],
             )
+        totals.unrecord_line(totals.PRODUCTS, line.work_order_id, line.qty, line.unit_price)
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-def _build_wo_excel_response(work_orders, summary, date_from, date_to):
-    """Genera un archivo .xlsx con detalle y resumen de órdenes de trabajo."""
+def _work_order_report_query(params):
+    """
+    SQL del reporte de OTs para los filtros dados (query params o params de un
+    job). Lanza ValueError si una fecha o un id son inválidos.
+    """
+    today = business_today()
+    month_start = today.replace(day=1)
+
+    date_from = parse_business_date(params.get("date_from"), month_start)
+    date_to = parse_business_date(params.get("date_to"), today)
+    status_filter = (params.get("status") or "").strip()
+    mechanic_id_filter = (params.get("mechanic_id") or "").strip()
+
+    date_sql, values = range_filter("wo.opened_at", date_from, date_to)
+    filters = [date_sql]
+
+    if status_filter:
+        filters.append("wo.status = %s")
+        values.append(status_filter)
+
+    if mechanic_id_filter:
+        filters.append("wo.assigned_mechanic_id = %s")
+        values.append(parse_uuid(mechanic_id_filter, "mechanic_id"))
+
+    where_clause = " and ".join(filters)
+
+    sql = f"""
+    select
+        wo.work_order_id,
+        wo.status,
+        wo.authorization_status,
+        wo.estimated_total,
+        wo.services_total,
+        wo.products_total,
+        wo.services_total + wo.products_total as lines_total,
+        wo.opened_at,
+        wo.closed_at,
+        wo.customer_symptoms,
+        wo.diagnosis,
+        wo.notes,
+        c.full_name                         as customer_name,
+        c.email                             as customer_email,
+        v.plate                             as vehicle_plate,
+        v.make                              as vehicle_make,
+        v.model                             as vehicle_model,
+        v.year                              as vehicle_year,
+        u.first_name || ' ' || u.last_name  as mechanic_name,
+        u.username                          as mechanic_username
+    from public.work_orders wo
+    left join public.customers      c on c.customer_id = wo.customer_id
+    left join public.vehicles       v on v.vehicle_id  = wo.vehicle_id
+    left join django_app.auth_users u on u.id = wo.assigned_mechanic_id
+    where {where_clause}
+    order by wo.opened_at desc
+    """
+    return sql, values, date_from, date_to
+
+
+def _build_wo_excel_response(rows, date_from, date_to):
     try:
-        import openpyxl
-        from openpyxl.styles import Alignment, Font, PatternFill
+        xlsx = _write_work_orders_xlsx(rows)
     except ImportError:
         return HttpResponse("openpyxl no está instalado.", status=500)
+    return xlsx.response(f"reporte_ordenes_{date_from}_al_{date_to}.xlsx")
+
+
+def work_orders_report_job(params, ctx):
+    """Handler del export job 'work_orders_report' (ver apps/exports/jobs.py)."""
+    try:
+        sql, values, date_from, date_to = _work_order_report_query(params)
+    except ValueError as e:
+        raise ExportJobError(str(e))
+    total = count_query_rows(sql, values)
+    xlsx = _write_work_orders_xlsx(ctx.track(iter_query_rows(sql, values), total))
+    ctx.progress(95, force=True)
+    return ExportResult(xlsx.content(), f"reporte_ordenes_{date_from}_al_{date_to}.xlsx", XLSX_CONTENT_TYPE)
+
+
+def _write_work_orders_xlsx(rows):
+    """
+    Genera un .xlsx con detalle y resumen de órdenes de trabajo.
+    rows es un iterable de dicts (cursor del servidor); el resumen se acumula
+    mientras se escriben las filas, sin cargar el reporte en memoria.
+    """
+    xlsx = StreamingXlsx()
 
     STATUS_LABELS = {
         "open": "Abierta",
@@ -788,112 +1187,66 @@ def _build_wo_excel_response(work_orders, summary, date_from, date_to):
         "rejected": "Rechazada",
     }
 
-    wb = openpyxl.Workbook()
+    by_status = {k: 0 for k in STATUS_LABELS}
+    sums = {"count": 0, "estimated": Decimal("0"), "lines": Decimal("0")}
 
-    # ── Hoja 1: Órdenes de Trabajo ──
-    ws1 = wb.active
-    ws1.title = "Órdenes de Trabajo"
-
-    headers = [
-        "Fecha apertura", "Hora apertura", "Fecha cierre",
-        "Cliente", "Email",
-        "Vehículo", "Año",
-        "Estado", "Mecánico",
-        "Total estimado", "Autorización",
-        "Síntomas", "Diagnóstico", "Notas",
-    ]
-    header_fill = PatternFill(start_color="1D63FF", end_color="1D63FF", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-
-    for col_idx, header in enumerate(headers, 1):
-        cell = ws1.cell(row=1, column=col_idx, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-
-    for wo in work_orders:
-        from datetime import datetime
-
-        raw_opened = wo.get("opened_at") or ""
-        try:
-            dt_open = datetime.fromisoformat(raw_opened)
-            fecha_open = dt_open.strftime("%d/%m/%Y")
-            hora_open = dt_open.strftime("%H:%M")
-        except Exception:
-            fecha_open = raw_opened
-            hora_open = ""
+    def work_order_rows():
+        for wo in rows:
+            opened = wo.get("opened_at")
+            closed = wo.get("closed_at")
+            opened = timezone.localtime(opened) if opened else None
+            closed = timezone.localtime(closed) if closed else None
+            st = wo.get("status") or ""
+            auth_st = wo.get("authorization_status") or ""
+            estimated = wo.get("estimated_total")
 
-        raw_closed = wo.get("closed_at") or ""
-        try:
-            fecha_close = datetime.fromisoformat(raw_closed).strftime("%d/%m/%Y") if raw_closed else ""
-        except Exception:
-            fecha_close = raw_closed
+            lines_total = Decimal(str(wo.get("lines_total") or 0))
 
-        vehicle_str = f"{wo.get('vehicle_plate', '')} {wo.get('vehicle_make', '')} {wo.get('vehicle_model', '')}".strip()
-        st = wo.get("status") or ""
-        auth_st = wo.get("authorization_status") or ""
+            sums["count"] += 1
+            sums["lines"] += lines_total
+            if st in by_status:
+                by_status[st] += 1
+            if estimated is not None:
+                sums["estimated"] += Decimal(str(estimated))
+
+            vehicle_str = f"{wo.get('vehicle_plate') or ''} {wo.get('vehicle_make') or ''} {wo.get('vehicle_model') or ''}".strip()
+
+            yield [
+                opened.strftime("%d/%m/%Y") if opened else "",
+                opened.strftime("%H:%M") if opened else "",
+                closed.strftime("%d/%m/%Y") if closed else "",
+                wo.get("customer_name") or "",
+                wo.get("customer_email") or "",
+                vehicle_str,
+                wo.get("vehicle_year") or "",
+                STATUS_LABELS.get(st, st),
+                wo.get("mechanic_name") or wo.get("mechanic_username") or "",
+                float(estimated) if estimated is not None else "",
+                float(lines_total),
+                AUTH_LABELS.get(auth_st, auth_st),
+                wo.get("customer_symptoms") or "",
+                wo.get("diagnosis") or "",
+                wo.get("notes") or "",
+            ]
 
-        estimated = wo.get("estimated_total")
-        try:
-            estimated_val = float(estimated) if estimated is not None else ""
-        except Exception:
-            estimated_val = estimated or ""
-
-        ws1.append([
-            fecha_open,
-            hora_open,
-            fecha_close,
-            wo.get("customer_name") or "",
-            wo.get("customer_email") or "",
-            vehicle_str,
-            wo.get("vehicle_year") or "",
-            STATUS_LABELS.get(st, st),
-            wo.get("mechanic_name") or wo.get("mechanic_username") or "",
-            estimated_val,
-            AUTH_LABELS.get(auth_st, auth_st),
-            wo.get("customer_symptoms") or "",
-            wo.get("diagnosis") or "",
-            wo.get("notes") or "",
-        ])
-
-    for col in ws1.columns:
-        max_len = max((len(str(cell.value or "")) for cell in col), default=10)
-        ws1.column_dimensions[col[0].column_letter].width = min(max_len + 4, 40)
+    # ── Hoja 1: Órdenes de Trabajo ──
+    xlsx.add_sheet(
+        "Órdenes de Trabajo",
+        [
+            "Fecha apertura", "Hora apertura", "Fecha cierre",
+            "Cliente", "Email",
+            "Vehículo", "Año",
+            "Estado", "Mecánico",
+            "Total estimado", "Total líneas", "Autorización",
+            "Síntomas", "Diagnóstico", "Notas",
+        ],
+        work_order_rows(),
+    )
 
     # ── Hoja 2: Resumen ──
-    ws2 = wb.create_sheet("Resumen")
-    ws2.append(["Estado", "Cantidad"])
-    h2_fill = PatternFill(start_color="0A3EA6", end_color="0A3EA6", fill_type="solid")
-    h2_font = Font(bold=True, color="FFFFFF")
-    for cell in ws2[1]:
-        cell.fill = h2_fill
-        cell.font = h2_font
-
-    by_status = summary.get("by_status", {})
-    for st_key, label in [
-        ("open", "Abierta"),
-        ("in_progress", "En proceso"),
-        ("ready", "Lista"),
-        ("closed", "Cerrada"),
-        ("cancelled", "Cancelada"),
-    ]:
-        ws2.append([label, by_status.get(st_key, 0)])
-
-    ws2.append(["Total", summary.get("total", 0)])
-    ws2.append(["Total estimado (CRC)", summary.get("total_estimated", "0")])
-
-    for col in ws2.columns:
-        max_len = max((len(str(cell.value or "")) for cell in col), default=10)
-        ws2.column_dimensions[col[0].column_letter].width = min(max_len + 4, 30)
-
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-
-    filename = f"reporte_ordenes_{date_from}_al_{date_to}.xlsx"
-    response = HttpResponse(
-        buffer.read(),
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    )
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    return response
+    summary_rows = [[label, by_status.get(st_key, 0)] for st_key, label in STATUS_LABELS.items()]
+    summary_rows.append(["Total", sums["count"]])
+    summary_rows.append(["Total estimado (CRC)", str(sums["estimated"])])
+    summary_rows.append(["Total líneas (CRC)", str(sums["lines"])])
+    xlsx.add_sheet("Resumen", ["Estado", "Cantidad"], summary_rows, header_color="0A3EA6", max_width=30)
+    return xlsx
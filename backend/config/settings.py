@@ -53,9 +53,12 @@ INSTALLED_APPS = [
     "apps.work_orders.apps.WorkOrdersConfig",
     "apps.cash_register.apps.CashRegisterConfig",
     "apps.period_closures.apps.PeriodClosuresConfig",
+    "apps.exports.apps.ExportsConfig",
+    "apps.benchmarks.apps.BenchmarksConfig",
 ]
 
 MIDDLEWARE = [
+    'apps.common.sqlstats.SqlStatsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -105,7 +108,8 @@ DATABASES = {
 }
 
 DATABASES['default'].setdefault('OPTIONS', {})
-DATABASES['default']['OPTIONS']['sslmode'] = 'require'
+# 'disable' solo para un Postgres local (benchmarks, ver apps/benchmarks)
+DATABASES['default']['OPTIONS']['sslmode'] = config('DATABASE_SSLMODE', default='require')
 
 if not _is_pooler:
     # Direct connection: set search_path via startup option.
@@ -158,9 +162,19 @@ LOGGING = {
     'loggers': {
         'django': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
         'django.request': {'handlers': ['console'], 'level': 'ERROR', 'propagate': False},
+        # Una línea JSON por request con consultas/tiempo de BD (apps/common/sqlstats.py)
+        'apps.sql': {'handlers': ['console'], 'level': config('SQL_LOG_LEVEL', default='INFO'), 'propagate': False},
     },
 }
 
+# -------------------------
+# Instrumentación SQL por request (Server-Timing + log)
+# -------------------------
+SQL_INSTRUMENTATION = config('SQL_INSTRUMENTATION', default=True, cast=bool)
+# Detector de N+1: loguea formas de consulta repetidas >= umbral en un request
+SQL_NPLUSONE_DETECT = config('SQL_NPLUSONE_DETECT', default=False, cast=bool)
+SQL_NPLUSONE_THRESHOLD = config('SQL_NPLUSONE_THRESHOLD', default=5, cast=int)
+
 # -------------------------
 # Static files (CSS, JavaScript, Images)
 # -------------------------
@@ -232,12 +246,49 @@ CORS_ALLOW_HEADERS = [
     'authorization',
     'content-type',
     'dnt',
+    'if-none-match',
     'origin',
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
 ]
 
+# El dashboard hace polling condicional (If-None-Match / 304); Server-Timing
+# expone consultas/tiempo de BD por request (apps/common/sqlstats.py)
+CORS_EXPOSE_HEADERS = ['etag', 'server-timing']
+
+# -------------------------
+# Cache
+# -------------------------
+# Caché en memoria por proceso: cada worker de gunicorn tiene la suya,
+# por eso los datos cacheados usan TTL cortos (ver apps/common/cache.py).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'lubricentro',
+    }
+}
+
+# -------------------------
+# Eventos en vivo del portal del cliente (SSE)
+# -------------------------
+# 'postgres' = LISTEN/NOTIFY; 'local' = pub/sub en memoria (tests/desarrollo).
+# Cada stream ocupa un hilo de gunicorn: el tope por proceso debe quedar por
+# debajo de --threads para no dejar sin hilos a la API normal.
+CUSTOMER_EVENTS_BACKEND = config('CUSTOMER_EVENTS_BACKEND', default='postgres')
+CUSTOMER_EVENTS_MAX_STREAMS = config('CUSTOMER_EVENTS_MAX_STREAMS', default=4, cast=int)
+CUSTOMER_EVENTS_MAX_LIFETIME = config('CUSTOMER_EVENTS_MAX_LIFETIME', default=120, cast=int)  # segundos
+CUSTOMER_EVENTS_HEARTBEAT = config('CUSTOMER_EVENTS_HEARTBEAT', default=15, cast=int)  # segundos
+
+# -------------------------
+# Exportaciones en segundo plano (apps/exports, worker: run_export_worker)
+# -------------------------
+EXPORT_WORKER_CONCURRENCY = config('EXPORT_WORKER_CONCURRENCY', default=2, cast=int)
+EXPORT_JOB_TTL_HOURS = config('EXPORT_JOB_TTL_HOURS', default=24, cast=int)
+EXPORT_JOB_TIMEOUT_SECONDS = config('EXPORT_JOB_TIMEOUT_SECONDS', default=900, cast=int)
+EXPORT_JOB_MAX_ATTEMPTS = config('EXPORT_JOB_MAX_ATTEMPTS', default=3, cast=int)
+EXPORT_JOB_MAX_PENDING_PER_USER = config('EXPORT_JOB_MAX_PENDING_PER_USER', default=3, cast=int)
+
 # -------------------------
 # JWT Settings
 # -------------------------
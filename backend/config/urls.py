@@ -20,5 +20,6 @@ urlpatterns = [
     path("api/", include("apps.work_orders.urls")),
     path("api/", include("apps.cash_register.urls")),
     path("api/period-closures/", include("apps.period_closures.urls")),
+    path("api/", include("apps.exports.urls")),
 
 ]
\ No newline at end of file
@@ -0,0 +1,110 @@
+/**
+ * Eventos en vivo del portal del cliente (SSE sobre fetch).
+ *
+ * Se usa fetch + ReadableStream en lugar de EventSource para poder mandar el
+ * header Authorization (el token no viaja en la URL).
+ *
+ *   CustomerEvents.connect(API_BASE, token, function (event) { ... });
+ *
+ * event.type: "appointment" | "work_order_ready" | "resync".
+ * "resync" llega al (re)conectar: pudo haberse perdido algo, recargar una vez.
+ * El servidor cierra el stream cada ~2 min; se reconecta solo. Con la pestaña
+ * oculta se desconecta y al volver reconecta (y emite "resync").
+ * Si el servidor rechaza el stream (503: cupo de streams lleno) se emite
+ * "resync" en cada reintento, así la página hace una consulta puntual y no
+ * queda desactualizada mientras espera lugar.
+ */
+(function () {
+  var RETRY_MS = 3000;
+  var MAX_RETRY_MS = 60000;
+
+  function parseBlock(block) {
+    var type = 'message';
+    var data = '';
+    block.split('\n').forEach(function (line) {
+      if (line.indexOf('event:') === 0) type = line.slice(6).trim();
+      else if (line.indexOf('data:') === 0) data += line.slice(5).trim();
+    });
+    if (!data) return null;
+    try {
+      var event = JSON.parse(data);
+      event.type = event.type || type;
+      return event;
+    } catch (_) { return null; }
+  }
+
+  window.CustomerEvents = {
+    connect: function (apiBase, token, onEvent) {
+      if (!token || !window.fetch || !window.ReadableStream) return;
+
+      var url = apiBase + '/api/customer-appointments/events/';
+      var controller = null;
+      var retryMs = RETRY_MS;
+      var timer = null;
+      var connectedOnce = false;
+      var failures = 0;
+
+      function schedule(ms) {
+        clearTimeout(timer);
+        timer = setTimeout(open, ms);
+      }
+
+      async function open() {
+        if (document.hidden) return;
+        controller = new AbortController();
+        try {
+          var res = await fetch(url, {
+            headers: { 'Authorization': 'Bearer ' + token, 'Accept': 'text/event-stream' },
+            signal: controller.signal,
+          });
+          if (res.status === 401 || res.status === 403) return;  // sesión vencida: no insistir
+          if (!res.ok || !res.body) {
+            // Sin stream: una consulta puntual en lugar de los eventos perdidos
+            if (connectedOnce || failures > 0) onEvent({ type: 'resync' });
+            failures += 1;
+            var after = parseInt(res.headers.get('Retry-After') || '0', 10) * 1000;
+            retryMs = Math.min(Math.max(after, retryMs * 2), MAX_RETRY_MS);
+            schedule(retryMs);
+            return;
+          }
+
+          retryMs = RETRY_MS;
+          failures = 0;
+          if (connectedOnce) onEvent({ type: 'resync' });
+          connectedOnce = true;
+
+          var reader = res.body.getReader();
+          var decoder = new TextDecoder();
+          var buffer = '';
+          while (true) {
+            var chunk = await reader.read();
+            if (chunk.done) break;
+            buffer += decoder.decode(chunk.value, { stream: true });
+            var parts = buffer.split('\n\n');
+            buffer = parts.pop();
+            parts.forEach(function (block) {
+              var event = parseBlock(block);
+              if (event && event.type !== 'hello') onEvent(event);
+            });
+          }
+          schedule(RETRY_MS);
+        } catch (err) {
+          if (err && err.name === 'AbortError') return;
+          retryMs = Math.min(retryMs * 2, MAX_RETRY_MS);
+          schedule(retryMs);
+        }
+      }
+
+      document.addEventListener('visibilitychange', function () {
+        if (document.hidden) {
+          clearTimeout(timer);
+          if (controller) controller.abort();
+        } else {
+          schedule(0);
+        }
+      });
+
+      open();
+    },
+  };
+})();
@@ -0,0 +1,60 @@
+/**
+ * Exportaciones en segundo plano (/api/export-jobs/).
+ *
+ *   const { blob, filename } = await runExportJob(API_BASE, token, "work_orders_report",
+ *     { date_from: "2026-01-01", date_to: "2026-01-31" },
+ *     (job) => { btn.textContent = `Exportando... ${job.progress}%`; });
+ *
+ * Encola el job, consulta el estado hasta que termina y descarga el archivo.
+ * El servidor no queda ocupado generando el reporte dentro del request.
+ */
+(function () {
+  var POLL_MS = 1500;
+  var MAX_POLL_MS = 5000;
+
+  function sleep(ms) { return new Promise(function (r) { setTimeout(r, ms); }); }
+
+  async function request(url, token, options) {
+    options = options || {};
+    options.headers = Object.assign({ 'Authorization': 'Bearer ' + token }, options.headers || {});
+    var res = await fetch(url, options);
+    if (!res.ok) {
+      var detail = null;
+      try { detail = (await res.json()).detail; } catch (_) {}
+      throw new Error(detail || ('HTTP ' + res.status));
+    }
+    return res;
+  }
+
+  window.runExportJob = async function (apiBase, token, kind, params, onProgress) {
+    var base = apiBase + '/api/export-jobs/';
+    var res = await request(base, token, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ kind: kind, params: params || {} }),
+    });
+    var job = await res.json();
+
+    var wait = POLL_MS;
+    while (job.status === 'queued' || job.status === 'running') {
+      if (onProgress) onProgress(job);
+      await sleep(wait);
+      wait = Math.min(wait + 500, MAX_POLL_MS);
+      job = await (await request(base + job.job_id + '/', token)).json();
+    }
+    if (job.status !== 'done') throw new Error(job.error || 'La exportación falló.');
+    if (onProgress) onProgress(job);
+
+    var file = await request(base + job.job_id + '/download/', token);
+    return { blob: await file.blob(), filename: job.result_filename };
+  };
+
+  window.saveBlob = function (blob, filename) {
+    var url = URL.createObjectURL(blob);
+    var a = document.createElement('a');
+    a.href = url;
+    a.download = filename;
+    a.click();
+    setTimeout(function () { URL.revokeObjectURL(url); }, 1000);
+  };
+})();